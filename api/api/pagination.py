@@ -1,13 +1,26 @@
 """
-Module providing a custom pagination class for paginating API responses.
+Module providing custom pagination classes for paginating API responses.
 
 This module defines a custom pagination class, `CustomPagination`, which extends
 the `PageNumberPagination` class provided by Django REST Framework. It allows for
 customization of pagination parameters such as page size and maximum page size.
+
+It also defines `KeysetPagination`, which walks entries ordered by date and id
+with opaque cursors instead of page numbers, `HistoryPagination`, which
+paginates by page number unless the client opts into cursors, and
+`ResamplePagination`, which serves resampled history in larger pages.
 """
 
-from rest_framework import pagination
-from rest_framework import response
+import collections.abc
+import datetime
+import typing
+
+from django.db import models
+from django.utils import dateparse
+from rest_framework import exceptions, pagination, request as drf_request
+from rest_framework import response, views
+
+Position = typing.Tuple[datetime.datetime, int]
 
 
 class CustomPagination(pagination.PageNumberPagination):
@@ -44,3 +57,284 @@ class CustomPagination(pagination.PageNumberPagination):
                 "results": data,
             }
         )
+
+
+class KeysetPagination(pagination.CursorPagination):
+    """
+    Keyset pagination of entries ordered by date and id.
+
+    A cursor holds the (date, id) position of the last entry of a page, or of
+    the first one for the previous page, and a page is the entries right after
+    (or before) that position. Entries are neither counted nor skipped, so
+    every page costs the same whatever its depth, given an index on (date, id).
+    Querysets are sought with `seek`; other sequences, like the archived
+    history, must provide a `seek(position, reverse, limit)` method.
+    """
+
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("date", "id")
+
+    def paginate_queryset(
+        self,
+        queryset: typing.Union[models.QuerySet, typing.Sequence],
+        request: drf_request.Request,
+        view: typing.Optional[views.APIView] = None,
+    ) -> typing.Optional[list]:
+        """
+        Return the page of entries selected by the cursor of the request.
+
+        Args:
+            queryset: The entries, a queryset or a sequence with `seek`.
+            request (Request): The request.
+            view: The view.
+
+        Returns:
+            Optional[list]: The entries of the page in ascending order.
+
+        Raises:
+            NotFound: If the cursor is invalid.
+
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        position = self.decode_position(self.cursor)
+        reverse = bool(self.cursor and self.cursor.reverse)
+
+        queryset_seek = getattr(queryset, "seek", None)
+        if queryset_seek is not None:
+            entries = queryset_seek(
+                position=position, reverse=reverse, limit=self.page_size + 1
+            )
+        else:
+            entries = list(
+                seek(queryset, position=position, reverse=reverse)[: self.page_size + 1]
+            )
+
+        has_more = len(entries) > self.page_size
+        self.page = entries[: self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.next_position = self.get_position(self.page[-1]) if self.page else position
+        self.previous_position = (
+            self.get_position(self.page[0]) if self.page else position
+        )
+
+        return self.page
+
+    def get_next_link(self) -> typing.Optional[str]:
+        """Return the link to the entries after the page."""
+        if not self.has_next or self.next_position is None:
+            return None
+
+        return self.encode_position(self.next_position, reverse=False)
+
+    def get_previous_link(self) -> typing.Optional[str]:
+        """Return the link to the entries before the page."""
+        if not self.has_previous or self.previous_position is None:
+            return None
+
+        return self.encode_position(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data: list):
+        """
+        Return a paginated response for the provided data.
+
+        Args:
+            data (list): List of serialized data objects.
+
+        Returns:
+            Response: Paginated response containing the next and previous
+                      links and results, without a total count.
+
+        """
+        return response.Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    @staticmethod
+    def get_position(
+        entry: typing.Union[models.Model, typing.Mapping[str, typing.Any]],
+    ) -> Position:
+        """
+        Return the position of an entry.
+
+        Args:
+            entry (Union[Model, Mapping[str, Any]]): The entry, a model instance
+                or a row of a `values()` queryset.
+
+        Returns:
+            Position: The date and id of the entry.
+
+        """
+        if isinstance(entry, collections.abc.Mapping):
+            return entry["date"], entry["id"]
+
+        return entry.date, entry.pk
+
+    def encode_position(self, position: Position, reverse: bool) -> str:
+        """
+        Build the link of a cursor at a position.
+
+        Args:
+            position (Position): The date and id of the boundary entry.
+            reverse (bool): Whether the cursor selects the entries before it.
+
+        Returns:
+            str: The link.
+
+        """
+        date, pk = position
+        return self.encode_cursor(
+            pagination.Cursor(
+                offset=0, reverse=reverse, position=f"{date.isoformat()}|{pk}"
+            )
+        )
+
+    def decode_position(
+        self, cursor: typing.Optional[pagination.Cursor]
+    ) -> typing.Optional[Position]:
+        """
+        Read the position of a cursor.
+
+        Args:
+            cursor (Optional[Cursor]): The decoded cursor.
+
+        Returns:
+            Optional[Position]: The date and id of the boundary entry,
+            None without a cursor.
+
+        Raises:
+            NotFound: If the position is invalid.
+
+        """
+        if cursor is None or cursor.position is None:
+            return None
+
+        try:
+            date, pk = cursor.position.split("|")
+            position = (dateparse.parse_datetime(date), int(pk))
+        except (TypeError, ValueError):
+            raise exceptions.NotFound(self.invalid_cursor_message) from None
+
+        if position[0] is None:
+            raise exceptions.NotFound(self.invalid_cursor_message)
+
+        return position
+
+
+class HistoryPagination(CustomPagination):
+    """
+    Page-number pagination switching to keyset pagination on request.
+
+    Requests with `pagination=cursor`, or with a `cursor`, are paginated by
+    `KeysetPagination`; other requests keep the page-number response.
+    """
+
+    def paginate_queryset(
+        self,
+        queryset: typing.Union[models.QuerySet, typing.Sequence],
+        request: drf_request.Request,
+        view: typing.Optional[views.APIView] = None,
+    ) -> typing.Optional[list]:
+        """
+        Return the page of entries of the request.
+
+        Args:
+            queryset: The entries.
+            request (Request): The request.
+            view: The view.
+
+        Returns:
+            Optional[list]: The entries of the page.
+
+        """
+        self.keyset_pagination = None
+        if (
+            request.query_params.get("pagination") == "cursor"
+            or KeysetPagination.cursor_query_param in request.query_params
+        ):
+            self.keyset_pagination = KeysetPagination()
+            return self.keyset_pagination.paginate_queryset(queryset, request, view)
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data: list):
+        """
+        Return a paginated response for the provided data.
+
+        Args:
+            data (list): List of serialized data objects.
+
+        Returns:
+            Response: The response of the pagination used for the request.
+
+        """
+        if self.keyset_pagination is not None:
+            return self.keyset_pagination.get_paginated_response(data)
+
+        return super().get_paginated_response(data)
+
+
+class ResamplePagination(CustomPagination):
+    """
+    Page-number pagination of the resampled history.
+
+    Pages are larger, so a chart of a year of daily or weekly buckets
+    is fetched in a single response.
+    """
+
+    page_size = 1000
+    max_page_size = 1000
+
+
+def seek(
+    queryset: models.QuerySet,
+    position: typing.Optional[Position],
+    reverse: bool = False,
+) -> models.QuerySet:
+    """
+    Order entries by date and id and keep those after (or before) a position.
+
+    The position is compared on date first with a plain range condition,
+    so the index on (date, id) starts the scan at the position, and on id
+    only among the entries of the same date.
+
+    Args:
+        queryset (QuerySet): The entries.
+        position (Optional[Position]): The date and id to start from,
+            None to start from the first (or last) entry.
+        reverse (bool): Whether to walk the entries backwards.
+
+    Returns:
+        QuerySet: The entries in walk order.
+
+    """
+    if position is not None:
+        date, pk = position
+        if reverse:
+            queryset = queryset.filter(date__lte=date).filter(
+                models.Q(date__lt=date) | models.Q(date=date, id__lt=pk)
+            )
+        else:
+            queryset = queryset.filter(date__gte=date).filter(
+                models.Q(date__gt=date) | models.Q(date=date, id__gt=pk)
+            )
+
+    return queryset.order_by(*(("-date", "-id") if reverse else ("date", "id")))
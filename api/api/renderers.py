@@ -0,0 +1,43 @@
+"""
+Module providing a fast JSON renderer for API responses.
+
+This module defines `ORJSONRenderer`, which extends the `JSONRenderer` class
+provided by Django REST Framework and renders responses with orjson. Values
+orjson does not know, like decimals or lazy translations, fall back to the
+encoder of Django REST Framework.
+"""
+
+import typing
+
+import orjson
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """Renderer of compact UTF-8 JSON with orjson."""
+
+    encoder = encoders.JSONEncoder()
+
+    def render(
+        self,
+        data: typing.Any,  # noqa: ANN401
+        accepted_media_type: typing.Optional[str] = None,
+        renderer_context: typing.Optional[typing.Mapping] = None,
+    ) -> bytes:
+        """
+        Render data into JSON.
+
+        Args:
+            data: The data.
+            accepted_media_type (Optional[str]): The accepted media type.
+            renderer_context (Optional[Mapping]): The context of the renderer.
+
+        Returns:
+            bytes: The JSON.
+
+        """
+        if data is None:
+            return b""
+
+        return orjson.dumps(data, default=self.encoder.default)
@@ -152,5 +152,9 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
 DEFAULT_CSV_PATH = os.path.join(BASE_DIR, "current_currencies.csv")
+HISTORY_ARCHIVE_DIR = os.environ.get("HISTORY_ARCHIVE_DIR")
+REDIS_URL = os.environ.get("REDIS_URL")
+RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", 15 * 60))
+CURRENT_SNAPSHOT_TTL = int(os.environ.get("CURRENT_SNAPSHOT_TTL", 60))
 EMAIL_TEST_USER: str = "test@mail.com"
 PASSWORD_TEST_USER: str = "test_294"
\ No newline at end of file
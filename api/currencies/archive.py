@@ -0,0 +1,291 @@
+"""
+Module providing read access to the archived currency history.
+
+The worker moves old months of the history from the database to one
+Parquet file per month in HISTORY_ARCHIVE_DIR. This module defines
+`HistoryArchive`, which reads the archived entries of a date range
+through memory-mapped files, and `ArchivedHistory`, a sequence chaining
+the archived entries with a `values()` queryset of the entries still in
+the database, joined with their currency,
+so views and commands can paginate and export both transparently,
+by page number or by keyset.
+"""
+
+import collections.abc
+import datetime
+import pathlib
+import re
+import typing
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from django.conf import settings
+from django.db import models
+
+from api import pagination
+from currencies import models as currencies_models
+
+FILE_PATTERN: re.Pattern = re.compile(r"^history_currencies_(\d{4})_(\d{2})\.parquet$")
+
+Row = typing.Dict[str, typing.Any]
+
+
+class HistoryArchive:
+    def __init__(self, directory: typing.Union[str, pathlib.Path]):
+        """
+        Initialize the archive.
+
+        Args:
+            directory (Union[str, pathlib.Path]): Directory of the archive.
+
+        """
+        self._directory = pathlib.Path(directory)
+
+    def get_months(self) -> typing.Dict[datetime.date, pathlib.Path]:
+        """
+        Retrieve the archived months.
+
+        Returns:
+            Dict[datetime.date, pathlib.Path]: Mapping of the first days
+            of the archived months to their files.
+
+        """
+        if not self._directory.is_dir():
+            return {}
+
+        months = {}
+        for path in self._directory.iterdir():
+            match = FILE_PATTERN.match(path.name)
+            if match:
+                months[datetime.date(int(match[1]), int(match[2]), 1)] = path
+
+        return months
+
+    def read(
+        self,
+        date_from: typing.Optional[datetime.datetime] = None,
+        date_to: typing.Optional[datetime.datetime] = None,
+        currency_id: typing.Optional[int] = None,
+    ) -> pa.Table:
+        """
+        Read the archived entries matching the filters of the history.
+
+        Only the files of the months the date range reaches into are read.
+        They are memory-mapped and filtered while they are decoded.
+
+        Args:
+            date_from (Optional[datetime.datetime]): Earliest date, inclusive.
+            date_to (Optional[datetime.datetime]): Latest date, inclusive.
+            currency_id (Optional[int]): Id of the currency.
+
+        Returns:
+            pa.Table: The entries ordered by date and id.
+
+        """
+        filters = []
+        if date_from is not None:
+            filters.append(("date", ">=", date_from))
+        if date_to is not None:
+            filters.append(("date", "<=", date_to))
+        if currency_id is not None:
+            filters.append(("currency_id", "=", currency_id))
+
+        tables = [
+            pq.read_table(path, memory_map=True, filters=filters or None)
+            for month, path in sorted(self.get_months().items())
+            if (date_from is None or get_next_month(month) > get_utc_date(date_from))
+            and (date_to is None or month <= get_utc_date(date_to))
+        ]
+        if not tables:
+            return pa.table({})
+
+        return pa.concat_tables(tables).sort_by(
+            [("date", "ascending"), ("id", "ascending")]
+        )
+
+
+class ArchivedHistory(collections.abc.Sequence):
+    """Archived history rows followed by the rows of a `values()` queryset."""
+
+    def __init__(self, archived: pa.Table, queryset: models.QuerySet):
+        """
+        Initialize the sequence.
+
+        Args:
+            archived (pa.Table): The archived entries.
+            queryset (QuerySet): The rows of the history entries in the database,
+                with the columns of the entries and `currency__` columns.
+
+        """
+        self._archived = archived
+        self._queryset = queryset
+        self._count: typing.Optional[int] = None
+
+    def __len__(self) -> int:
+        """Return the number of archived and stored entries."""
+        if self._count is None:
+            self._count = self._archived.num_rows + self._queryset.count()
+
+        return self._count
+
+    def __getitem__(self, index: typing.Union[int, slice]) -> typing.Union[
+        Row,
+        typing.List[Row],
+    ]:
+        """
+        Return a row or a list of rows.
+
+        Archived entries are built as rows shaped like the rows of the
+        queryset, so they are serialized like the stored ones.
+
+        Args:
+            index (Union[int, slice]): Index or slice of the rows.
+
+        Returns:
+            Union[Row, List[Row]]: The row, or the list of rows of a slice.
+
+        Raises:
+            IndexError: If the index is out of range.
+
+        """
+        if isinstance(index, int):
+            position = index + len(self) if index < 0 else index
+            entries = self[position : position + 1] if position >= 0 else []
+            if not entries:
+                raise IndexError(index)
+            return entries[0]
+
+        start, stop, _ = index.indices(len(self))
+        archived_count = self._archived.num_rows
+        entries = []
+
+        if start < archived_count:
+            entries.extend(
+                build_rows(
+                    self._archived.slice(start, min(stop, archived_count) - start)
+                )
+            )
+        if stop > archived_count:
+            entries.extend(
+                self._queryset[max(start - archived_count, 0) : stop - archived_count]
+            )
+
+        return entries
+
+    def seek(
+        self,
+        position: typing.Optional[pagination.Position],
+        reverse: bool,
+        limit: int,
+    ) -> typing.List[Row]:
+        """
+        Return the rows after (or before) a position, for keyset pagination.
+
+        The archive and the database are sought separately and their entries
+        merged, as the history can gain entries in archived months later.
+
+        Args:
+            position (Optional[Position]): The date and id to start from,
+                None to start from the first (or last) entry.
+            reverse (bool): Whether to walk the entries backwards.
+            limit (int): Maximum number of entries.
+
+        Returns:
+            List[Row]: The rows in walk order.
+
+        """
+        archived = self._archived
+        if position is not None:
+            date, pk = position
+            compare = pc.less if reverse else pc.greater
+            archived = archived.filter(
+                pc.or_(
+                    compare(archived["date"], date),
+                    pc.and_(
+                        pc.equal(archived["date"], date), compare(archived["id"], pk)
+                    ),
+                )
+            )
+        if reverse:
+            archived = archived.slice(max(archived.num_rows - limit, 0))
+        else:
+            archived = archived.slice(0, limit)
+
+        entries = build_rows(archived) + list(
+            pagination.seek(self._queryset, position=position, reverse=reverse)[:limit]
+        )
+
+        return sorted(
+            entries, key=lambda entry: (entry["date"], entry["id"]), reverse=reverse
+        )[:limit]
+
+
+def build_rows(archived: pa.Table) -> typing.List[Row]:
+    """
+    Join archived rows with the columns of their currency.
+
+    Args:
+        archived (pa.Table): The archived rows.
+
+    Returns:
+        List[Row]: The rows with `currency__` columns.
+
+    """
+    rows = archived.to_pylist()
+    if not rows:
+        return rows
+
+    currencies = {
+        currency["id"]: {
+            f"currency__{column}": value for column, value in currency.items()
+        }
+        for currency in currencies_models.Currency.objects.filter(
+            pk__in={row["currency_id"] for row in rows}
+        ).values()
+    }
+
+    return [row | currencies.get(row["currency_id"], {}) for row in rows]
+
+
+def get_next_month(month: datetime.date) -> datetime.date:
+    """
+    Return the first day of the month after a month.
+
+    Args:
+        month (datetime.date): A day of the month.
+
+    Returns:
+        datetime.date: The first day of the next month.
+
+    """
+    return (month.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+
+def get_utc_date(date: datetime.datetime) -> datetime.date:
+    """
+    Return the UTC day of a date, the months of the archive being UTC months.
+
+    Args:
+        date (datetime.datetime): The date.
+
+    Returns:
+        datetime.date: The UTC day.
+
+    """
+    return date.astimezone(datetime.timezone.utc).date()
+
+
+def get_archive() -> typing.Optional[HistoryArchive]:
+    """
+    Return the archive of the history.
+
+    Returns:
+        Optional[HistoryArchive]: The archive, None if HISTORY_ARCHIVE_DIR
+        is not set.
+
+    """
+    if not settings.HISTORY_ARCHIVE_DIR:
+        return None
+
+    return HistoryArchive(settings.HISTORY_ARCHIVE_DIR)
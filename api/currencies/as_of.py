@@ -0,0 +1,145 @@
+"""
+Module providing the rates of the currencies as of given dates.
+
+The rate of a currency from a source as of a date is its latest history
+entry from the source at or before that date. `get_rates_as_of` looks them up
+for a batch of dates in a single query: for every date and every current rate
+of a currency from a source, a LATERAL subquery probes the index on
+(currency_id, date DESC) for the latest entry, so the cost grows with the
+number of dates and current rates, not with the history. Archived entries
+are looked up with pyarrow in the archived months the database lookups cannot
+rule out, and the latest of both is kept.
+"""
+
+import datetime
+import typing
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from django.db import connection
+
+from currencies import archive as currencies_archive, models as currencies_models
+from currencies import serializers as currencies_serializer
+
+Row = typing.Dict[str, typing.Any]
+RateKey = typing.Tuple[int, str]
+
+
+def get_rates_as_of(
+    dates: typing.Sequence[datetime.datetime],
+) -> typing.Dict[datetime.datetime, typing.List[Row]]:
+    """
+    Look up the rates of all currencies as of dates.
+
+    Args:
+        dates (Sequence[datetime.datetime]): The dates.
+
+    Returns:
+        Dict[datetime.datetime, List[Row]]: Mapping of every date to the rows
+        of the latest entries of every currency and source at or before it,
+        ordered by currency and source, with the columns of
+        `HISTORY_ROW_SERIALIZER`.
+
+    """
+    if not dates:
+        return {}
+
+    rates: typing.Dict[datetime.datetime, typing.Dict[RateKey, Row]] = {
+        date: {} for date in dates
+    }
+    missing = False
+    with connection.cursor() as cursor:
+        cursor.execute(get_sql(), [list(dates)])
+        columns = [column.name for column in cursor.description]
+        for values in cursor.fetchall():
+            row = dict(zip(columns, values))
+            date = row.pop("as_of")
+            if row["id"] is None:
+                missing = True
+            else:
+                rates[date][(row["currency__id"], row["source"])] = row
+
+    history_archive = currencies_archive.get_archive()
+    if history_archive is not None:
+        found = [row["date"] for rows in rates.values() for row in rows.values()]
+        archived = history_archive.read(
+            date_from=min(found) if found and not missing else None,
+            date_to=max(dates),
+        )
+        for date, row in get_archived_rates_as_of(archived, dates):
+            rows = rates[date]
+            key = (row["currency__id"], row["source"])
+            other = rows.get(key)
+            if other is None or (other["date"], other["id"]) < (row["date"], row["id"]):
+                rows[key] = row
+
+    return {date: [rows[key] for key in sorted(rows)] for date, rows in rates.items()}
+
+
+def get_archived_rates_as_of(
+    archived: pa.Table, dates: typing.Iterable[datetime.datetime]
+) -> typing.Iterator[typing.Tuple[datetime.datetime, Row]]:
+    """
+    Look up the latest archived entries of the currencies as of dates.
+
+    Args:
+        archived (pa.Table): The archived entries ordered by date and id.
+        dates (Iterable[datetime.datetime]): The dates.
+
+    Yields:
+        Tuple[datetime.datetime, Row]: A date and the row of the latest
+        archived entry of a currency from a source at or before it.
+
+    """
+    if not archived.num_rows:
+        return
+
+    archived = archived.append_column(
+        "row", pa.array(range(archived.num_rows), pa.int64())
+    )
+    for date in dates:
+        latest = (
+            archived.filter(pc.less_equal(archived["date"], date))
+            .group_by(["currency_id", "source"], use_threads=False)
+            .aggregate([("row", "last")])
+        )
+        entries = archived.take(latest["row_last"]).drop_columns(["row"])
+        for row in currencies_archive.build_rows(entries):
+            yield date, row
+
+
+def get_sql() -> str:
+    """
+    Build the query of the rates as of an array of dates.
+
+    Returns:
+        str: The query, selecting the `as_of` date and the columns of
+        `HISTORY_ROW_SERIALIZER`, with the array of dates as parameter.
+
+    """
+    columns = ", ".join(
+        (
+            f"currency.{field.removeprefix('currency__')}"
+            if field.startswith("currency__")
+            else f"entry.{field}"
+        )
+        + f" AS {field}"
+        for field in currencies_serializer.HISTORY_ROW_SERIALIZER.fields
+    )
+
+    return f"""
+        SELECT as_of.date AS as_of, {columns}
+        FROM unnest(%s::timestamptz[]) AS as_of (date)
+        CROSS JOIN {currencies_models.CurrentRate._meta.db_table} AS current_rate
+        JOIN {currencies_models.Currency._meta.db_table} AS currency
+            ON currency.id = current_rate.currency_id
+        LEFT JOIN LATERAL (
+            SELECT *
+            FROM {currencies_models.HistoryCurrencies._meta.db_table} AS history
+            WHERE history.currency_id = current_rate.currency_id
+                AND history.source = current_rate.source
+                AND history.date <= as_of.date
+            ORDER BY history.date DESC
+            LIMIT 1
+        ) AS entry ON true
+    """  # noqa: S608
@@ -0,0 +1,279 @@
+"""
+Module providing a Redis cache of the responses of the currency endpoints.
+
+The worker bumps the version of the currency data in Redis after every
+ingestion which stored rates. This module defines `ResponseCache`, which keys
+cached responses by that version, the view and the normalized query
+parameters, so the next ingestion invalidates every cached response at once.
+A miss is computed by a single request holding a short Redis lock, while
+concurrent requests for the same key wait for its result instead of all
+querying the database. The cache is disabled unless REDIS_URL is set.
+The version and the time of the last ingestion, `DataState`, also validate
+conditional requests.
+"""
+
+import dataclasses
+import datetime
+import functools
+import hashlib
+import logging
+import time
+import typing
+import urllib.parse
+
+import redis
+from django.conf import settings
+from django.http import HttpRequest
+
+DATA_VERSION_KEY: str = "currencies:data_version"
+DATA_MODIFIED_AT_KEY: str = "currencies:data_modified_at"
+KEY_PREFIX: str = "api:response"
+LOCK_TTL: int = 10 * 1000
+WAIT_TIMEOUT: float = 5.0
+POLL_INTERVAL: float = 0.05
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class DataState:
+    version: int
+    modified_at: typing.Optional[datetime.datetime]
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        client: redis.Redis,
+        ttl: int = 15 * 60,
+        lock_ttl: int = LOCK_TTL,
+        wait_timeout: float = WAIT_TIMEOUT,
+        poll_interval: float = POLL_INTERVAL,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            client (redis.Redis): The Redis client.
+            ttl (int): Number of seconds a response is kept, which bounds
+                how stale a response gets if a version bump is missed.
+            lock_ttl (int): Number of milliseconds after which the lock
+                of a miss expires, even if its holder never releases it.
+            wait_timeout (float): Number of seconds a request waits for the
+                result of a concurrent request before computing it itself.
+            poll_interval (float): Number of seconds between two checks
+                of a waiting request.
+
+        """
+        self._client = client
+        self._ttl = ttl
+        self._lock_ttl = lock_ttl
+        self._wait_timeout = wait_timeout
+        self._poll_interval = poll_interval
+
+    def get_version(self) -> int:
+        """
+        Retrieve the version of the currency data.
+
+        Returns:
+            int: The version, 0 before the first ingestion.
+
+        """
+        return int(self._client.get(DATA_VERSION_KEY) or 0)
+
+    def get_data_state(self) -> DataState:
+        """
+        Retrieve the version and the time of the last ingestion in one call.
+
+        Returns:
+            DataState: The state, without time before the first ingestion.
+
+        """
+        version, modified_at = self._client.mget(DATA_VERSION_KEY, DATA_MODIFIED_AT_KEY)
+
+        return DataState(
+            version=int(version or 0),
+            modified_at=(
+                datetime.datetime.fromtimestamp(
+                    int(modified_at), tz=datetime.timezone.utc
+                )
+                if modified_at
+                else None
+            ),
+        )
+
+    def build_key(self, name: str, request: HttpRequest) -> str:
+        """
+        Build the key of the response of a view to a request.
+
+        The query parameters are sorted, so their order does not matter.
+        The host is part of the key, as responses hold absolute links.
+
+        Args:
+            name (str): Name of the view.
+            request (HttpRequest): The request.
+
+        Returns:
+            str: The key, including the version of the currency data.
+
+        """
+        return f"{KEY_PREFIX}:{self.get_version()}:{name}:{get_request_digest(request)}"
+
+    def get_or_compute(self, key: str, compute: typing.Callable[[], bytes]) -> bytes:
+        """
+        Return a cached response, computing and caching it on a miss.
+
+        Only the request taking the lock of the key computes a miss; the
+        others poll the key until the response is cached, the lock is
+        released without a response, or the wait times out, and only
+        then compute the response themselves.
+
+        Args:
+            key (str): The key of the response.
+            compute (Callable[[], bytes]): Function computing the response.
+
+        Returns:
+            bytes: The response.
+
+        """
+        value = self._client.get(key)
+        if value is not None:
+            return value
+
+        lock_key = f"{key}:lock"
+        if self._client.set(lock_key, 1, nx=True, px=self._lock_ttl):
+            try:
+                value = compute()
+                self._client.set(key, value, ex=self._ttl)
+            finally:
+                self._client.delete(lock_key)
+            return value
+
+        deadline = time.monotonic() + self._wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self._poll_interval)
+            value = self._client.get(key)
+            if value is not None:
+                return value
+            if not self._client.exists(lock_key):
+                break
+
+        return compute()
+
+
+def get_request_digest(request: HttpRequest, *parts: str) -> str:
+    """
+    Hash the host and the sorted query parameters of a request.
+
+    Args:
+        request (HttpRequest): The request.
+        *parts (str): Other values to hash with them.
+
+    Returns:
+        str: The hex digest.
+
+    """
+    params = sorted(
+        (key, value) for key, values in request.GET.lists() for value in values
+    )
+    digest = hashlib.blake2b(
+        f"{request.get_host()}?{urllib.parse.urlencode(params)}".encode(),
+        digest_size=16,
+    )
+    for part in parts:
+        digest.update(f"|{part}".encode())
+
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def create_response_cache(url: str, ttl: int) -> ResponseCache:
+    """
+    Create the response cache of the process for a Redis URL.
+
+    Args:
+        url (str): The Redis URL.
+        ttl (int): Number of seconds a response is kept.
+
+    Returns:
+        ResponseCache: The response cache.
+
+    """
+    return ResponseCache(client=redis.Redis.from_url(url), ttl=ttl)
+
+
+def get_response_cache() -> typing.Optional[ResponseCache]:
+    """
+    Return the response cache.
+
+    Returns:
+        Optional[ResponseCache]: The response cache, None if REDIS_URL
+        is not set.
+
+    """
+    if not settings.REDIS_URL:
+        return None
+
+    return create_response_cache(
+        url=settings.REDIS_URL, ttl=settings.RESPONSE_CACHE_TTL
+    )
+
+
+def get_data_state() -> typing.Optional[DataState]:
+    """
+    Return the version and the time of the last ingestion.
+
+    Returns:
+        Optional[DataState]: The state, None if REDIS_URL is not set
+        or Redis fails.
+
+    """
+    response_cache = get_response_cache()
+    if response_cache is None:
+        return None
+
+    try:
+        return response_cache.get_data_state()
+    except redis.RedisError:
+        logger.exception("Reading the version of the currency data failed")
+        return None
+
+
+def get_cached(
+    name: str,
+    request: HttpRequest,
+    compute: typing.Callable[[], bytes],
+) -> bytes:
+    """
+    Return the response of a view to a request through the response cache.
+
+    Without REDIS_URL, or when Redis fails, the response is computed
+    without the cache, at most once.
+
+    Args:
+        name (str): Name of the view.
+        request (HttpRequest): The request.
+        compute (Callable[[], bytes]): Function computing the response.
+
+    Returns:
+        bytes: The response.
+
+    """
+    response_cache = get_response_cache()
+    if response_cache is None:
+        return compute()
+
+    computed: typing.List[bytes] = []
+
+    def compute_once() -> bytes:
+        computed.append(compute())
+        return computed[0]
+
+    try:
+        return response_cache.get_or_compute(
+            key=response_cache.build_key(name=name, request=request),
+            compute=compute_once,
+        )
+    except redis.RedisError:
+        logger.exception("The response cache failed")
+        return computed[0] if computed else compute()
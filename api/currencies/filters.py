@@ -1,10 +1,10 @@
 """
-Module providing a custom Django FilterSet
+Module providing custom Django FilterSets
 for filtering currency history data.
-This module defines a custom Django FilterSet class,
-`DateTimeRangeFilter`,
-which is used to filter currency history data based
-on date range and currency ID.
+This module defines the custom Django FilterSet classes
+`DateTimeRangeFilter`, which is used to filter currency history data based
+on date range and currency ID, and `RollupFilter`, which filters
+the rollups of the history by bucket range, currency ID and source.
 """
 
 from django_filters import rest_framework as filters
@@ -19,3 +19,10 @@ class DateTimeRangeFilter(filters.FilterSet):
     class Meta:
         model = currencies_models.HistoryCurrencies
         fields = ["date_from", "date_to", "currency_id"]  # noqa: RUF012
+
+
+class RollupFilter(filters.FilterSet):
+    date_from = filters.DateTimeFilter(field_name="bucket", lookup_expr="gte")
+    date_to = filters.DateTimeFilter(field_name="bucket", lookup_expr="lte")
+    currency_id = filters.NumberFilter(field_name="currency", lookup_expr="exact")
+    source = filters.CharFilter(field_name="source", lookup_expr="exact")
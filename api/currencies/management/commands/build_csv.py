@@ -5,15 +5,19 @@ This module defines a Django management command,
 `export_exchange_rates`, which exports
 the current exchange rates stored in the database
 to a CSV file specified by the user.
+With --date-from or --date-to, the history of a date range is exported
+instead, including the entries archived by the worker.
 """
 
 from django.core.management.base import BaseCommand
 from currencies.models import HistoryCurrencies
+from currencies import archive as currencies_archive
 import typing
 import csv
 from api import settings
-from django.utils import timezone
+from django.utils import dateparse, timezone
 import argparse
+import datetime
 
 
 class Command(BaseCommand):
@@ -35,6 +39,37 @@ class Command(BaseCommand):
             nargs="?",
             default=settings.DEFAULT_CSV_PATH,
         )
+        parser.add_argument(
+            "--date-from",
+            type=self.parse_datetime,
+            help="Export the history from this date (ISO 8601)",
+        )
+        parser.add_argument(
+            "--date-to",
+            type=self.parse_datetime,
+            help="Export the history up to this date (ISO 8601)",
+        )
+
+    @staticmethod
+    def parse_datetime(value: str) -> datetime.datetime:
+        """
+        Parse a date argument, naive dates being in the current time zone.
+
+        Args:
+            value (str): The date in ISO 8601 format.
+
+        Returns:
+            datetime.datetime: The aware date.
+
+        Raises:
+            ValueError: If the value is not a date.
+
+        """
+        date = dateparse.parse_datetime(value)
+        if date is None:
+            raise ValueError(value)
+
+        return date if timezone.is_aware(date) else timezone.make_aware(date)
 
     def handle(self, *args: typing.Tuple, **options: typing.Dict):
         """
@@ -46,13 +81,20 @@ class Command(BaseCommand):
 
         """
         file_path = options["file_path"]
+        date_from = options.get("date_from")
+        date_to = options.get("date_to")
 
-        current_time = timezone.now()
-        queryset = HistoryCurrencies.objects.filter(
-            date__lt=current_time, actualy_end__gt=current_time
-        )
-        if queryset:
-            raw_data = queryset.values()
+        if date_from or date_to:
+            raw_data = self.get_history(date_from=date_from, date_to=date_to)
+        else:
+            current_time = timezone.now()
+            raw_data = list(
+                HistoryCurrencies.objects.filter(
+                    date__lt=current_time, actualy_end__gt=current_time
+                ).values()
+            )
+
+        if raw_data:
             fields = tuple(raw_data[0].keys())
 
             with open(file_path, "w", encoding="utf-8") as file:  # type: ignore
@@ -65,3 +107,34 @@ class Command(BaseCommand):
 
         else:
             self.stdout.write(self.style.INFO("Current currencies not found"))
+
+    @staticmethod
+    def get_history(
+        date_from: typing.Optional[datetime.datetime],
+        date_to: typing.Optional[datetime.datetime],
+    ) -> typing.List[typing.Dict]:
+        """
+        Retrieve the history of a date range, archived entries first.
+
+        Args:
+            date_from (Optional[datetime.datetime]): Earliest date, inclusive.
+            date_to (Optional[datetime.datetime]): Latest date, inclusive.
+
+        Returns:
+            List[Dict]: The entries as rows of the history table.
+
+        """
+        queryset = HistoryCurrencies.objects.order_by("date", "id")
+        if date_from:
+            queryset = queryset.filter(date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(date__lte=date_to)
+
+        rows = list(queryset.values())
+        history_archive = currencies_archive.get_archive()
+        if history_archive is None:
+            return rows
+
+        archived = history_archive.read(date_from=date_from, date_to=date_to)
+
+        return archived.to_pylist() + rows
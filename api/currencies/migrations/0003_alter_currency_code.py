@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("currencies", "0002_favoritecurrency"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="currency",
+            name="code",
+            field=models.PositiveSmallIntegerField(unique=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("currencies", "0003_alter_currency_code"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BackfillCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True)),
+                ("rows", models.PositiveIntegerField()),
+                ("created_at", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "backfill_checkpoint",
+            },
+        ),
+    ]
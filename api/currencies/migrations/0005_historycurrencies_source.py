@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("currencies", "0004_backfillcheckpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="historycurrencies",
+            name="source",
+            field=models.CharField(default="nbu", max_length=32),
+        ),
+    ]
@@ -0,0 +1,141 @@
+"""
+Partition history_currencies by month of `date`.
+
+The table is rebuilt as a declaratively range-partitioned table with one
+partition per month, from the month of the oldest entry to a few months
+ahead, and a default partition for the entries out of these ranges. The
+worker pre-creates later partitions. Partitioned tables need the partition
+key in their primary key, so it becomes (id, date) in the database while
+Django and SQLAlchemy keep addressing entries by id. The migration only
+changes PostgreSQL databases.
+"""
+
+import datetime
+
+from django.db import migrations
+
+TABLE = "history_currencies"
+PARTITIONS_AHEAD = 3
+CURRENCY_ID_INDEX = "history_currencies_currency_id_8dd66616"
+CURRENCY_ID_FK = "history_currencies_currency_id_8dd66616_fk_currency_id"
+
+COLUMNS = "id, rate, date, actualy_end, currency_id, source"
+COLUMNS_DDL = """
+    rate numeric(10, 5) NOT NULL,
+    date timestamp with time zone NOT NULL,
+    actualy_end timestamp with time zone NOT NULL,
+    currency_id bigint NOT NULL,
+    source varchar(32) NOT NULL
+"""
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    """Return the first day of the month `months` after `month`."""
+    month_index = month.year * 12 + month.month - 1 + months
+    return datetime.date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def get_partition_name(month: datetime.date) -> str:
+    """Return the name of the partition of a month."""
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+def rebuild_table(schema_editor, new_table_ddl: str, after_create: list):
+    """Copy the entries into a new table which then replaces the current one."""
+    new_table = f"{TABLE}_new"
+    schema_editor.execute(new_table_ddl.format(table=new_table))
+    for sql in after_create:
+        schema_editor.execute(sql.format(table=new_table))
+    schema_editor.execute(
+        f"INSERT INTO {new_table} ({COLUMNS}) SELECT {COLUMNS} FROM {TABLE}"
+    )
+    schema_editor.execute(f"DROP TABLE {TABLE}")
+    schema_editor.execute(f"ALTER TABLE {new_table} RENAME TO {TABLE}")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname FROM pg_constraint "
+            f"WHERE conrelid = '{TABLE}'::regclass AND contype = 'p'"
+        )
+        primary_key = cursor.fetchone()[0]
+    schema_editor.execute(
+        f"ALTER TABLE {TABLE} RENAME CONSTRAINT {primary_key} TO {TABLE}_pkey"
+    )
+    schema_editor.execute(f"ALTER SEQUENCE {new_table}_id_seq RENAME TO {TABLE}_id_seq")
+    schema_editor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), "
+        f"COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM {TABLE}"
+    )
+    schema_editor.execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {CURRENCY_ID_FK} "
+        "FOREIGN KEY (currency_id) REFERENCES currency (id) "
+        "DEFERRABLE INITIALLY DEFERRED"
+    )
+    schema_editor.execute(f"CREATE INDEX {CURRENCY_ID_INDEX} ON {TABLE} (currency_id)")
+
+
+def partition_table(apps, schema_editor):
+    """Rebuild history_currencies as a monthly partitioned table."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT MIN(date) FROM {TABLE}")
+        oldest_date = cursor.fetchone()[0]
+
+    this_month = datetime.datetime.now(datetime.timezone.utc).date().replace(day=1)
+    month = (
+        min(oldest_date.date(), this_month).replace(day=1)
+        if oldest_date
+        else this_month
+    )
+    last_month = add_months(this_month, PARTITIONS_AHEAD)
+
+    partitions = [f"CREATE TABLE {TABLE}_default PARTITION OF {{table}} DEFAULT"]
+    while month <= last_month:
+        next_month = add_months(month, 1)
+        partitions.append(
+            f"CREATE TABLE {get_partition_name(month)} PARTITION OF {{table}} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') "
+            f"TO ('{next_month:%Y-%m-%d} 00:00:00+00')"
+        )
+        month = next_month
+
+    rebuild_table(
+        schema_editor,
+        new_table_ddl=(
+            "CREATE TABLE {table} ("
+            "id bigint GENERATED BY DEFAULT AS IDENTITY, "
+            f"{COLUMNS_DDL}, "
+            "PRIMARY KEY (id, date)"
+            ") PARTITION BY RANGE (date)"
+        ),
+        after_create=partitions,
+    )
+
+
+def unpartition_table(apps, schema_editor):
+    """Rebuild history_currencies as a single table."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    rebuild_table(
+        schema_editor,
+        new_table_ddl=(
+            "CREATE TABLE {table} ("
+            "id bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY, "
+            f"{COLUMNS_DDL}"
+            ")"
+        ),
+        after_create=[],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("currencies", "0005_historycurrencies_source"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_table, unpartition_table),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("currencies", "0006_partition_history_currencies"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyCurrencyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(default="nbu", max_length=32)),
+                ("bucket", models.DateTimeField()),
+                ("open", models.DecimalField(decimal_places=5, max_digits=10)),
+                ("high", models.DecimalField(decimal_places=5, max_digits=10)),
+                ("low", models.DecimalField(decimal_places=5, max_digits=10)),
+                ("close", models.DecimalField(decimal_places=5, max_digits=10)),
+                ("rate_sum", models.DecimalField(decimal_places=5, max_digits=20)),
+                ("samples", models.PositiveIntegerField()),
+                (
+                    "currency",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="currencies.currency",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "currency_rollup_daily",
+            },
+        ),
+        migrations.CreateModel(
+            name="HourlyCurrencyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(default="nbu", max_length=32)),
+                ("bucket", models.DateTimeField()),
+                ("open", models.DecimalField(decimal_places=5, max_digits=10)),
+                ("high", models.DecimalField(decimal_places=5, max_digits=10)),
+                ("low", models.DecimalField(decimal_places=5, max_digits=10)),
+                ("close", models.DecimalField(decimal_places=5, max_digits=10)),
+                ("rate_sum", models.DecimalField(decimal_places=5, max_digits=20)),
+                ("samples", models.PositiveIntegerField()),
+                (
+                    "currency",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="currencies.currency",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "currency_rollup_hourly",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailycurrencyrollup",
+            constraint=models.UniqueConstraint(
+                fields=("currency", "source", "bucket"),
+                name="currency_rollup_daily_unique",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="hourlycurrencyrollup",
+            constraint=models.UniqueConstraint(
+                fields=("currency", "source", "bucket"),
+                name="currency_rollup_hourly_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_current_rates(apps, schema_editor):
+    """Make the latest history entry of every currency its current rate."""
+    Currency = apps.get_model("currencies", "Currency")
+    CurrentRate = apps.get_model("currencies", "CurrentRate")
+    HistoryCurrencies = apps.get_model("currencies", "HistoryCurrencies")
+
+    current_rates = []
+    for currency_id in Currency.objects.values_list("id", flat=True):
+        entry = (
+            HistoryCurrencies.objects.filter(currency_id=currency_id)
+            .order_by("-date", "-id")
+            .first()
+        )
+        if entry is not None:
+            current_rates.append(
+                CurrentRate(
+                    currency_id=currency_id,
+                    rate=entry.rate,
+                    date=entry.date,
+                    actualy_end=entry.actualy_end,
+                    source=entry.source,
+                )
+            )
+
+    CurrentRate.objects.bulk_create(current_rates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("currencies", "0007_currency_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CurrentRate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rate", models.DecimalField(decimal_places=5, max_digits=10)),
+                ("date", models.DateTimeField()),
+                ("actualy_end", models.DateTimeField()),
+                ("source", models.CharField(default="nbu", max_length=32)),
+                (
+                    "currency",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="currencies.currency",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "current_rate",
+            },
+        ),
+        migrations.RunPython(fill_current_rates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("currencies", "0008_current_rate"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="historycurrencies",
+            index=models.Index(
+                fields=["date", "id"], name="history_currencies_date_id"
+            ),
+        ),
+    ]
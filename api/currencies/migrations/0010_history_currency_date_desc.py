@@ -0,0 +1,86 @@
+"""
+Index history_currencies on (currency_id, date DESC) without locking it.
+
+The index serves the lookups of the latest entry of a currency before a date.
+PostgreSQL cannot build an index concurrently on a partitioned table, so the
+index is created on the partitioned table only, invalid until every partition
+has one: the index of every partition is built concurrently and attached to
+it. Partitions created later get the index with the table. Other databases
+build the index as usual.
+"""
+
+from django.db import migrations, models
+
+TABLE = "history_currencies"
+INDEX = "history_currency_date_desc"
+COLUMNS = "(currency_id, date DESC)"
+
+
+def get_partitions(schema_editor) -> list:
+    """Return the partitions of the table, empty if it is not partitioned."""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT inhrelid::regclass::text FROM pg_inherits "
+            f"WHERE inhparent = '{TABLE}'::regclass ORDER BY 1"
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def create_index(apps, schema_editor):
+    """Create the index, concurrently on PostgreSQL."""
+    model = apps.get_model("currencies", "HistoryCurrencies")
+    index = models.Index(fields=["currency", "-date"], name=INDEX)
+    if schema_editor.connection.vendor != "postgresql":
+        schema_editor.add_index(model, index)
+        return
+
+    partitions = get_partitions(schema_editor)
+    if not partitions:
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX} ON {TABLE} {COLUMNS}"
+        )
+        return
+
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX} ON ONLY {TABLE} {COLUMNS}"
+    )
+    for partition in partitions:
+        partition_index = f"{partition}_currency_date_desc"
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} "
+            f"ON {partition} {COLUMNS}"
+        )
+        schema_editor.execute(f"ALTER INDEX {INDEX} ATTACH PARTITION {partition_index}")
+
+
+def drop_index(apps, schema_editor):
+    """Drop the index, with the indexes of the partitions."""
+    model = apps.get_model("currencies", "HistoryCurrencies")
+    index = models.Index(fields=["currency", "-date"], name=INDEX)
+    if schema_editor.connection.vendor != "postgresql":
+        schema_editor.remove_index(model, index)
+        return
+
+    concurrently = "" if get_partitions(schema_editor) else "CONCURRENTLY "
+    schema_editor.execute(f"DROP INDEX {concurrently}IF EXISTS {INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("currencies", "0009_history_currencies_date_id"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(create_index, drop_index)],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name="historycurrencies",
+                    index=models.Index(fields=["currency", "-date"], name=INDEX),
+                ),
+            ],
+        ),
+    ]
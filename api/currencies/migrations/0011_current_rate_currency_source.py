@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-18 14:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("currencies", "0010_history_currency_date_desc"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="currentrate",
+            name="currency",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, to="currencies.currency"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="currentrate",
+            constraint=models.UniqueConstraint(
+                fields=("currency", "source"),
+                name="current_rate_currency_source_unique",
+            ),
+        ),
+    ]
@@ -2,7 +2,10 @@
 Module defining the models for the currencies app.
 This module contains the model definitions for the currencies app,
 including models for currencies,
-historical currency rates, and user favorite currencies.
+historical currency rates tagged with their source, the current rate
+of every currency from every source maintained by the worker, their hourly and daily
+OHLC rollups maintained by the worker, user favorite currencies
+and the checkpoints of the worker's historical backfill.
 """
 
 from django.db import models
@@ -10,7 +13,7 @@ from django.contrib.auth import get_user_model
 
 
 class Currency(models.Model):
-    code = models.PositiveSmallIntegerField()
+    code = models.PositiveSmallIntegerField(unique=True)
     text_code = models.CharField(max_length=3)
     name = models.CharField(max_length=100)
 
@@ -23,9 +26,70 @@ class HistoryCurrencies(models.Model):
     rate = models.DecimalField(max_digits=10, decimal_places=5)
     date = models.DateTimeField()
     actualy_end = models.DateTimeField()
+    source = models.CharField(max_length=32, default="nbu")
 
     class Meta:
         db_table = "history_currencies"
+        indexes = [  # noqa: RUF012
+            models.Index(fields=["date", "id"], name="history_currencies_date_id"),
+            models.Index(
+                fields=["currency", "-date"], name="history_currency_date_desc"
+            ),
+        ]
+
+
+class CurrentRate(models.Model):
+    currency = models.ForeignKey(Currency, on_delete=models.CASCADE)
+    rate = models.DecimalField(max_digits=10, decimal_places=5)
+    date = models.DateTimeField()
+    actualy_end = models.DateTimeField()
+    source = models.CharField(max_length=32, default="nbu")
+
+    class Meta:
+        db_table = "current_rate"
+        constraints = [  # noqa: RUF012
+            models.UniqueConstraint(
+                fields=["currency", "source"],
+                name="current_rate_currency_source_unique",
+            )
+        ]
+
+
+class CurrencyRollup(models.Model):
+    currency = models.ForeignKey(Currency, on_delete=models.CASCADE)
+    source = models.CharField(max_length=32, default="nbu")
+    bucket = models.DateTimeField()
+    open = models.DecimalField(max_digits=10, decimal_places=5)
+    high = models.DecimalField(max_digits=10, decimal_places=5)
+    low = models.DecimalField(max_digits=10, decimal_places=5)
+    close = models.DecimalField(max_digits=10, decimal_places=5)
+    rate_sum = models.DecimalField(max_digits=20, decimal_places=5)
+    samples = models.PositiveIntegerField()
+
+    class Meta:
+        abstract = True
+
+
+class HourlyCurrencyRollup(CurrencyRollup):
+    class Meta:
+        db_table = "currency_rollup_hourly"
+        constraints = [  # noqa: RUF012
+            models.UniqueConstraint(
+                fields=["currency", "source", "bucket"],
+                name="currency_rollup_hourly_unique",
+            )
+        ]
+
+
+class DailyCurrencyRollup(CurrencyRollup):
+    class Meta:
+        db_table = "currency_rollup_daily"
+        constraints = [  # noqa: RUF012
+            models.UniqueConstraint(
+                fields=["currency", "source", "bucket"],
+                name="currency_rollup_daily_unique",
+            )
+        ]
 
 
 class FavoriteCurrency(models.Model):
@@ -34,3 +98,12 @@ class FavoriteCurrency(models.Model):
 
     class Meta:
         db_table = "favorite_currency"
+
+
+class BackfillCheckpoint(models.Model):
+    date = models.DateField(unique=True)
+    rows = models.PositiveIntegerField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "backfill_checkpoint"
@@ -0,0 +1,230 @@
+"""
+Module providing the resampling of the currency history into time buckets.
+
+The history is resampled in the database: `DateBin` assigns every entry to a
+bucket with `date_bin`, and window functions partitioned by currency, source
+and bucket keep one row per bucket per currency and source, carrying the
+last, average, minimum or maximum rate of the bucket and its number of
+samples, so the rates of different providers are never mixed. Buckets are
+aligned on Mondays at midnight UTC, so weekly buckets start on Mondays.
+Archived entries are resampled with pyarrow on the same buckets, and the
+buckets both sources reach into are merged.
+"""
+
+import dataclasses
+import datetime
+import decimal
+import typing
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from django.db import models
+from django.db.models import functions
+
+ORIGIN: datetime.datetime = datetime.datetime(2001, 1, 1, tzinfo=datetime.timezone.utc)
+
+Row = typing.Dict[str, typing.Any]
+
+
+@dataclasses.dataclass(frozen=True)
+class Interval:
+    stride: datetime.timedelta
+    multiple: int
+    unit: str
+
+
+INTERVALS: typing.Dict[str, Interval] = {
+    "15m": Interval(stride=datetime.timedelta(minutes=15), multiple=15, unit="minute"),
+    "1h": Interval(stride=datetime.timedelta(hours=1), multiple=1, unit="hour"),
+    "1d": Interval(stride=datetime.timedelta(days=1), multiple=1, unit="day"),
+    "1w": Interval(stride=datetime.timedelta(weeks=1), multiple=1, unit="week"),
+}
+
+AGGREGATIONS: typing.Tuple[str, ...] = ("last", "avg", "min", "max")
+
+
+class DateBin(models.Func):
+    """The start of the bucket of a date, with `date_bin`."""
+
+    function = "date_bin"
+    output_field = models.DateTimeField()
+
+    def __init__(
+        self,
+        stride: datetime.timedelta,
+        expression: models.Expression,
+        origin: datetime.datetime = ORIGIN,
+    ):
+        """
+        Initialize the expression.
+
+        Args:
+            stride (datetime.timedelta): The length of the buckets.
+            expression (Expression): The date.
+            origin (datetime.datetime): The start of a bucket.
+
+        """
+        super().__init__(
+            models.Value(stride, output_field=models.DurationField()),
+            expression,
+            models.Value(origin, output_field=models.DateTimeField()),
+        )
+
+
+def resample(
+    queryset: models.QuerySet, interval: Interval, aggregation: str
+) -> models.QuerySet:
+    """
+    Resample history entries in the database.
+
+    Args:
+        queryset (QuerySet): The history entries.
+        interval (Interval): The interval of the buckets.
+        aggregation (str): One of `AGGREGATIONS`.
+
+    Returns:
+        QuerySet: Rows of the currency id, source, bucket, aggregated rate as
+        `value`, number of samples, and the date and id of the last entry of
+        every bucket of every currency and source, ordered by bucket,
+        currency and source.
+
+    """
+    partition = [models.F("currency_id"), models.F("source"), models.F("bucket")]
+    values = {
+        "last": models.F("rate"),
+        "avg": models.Window(models.Avg("rate"), partition_by=partition),
+        "min": models.Window(models.Min("rate"), partition_by=partition),
+        "max": models.Window(models.Max("rate"), partition_by=partition),
+    }
+
+    return (
+        queryset.annotate(bucket=DateBin(interval.stride, models.F("date")))
+        .annotate(
+            row_number=models.Window(
+                functions.RowNumber(),
+                partition_by=partition,
+                order_by=[models.F("date").desc(), models.F("id").desc()],
+            ),
+            samples=models.Window(models.Count("id"), partition_by=partition),
+            value=values[aggregation],
+        )
+        .filter(row_number=1)
+        .order_by("bucket", "currency_id", "source")
+        .values("currency_id", "source", "bucket", "value", "samples", "date", "id")
+    )
+
+
+def resample_archive(
+    archived: pa.Table, interval: Interval, aggregation: str
+) -> typing.List[Row]:
+    """
+    Resample archived entries like `resample`.
+
+    Args:
+        archived (pa.Table): The archived entries ordered by date and id.
+        interval (Interval): The interval of the buckets.
+        aggregation (str): One of `AGGREGATIONS`.
+
+    Returns:
+        List[Row]: The rows of the buckets, shaped like the rows of `resample`.
+
+    """
+    if not archived.num_rows:
+        return []
+
+    aggregations = [("rate", "count"), ("row", "last")]
+    if aggregation != "last":
+        function = "sum" if aggregation == "avg" else aggregation
+        aggregations.append(("rate", function))
+    grouped = (
+        archived.append_column(
+            "bucket",
+            pc.floor_temporal(
+                archived["date"],
+                multiple=interval.multiple,
+                unit=interval.unit,
+                week_starts_monday=True,
+            ),
+        )
+        .append_column("row", pa.array(range(archived.num_rows), pa.int64()))
+        .group_by(["currency_id", "source", "bucket"], use_threads=False)
+        .aggregate(aggregations)
+    )
+    last_entries = archived.take(grouped["row_last"]).to_pylist()
+
+    rows = []
+    for bucket, last_entry in zip(grouped.to_pylist(), last_entries):
+        if aggregation == "last":
+            value = last_entry["rate"]
+        elif aggregation == "avg":
+            value = bucket["rate_sum"] / bucket["rate_count"]
+        else:
+            value = bucket[f"rate_{aggregation}"]
+        rows.append(
+            dict(
+                currency_id=bucket["currency_id"],
+                source=bucket["source"],
+                bucket=bucket["bucket"],
+                value=value,
+                samples=bucket["rate_count"],
+                date=last_entry["date"],
+                id=last_entry["id"],
+            )
+        )
+
+    return rows
+
+
+def merge(*sources: typing.Iterable[Row], aggregation: str) -> typing.List[Row]:
+    """
+    Merge the rows of buckets resampled from several sources.
+
+    Args:
+        *sources (Iterable[Row]): The rows of every source.
+        aggregation (str): The aggregation the rows were resampled with.
+
+    Returns:
+        List[Row]: One row per bucket per currency and source, ordered by
+        bucket, currency and source.
+
+    """
+    merged: typing.Dict[typing.Tuple[int, str, datetime.datetime], Row] = {}
+    for rows in sources:
+        for row in rows:
+            key = (row["currency_id"], row["source"], row["bucket"])
+            other = merged.get(key)
+            merged[key] = row if other is None else merge_rows(other, row, aggregation)
+
+    return sorted(
+        merged.values(),
+        key=lambda row: (row["bucket"], row["currency_id"], row["source"]),
+    )
+
+
+def merge_rows(row: Row, other: Row, aggregation: str) -> Row:
+    """
+    Merge two rows of the same bucket, currency and source.
+
+    Args:
+        row (Row): A row.
+        other (Row): The other row.
+        aggregation (str): The aggregation the rows were resampled with.
+
+    Returns:
+        Row: The row of the bucket over the samples of both rows.
+
+    """
+    last = max(row, other, key=lambda entry: (entry["date"], entry["id"]))
+    samples = row["samples"] + other["samples"]
+    values = (decimal.Decimal(row["value"]), decimal.Decimal(other["value"]))
+
+    if aggregation == "avg":
+        value = (values[0] * row["samples"] + values[1] * other["samples"]) / samples
+    elif aggregation == "min":
+        value = min(values)
+    elif aggregation == "max":
+        value = max(values)
+    else:
+        value = last["value"]
+
+    return last | dict(value=value, samples=samples)
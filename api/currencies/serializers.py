@@ -1,10 +1,18 @@
 """
 Module providing serializers for the currencies app.
-This module defines serializers for converting Currency
-and HistoryCurrencies model instances to and from JSON format,
+This module defines serializers for converting Currency,
+HistoryCurrencies and CurrentRate model instances, the rollups
+and the resampled buckets of the history and the rates as of dates
+to and from JSON format,
 as well as for validating and saving favorite currencies for users.
+It also defines `RowSerializer`, the fast read-only counterpart of
+a ModelSerializer for the rows of `values()` querysets.
 """
 
+import decimal
+import typing
+
+from django.utils import timezone
 from rest_framework import serializers
 from currencies import models
 from django.shortcuts import get_object_or_404
@@ -25,6 +33,148 @@ class HistoryCurrenciesSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class CurrentRateSerializer(serializers.ModelSerializer):
+    currency = CurrencySerializer()
+
+    class Meta:
+        model = models.CurrentRate
+        fields = "__all__"
+
+
+class RowSerializer:
+    """
+    Fast read-only serializer of the rows of `values()` querysets.
+
+    The fields of a serializer, nested serializers included, are compiled
+    once into a list of converters reading the joined columns of a row, so rows
+    are represented exactly like the serializer represents model instances
+    without building model instances or running DRF fields.
+    """
+
+    def __init__(
+        self,
+        serializer_class: typing.Type[serializers.Serializer],
+        prefix: str = "",
+    ):
+        """
+        Compile the fields of a serializer.
+
+        Args:
+            serializer_class (Type[Serializer]): The serializer.
+            prefix (str): Prefix of the columns of a nested serializer.
+
+        """
+        self.fields: typing.List[str] = []
+        self._converters: typing.List[
+            typing.Tuple[str, typing.Callable[[typing.Mapping], typing.Any]]
+        ] = []
+
+        for name, field in serializer_class().fields.items():
+            column = f"{prefix}{field.source}"
+            if isinstance(field, serializers.ModelSerializer):
+                nested = RowSerializer(type(field), prefix=f"{column}__")
+                self.fields.extend(nested.fields)
+                self._converters.append((name, nested.to_representation))
+                continue
+
+            self.fields.append(column)
+            self._converters.append((name, self._compile_field(field, column)))
+
+    def to_representation(self, row: typing.Mapping) -> typing.Dict:
+        """
+        Represent a row.
+
+        Args:
+            row (Mapping): The row, with the columns of `fields`.
+
+        Returns:
+            Dict: The representation of the row.
+
+        """
+        return {name: convert(row) for name, convert in self._converters}
+
+    def to_representation_many(
+        self, rows: typing.Iterable[typing.Mapping]
+    ) -> typing.List[typing.Dict]:
+        """
+        Represent rows.
+
+        Args:
+            rows (Iterable[Mapping]): The rows.
+
+        Returns:
+            List[Dict]: The representations of the rows.
+
+        """
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+    @staticmethod
+    def _compile_field(
+        field: serializers.Field, column: str
+    ) -> typing.Callable[[typing.Mapping], typing.Any]:
+        """
+        Build the converter of a field reading a column of the rows.
+
+        Args:
+            field (Field): The field of the serializer.
+            column (str): The column of the field.
+
+        Returns:
+            Callable[[Mapping], Any]: The converter.
+
+        """
+        if isinstance(field, serializers.DecimalField):
+            exponent = decimal.Decimal(1).scaleb(-field.decimal_places)
+
+            def convert_decimal(row: typing.Mapping) -> typing.Optional[str]:
+                value = row[column]
+                return None if value is None else f"{value.quantize(exponent):f}"
+
+            return convert_decimal
+
+        if isinstance(field, serializers.DateTimeField):
+
+            def convert_datetime(row: typing.Mapping) -> typing.Optional[str]:
+                value = row[column]
+                if value is None:
+                    return None
+                value = timezone.localtime(value).isoformat()
+                return f"{value[:-6]}Z" if value.endswith("+00:00") else value
+
+            return convert_datetime
+
+        def convert(row: typing.Mapping) -> typing.Any:  # noqa: ANN401
+            return row[column]
+
+        return convert
+
+
+class CurrencyRollupSerializer(serializers.Serializer):
+    currency_id = serializers.IntegerField()
+    source = serializers.CharField()
+    bucket = serializers.DateTimeField()
+    open = serializers.DecimalField(max_digits=10, decimal_places=5)
+    high = serializers.DecimalField(max_digits=10, decimal_places=5)
+    low = serializers.DecimalField(max_digits=10, decimal_places=5)
+    close = serializers.DecimalField(max_digits=10, decimal_places=5)
+    avg = serializers.DecimalField(max_digits=10, decimal_places=5)
+    samples = serializers.IntegerField()
+
+
+class ResampledHistorySerializer(serializers.Serializer):
+    currency_id = serializers.IntegerField()
+    source = serializers.CharField()
+    bucket = serializers.DateTimeField()
+    rate = serializers.DecimalField(max_digits=10, decimal_places=5, source="value")
+    samples = serializers.IntegerField()
+
+
+class RatesAsOfSerializer(serializers.Serializer):
+    as_of = serializers.DateTimeField()
+    rates = HistoryCurrenciesSerializer(many=True)
+
+
 class FavoriteCurrencySerializer(serializers.Serializer):
     currency_id = serializers.IntegerField()
 
@@ -65,3 +215,10 @@ class FavoriteCurrencySerializer(serializers.Serializer):
             currency=currency, user=user
         )
         return favorite_currency
+
+
+HISTORY_ROW_SERIALIZER: RowSerializer = RowSerializer(HistoryCurrenciesSerializer)
+CURRENT_RATE_ROW_SERIALIZER: RowSerializer = RowSerializer(CurrentRateSerializer)
+RESAMPLED_HISTORY_ROW_SERIALIZER: RowSerializer = RowSerializer(
+    ResampledHistorySerializer
+)
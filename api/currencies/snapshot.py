@@ -0,0 +1,315 @@
+"""
+Module providing an in-process snapshot of the current rates.
+
+Every API process holds an immutable `Snapshot` of the current rates of all
+currencies, with their currency, already represented for the responses.
+The current rate lists filter it by time instead of querying the database.
+`SnapshotStore` swaps in a new snapshot when the worker publishes an
+"ingested" event on Redis, or when the snapshot gets older than its TTL,
+in case an event was missed or REDIS_URL is not set. While a new snapshot
+is loaded by one request, the others keep being served from the old one.
+Every rate carries a digest of its representation, and the snapshot the time
+of the last ingestion, to validate conditional requests without serializing.
+"""
+
+import dataclasses
+import datetime
+import hashlib
+import itertools
+import logging
+import threading
+import time
+import typing
+
+import orjson
+import redis
+from django.conf import settings
+
+from currencies import cache, models as currencies_models, serializers
+
+DATA_CHANNEL: str = "currencies:ingested"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class SnapshotRate:
+    currency_id: int
+    date: datetime.datetime
+    actualy_end: datetime.datetime
+    data: typing.Dict[str, typing.Any]
+    digest: str
+
+
+@dataclasses.dataclass(frozen=True)
+class Snapshot:
+    rates: typing.Tuple[SnapshotRate, ...]
+    generation: int
+    loaded_at: float
+    modified_at: typing.Optional[datetime.datetime] = None
+
+    def get_current_rates(
+        self,
+        current_time: datetime.datetime,
+        currency_ids: typing.Optional[typing.Collection[int]] = None,
+        inclusive: bool = False,
+    ) -> typing.List[SnapshotRate]:
+        """
+        Return the rates valid at a time.
+
+        Args:
+            current_time (datetime.datetime): The time.
+            currency_ids (Optional[Collection[int]]): Ids of the currencies,
+                all currencies if None.
+            inclusive (bool): Whether rates starting or ending at the time
+                are valid.
+
+        Returns:
+            List[SnapshotRate]: The rates, ordered by currency, whose
+            representations must not be modified.
+
+        """
+        return [
+            rate
+            for rate in self.rates
+            if (currency_ids is None or rate.currency_id in currency_ids)
+            and (
+                rate.date <= current_time <= rate.actualy_end
+                if inclusive
+                else rate.date < current_time < rate.actualy_end
+            )
+        ]
+
+    def get_last_modified(
+        self, current_time: datetime.datetime
+    ) -> typing.Optional[datetime.datetime]:
+        """
+        Return the last time the rates valid at a time changed.
+
+        They change with an ingestion, and when a rate starts or ends.
+
+        Args:
+            current_time (datetime.datetime): The time.
+
+        Returns:
+            Optional[datetime.datetime]: The time, None if the time of the
+            last ingestion is unknown.
+
+        """
+        if self.modified_at is None:
+            return None
+
+        return max(
+            [
+                self.modified_at,
+                *(
+                    boundary
+                    for rate in self.rates
+                    for boundary in (rate.date, rate.actualy_end)
+                    if boundary <= current_time
+                ),
+            ]
+        )
+
+
+class SnapshotStore:
+    def __init__(
+        self,
+        ttl: float,
+        channel: str = DATA_CHANNEL,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            ttl (float): Number of seconds after which a snapshot is reloaded.
+            channel (str): Redis channel of the "ingested" events.
+            clock (Callable[[], float]): Monotonic clock of the TTL.
+
+        """
+        self._ttl = ttl
+        self._channel = channel
+        self._clock = clock
+        self._snapshot: typing.Optional[Snapshot] = None
+        self._generations = itertools.count(1)
+        self._generation = 0
+        self._load_lock = threading.Lock()
+        self._subscribe_lock = threading.Lock()
+        self._subscriber: typing.Optional[redis.client.PubSubWorkerThread] = None
+        self._subscribe_after = 0.0
+
+    def get(self) -> Snapshot:
+        """
+        Return the snapshot, reloading it when it is stale.
+
+        Only the first load blocks: while a stale snapshot is reloaded
+        by a request, concurrent requests get the stale one.
+
+        Returns:
+            Snapshot: The snapshot.
+
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and self._is_fresh(snapshot):
+            return snapshot
+
+        if not self._load_lock.acquire(blocking=snapshot is None):
+            return typing.cast(Snapshot, snapshot)
+
+        try:
+            snapshot = self._snapshot
+            if snapshot is None or not self._is_fresh(snapshot):
+                snapshot = self._load()
+                self._snapshot = snapshot
+        finally:
+            self._load_lock.release()
+
+        return snapshot
+
+    def invalidate(self):
+        """Mark the snapshot as stale, so the next request reloads it."""
+        self._generation = next(self._generations)
+
+    def subscribe(self, client_factory: typing.Callable[[], redis.Redis]):
+        """
+        Invalidate the snapshot on every "ingested" event, in a thread.
+
+        The thread is started once per process. On connection errors the
+        snapshot is invalidated, as events may be missed, and the thread
+        reconnects. A failed subscription is logged and retried after
+        the TTL, the snapshot relying on its TTL meanwhile.
+
+        Args:
+            client_factory (Callable[[], redis.Redis]): Function creating
+                the Redis client.
+
+        """
+        if self._subscriber is not None or self._clock() < self._subscribe_after:
+            return
+
+        with self._subscribe_lock:
+            if self._subscriber is not None or self._clock() < self._subscribe_after:
+                return
+
+            try:
+                pubsub = client_factory().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{self._channel: self._on_message})
+            except redis.RedisError:
+                logger.exception(f"Subscribing to {self._channel} failed")
+                self._subscribe_after = self._clock() + self._ttl
+                return
+
+            self._subscriber = pubsub.run_in_thread(
+                sleep_time=1.0, daemon=True, exception_handler=self._on_error
+            )
+
+    def unsubscribe(self):
+        """Stop the thread listening to the "ingested" events, if any."""
+        with self._subscribe_lock:
+            if self._subscriber is not None:
+                self._subscriber.stop()
+                self._subscriber = None
+
+    def _is_fresh(self, snapshot: Snapshot) -> bool:
+        """
+        Check whether a snapshot is neither invalidated nor expired.
+
+        Args:
+            snapshot (Snapshot): The snapshot.
+
+        Returns:
+            bool: True if the snapshot can be served.
+
+        """
+        return (
+            snapshot.generation == self._generation
+            and self._clock() - snapshot.loaded_at < self._ttl
+        )
+
+    def _load(self) -> Snapshot:
+        """
+        Load the current rates with their currency in a single query.
+
+        Returns:
+            Snapshot: The new snapshot.
+
+        """
+        generation = self._generation
+        data_state = cache.get_data_state()
+        row_serializer = serializers.CURRENT_RATE_ROW_SERIALIZER
+        rows = currencies_models.CurrentRate.objects.order_by(
+            "currency_id", "source"
+        ).values(*row_serializer.fields)
+
+        rates = []
+        for row in rows:
+            data = row_serializer.to_representation(row)
+            rates.append(
+                SnapshotRate(
+                    currency_id=row["currency__id"],
+                    date=row["date"],
+                    actualy_end=row["actualy_end"],
+                    data=data,
+                    digest=hashlib.blake2b(
+                        orjson.dumps(data), digest_size=8
+                    ).hexdigest(),
+                )
+            )
+
+        return Snapshot(
+            rates=tuple(rates),
+            generation=generation,
+            loaded_at=self._clock(),
+            modified_at=data_state.modified_at if data_state else None,
+        )
+
+    def _on_message(self, message: typing.Mapping[str, typing.Any]):
+        """
+        Invalidate the snapshot on an "ingested" event.
+
+        Args:
+            message (Mapping[str, Any]): The message of the channel.
+
+        """
+        self.invalidate()
+
+    def _on_error(
+        self,
+        error: BaseException,
+        pubsub: redis.client.PubSub,
+        thread: threading.Thread,
+    ):
+        """
+        Invalidate the snapshot when events may have been missed.
+
+        Args:
+            error (BaseException): The error of the subscription.
+            pubsub (PubSub): The subscription.
+            thread (Thread): The thread of the subscription.
+
+        """
+        logger.warning(f"Listening to {self._channel} failed: {error}")
+        self.invalidate()
+        time.sleep(1.0)
+
+
+snapshot_store = SnapshotStore(ttl=settings.CURRENT_SNAPSHOT_TTL)
+
+
+def get_snapshot() -> Snapshot:
+    """
+    Return the snapshot of the current rates of the process.
+
+    With REDIS_URL set, the process first subscribes to the "ingested" events.
+
+    Returns:
+        Snapshot: The snapshot.
+
+    """
+    if settings.REDIS_URL:
+        snapshot_store.subscribe(
+            client_factory=lambda: redis.Redis.from_url(settings.REDIS_URL)
+        )
+
+    return snapshot_store.get()
@@ -6,13 +6,32 @@ currency data, creating and deleting favorite currencies,
 as well as validating the behavior with different filters and input data.
 """
 
+import csv
+import decimal
+import io
+import pathlib
+import tempfile
+import threading
+import time
 import typing
+from unittest import mock
 
-from django.test import TestCase
+import fakeredis
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
-from currencies import models as currencies_models
+from currencies import (
+    cache as currencies_cache,
+    models as currencies_models,
+    resampling as currencies_resampling,
+    serializers as currencies_serializer,
+    snapshot as currencies_snapshot,
+    views as currencies_views,
+)
 from django.utils import timezone
 import datetime
 from django.contrib.auth import get_user_model
@@ -22,6 +41,9 @@ from rest_framework_simplejwt.tokens import RefreshToken
 DATE: datetime.datetime = datetime.datetime(
     year=2024, month=5, day=1, tzinfo=datetime.timezone.utc
 )
+ARCHIVED_DATE: datetime.datetime = datetime.datetime(
+    year=2023, month=1, day=10, tzinfo=datetime.timezone.utc
+)
 MINUTE: int = 30
 
 
@@ -32,6 +54,7 @@ class TestCurrencies(TestCase):
 
         self.currenct_time = timezone.now()
         self.actualy_end = self.currenct_time + timezone.timedelta(minutes=MINUTE)
+        currencies_snapshot.snapshot_store.invalidate()
 
         self.user = get_user_model().objects.create_user(
             email="test@mail.com", password="test"  # noqa: S106
@@ -79,6 +102,8 @@ class TestCurrencies(TestCase):
         """
         Create mock history currency objects for testing.
 
+        The current rates are created from the entries as the worker does.
+
         Args:
             currencies: A tuple of currency objects.
             currenct_time (datetime.datetime): Current datetime.
@@ -109,6 +134,49 @@ class TestCurrencies(TestCase):
             actualy_end=DATE + datetime.timedelta(minutes=MINUTE),
         )
 
+        for history_currency in currencies_models.HistoryCurrencies.objects.all():
+            currencies_models.CurrentRate.objects.create(
+                currency=history_currency.currency,
+                rate=history_currency.rate,
+                date=history_currency.date,
+                actualy_end=history_currency.actualy_end,
+                source=history_currency.source,
+            )
+
+    def create_archive(self, directory: str):
+        """
+        Archive an entry of the first currency as the worker does.
+
+        Args:
+            directory (str): Directory of the archive.
+
+        """
+        pq.write_table(
+            pa.Table.from_pylist(
+                [
+                    dict(
+                        id=1000,
+                        currency_id=self.mock_currencies[0].pk,
+                        rate=decimal.Decimal("3.5"),
+                        date=ARCHIVED_DATE,
+                        actualy_end=ARCHIVED_DATE + datetime.timedelta(minutes=MINUTE),
+                        source="nbu",
+                    )
+                ],
+                schema=pa.schema(
+                    [
+                        ("id", pa.int64()),
+                        ("currency_id", pa.int64()),
+                        ("rate", pa.decimal128(10, 5)),
+                        ("date", pa.timestamp("us", tz="UTC")),
+                        ("actualy_end", pa.timestamp("us", tz="UTC")),
+                        ("source", pa.string()),
+                    ]
+                ),
+            ),
+            pathlib.Path(directory) / "history_currencies_2023_01.parquet",
+        )
+
     def create_favorite_currencies(
         self,
         currencies: typing.List[currencies_models.Currency],
@@ -138,8 +206,12 @@ class TestCurrencies(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        data = response.data["results"]
+        data = response.json()["results"]
         self.assertEqual(len(data), 2)
+        self.assertEqual(
+            [entry["currency"]["id"] for entry in data],
+            [currency.pk for currency in self.mock_currencies[:2]],
+        )
 
     def test_02_get_currencies_list(self):
         """Test to get the list of all currencies."""
@@ -149,7 +221,7 @@ class TestCurrencies(TestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        data = response.data["results"]
+        data = response.json()["results"]
 
         self.assertEqual(len(data), 3)
 
@@ -159,7 +231,7 @@ class TestCurrencies(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        data = response.data["results"]
+        data = response.json()["results"]
         self.assertEqual(len(data), 3)
 
     def test_04_get_history_currencies_with_date_filter(self):
@@ -171,7 +243,7 @@ class TestCurrencies(TestCase):
         response = self.client.get(url, dict(date_from=date_from, date_to=date_to))
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        data = response.data["results"]
+        data = response.json()["results"]
         self.assertEqual(len(data), 2)
 
     def test_05_get_history_currencies_with_currency_id_filter(self):
@@ -180,7 +252,7 @@ class TestCurrencies(TestCase):
         response = self.client.get(url, dict(currency_id=self.mock_currencies[0].pk))
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        data = response.data["results"]
+        data = response.json()["results"]
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]["currency"]["id"], self.mock_currencies[0].pk)
 
@@ -214,3 +286,607 @@ class TestCurrencies(TestCase):
         url = reverse("delete_favorite", kwargs=dict(currency_id=999))
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_10_get_history_ohlc(self):
+        """Test retrieving the daily and hourly rollups of the history."""
+        for rollup_model, bucket in (
+            (currencies_models.DailyCurrencyRollup, DATE),
+            (currencies_models.HourlyCurrencyRollup, DATE),
+            (
+                currencies_models.HourlyCurrencyRollup,
+                DATE + datetime.timedelta(hours=1),
+            ),
+        ):
+            rollup_model.objects.create(
+                currency=self.mock_currencies[0],
+                bucket=bucket,
+                open=1.0,
+                high=3.0,
+                low=0.5,
+                close=2.0,
+                rate_sum=6.0,
+                samples=4,
+            )
+        url = reverse("history_ohlc")
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()["results"]
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]["avg"], "1.50000")
+        self.assertEqual(data[0]["high"], "3.00000")
+
+        response = self.client.get(
+            url,
+            dict(
+                interval="hour",
+                currency_id=self.mock_currencies[0].pk,
+                date_from=(DATE + datetime.timedelta(minutes=MINUTE)).isoformat(),
+            ),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_11_get_history_ohlc_invalid_interval(self):
+        """Test retrieving rollups of an unknown interval."""
+        url = reverse("history_ohlc")
+        response = self.client.get(url, dict(interval="week"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_12_get_archived_history_currencies(self):
+        """Test retrieving historical currency data reaching into the archive."""
+        url = reverse("history")
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            HISTORY_ARCHIVE_DIR=directory
+        ):
+            self.create_archive(directory=directory)
+
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()["count"], 4)
+            data = response.json()["results"]
+            self.assertEqual(data[0]["id"], 1000)
+            self.assertEqual(data[0]["rate"], "3.50000")
+            self.assertEqual(data[0]["currency"]["id"], self.mock_currencies[0].pk)
+
+            response = self.client.get(
+                url, dict(date_from=DATE.isoformat(), page_size=2)
+            )
+            self.assertEqual(response.json()["count"], 3)
+            self.assertNotIn(
+                1000, [entry["id"] for entry in response.json()["results"]]
+            )
+
+            response = self.client.get(
+                url, dict(currency_id=self.mock_currencies[0].pk)
+            )
+            self.assertEqual(response.json()["count"], 2)
+
+    def test_13_build_csv_with_archived_history(self):
+        """Test exporting a date range of the history reaching into the archive."""
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            HISTORY_ARCHIVE_DIR=directory
+        ):
+            self.create_archive(directory=directory)
+            file_path = pathlib.Path(directory) / "history.csv"
+
+            call_command(
+                "build_csv",
+                str(file_path),
+                "--date-from=2023-01-01T00:00:00+00:00",
+                f"--date-to={(DATE + datetime.timedelta(days=1)).isoformat()}",
+                stdout=io.StringIO(),
+            )
+
+            with open(file_path, encoding="utf-8") as file:
+                rows = list(csv.DictReader(file))
+
+        self.assertEqual([row["id"] for row in rows[:1]], ["1000"])
+        self.assertEqual(len(rows), 2)
+
+    def test_14_get_current_favorite_currencies_list(self):
+        """Test to get the current rates of the favorite currencies."""
+        url = reverse("favorite_current")
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()["results"]
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]["currency"]["id"], self.mock_currencies[0].pk)
+        self.assertEqual(data[0]["rate"], "1.00000")
+
+    def test_15_get_history_currencies_with_cursor(self):
+        """Test walking the history forwards and backwards with cursors."""
+        url = reverse("history")
+
+        response = self.client.get(url, dict(pagination="cursor", page_size=2))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.json())
+        self.assertIsNone(response.json()["previous"])
+        first_page = [entry["id"] for entry in response.json()["results"]]
+
+        response = self.client.get(response.json()["next"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.json()["next"])
+        second_page = [entry["id"] for entry in response.json()["results"]]
+
+        response = self.client.get(response.json()["previous"])
+        self.assertEqual(
+            [entry["id"] for entry in response.json()["results"]], first_page
+        )
+
+        entries = currencies_models.HistoryCurrencies.objects.order_by("date", "id")
+        self.assertEqual(first_page + second_page, [entry.pk for entry in entries])
+
+        response = self.client.get(url, dict(cursor="invalid"))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_16_get_archived_history_currencies_with_cursor(self):
+        """Test walking the history reaching into the archive with cursors."""
+        url = reverse("history")
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            HISTORY_ARCHIVE_DIR=directory
+        ):
+            self.create_archive(directory=directory)
+
+            response = self.client.get(url, dict(pagination="cursor", page_size=3))
+            first_page = [entry["id"] for entry in response.json()["results"]]
+            response = self.client.get(response.json()["next"])
+            second_page = [entry["id"] for entry in response.json()["results"]]
+            self.assertIsNone(response.json()["next"])
+
+            response = self.client.get(response.json()["previous"])
+            self.assertEqual(
+                [entry["id"] for entry in response.json()["results"]], first_page
+            )
+
+        self.assertEqual(first_page[0], 1000)
+        self.assertEqual(len(first_page + second_page), 4)
+
+    def test_17_list_rates_in_one_query(self):
+        """
+        Test that the read-only lists of rates fetch a page in one joined query
+        besides the count and the validators, the current rates being loaded
+        once in a snapshot, and keep the representation of their ModelSerializer.
+        """
+        checks = [
+            (
+                "history",
+                3,
+                currencies_serializer.HistoryCurrenciesSerializer,
+                currencies_models.HistoryCurrencies.objects.order_by("date", "id"),
+            ),
+            (
+                "current",
+                1,
+                currencies_serializer.CurrentRateSerializer,
+                currencies_models.CurrentRate.objects.filter(
+                    currency__in=self.mock_currencies[:2]
+                ).order_by("currency_id"),
+            ),
+            (
+                "favorite_current",
+                1,
+                currencies_serializer.CurrentRateSerializer,
+                currencies_models.CurrentRate.objects.filter(
+                    currency=self.mock_currencies[0]
+                ),
+            ),
+        ]
+
+        for url_name, queries_count, serializer_class, queryset in checks:
+            with self.subTest(url_name=url_name):
+                with self.assertNumQueries(queries_count):
+                    response = self.client.get(reverse(url_name))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+                results = sorted(
+                    response.json()["results"],
+                    key=lambda entry: (entry["date"], entry["id"]),
+                )
+                self.assertEqual(results, serializer_class(queryset, many=True).data)
+
+    def test_18_cache_responses_until_the_data_changes(self):
+        """
+        Test that responses are cached by normalized query parameters
+        until the worker bumps the version of the data.
+        """
+        client = fakeredis.FakeRedis()
+        url = reverse("currencies")
+
+        with mock.patch.object(
+            currencies_cache,
+            "get_response_cache",
+            return_value=currencies_cache.ResponseCache(client=client),
+        ):
+            with self.assertNumQueries(2):
+                response = self.client.get(url, dict(page=1, page_size=2))
+            with self.assertNumQueries(0), mock.patch.object(
+                currencies_views.orjson, "loads"
+            ) as loads:
+                cached_response = self.client.get(f"{url}?page_size=2&page=1")
+            loads.assert_not_called()
+
+            client.incr(currencies_cache.DATA_VERSION_KEY)
+            with self.assertNumQueries(2):
+                self.client.get(url, dict(page=1, page_size=2))
+
+        self.assertEqual(cached_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_response["Content-Type"], "application/json")
+        self.assertEqual(cached_response.content, response.content)
+        self.assertEqual(len(cached_response.json()["results"]), 2)
+
+    def test_19_compute_a_cache_miss_once(self):
+        """Test that concurrent requests missing the cache compute it once."""
+        response_cache = currencies_cache.ResponseCache(
+            client=fakeredis.FakeRedis(), poll_interval=0.01
+        )
+        calls = []
+        results = []
+
+        def compute() -> bytes:
+            calls.append(1)
+            time.sleep(0.2)
+            return b"[]"
+
+        def get():
+            results.append(response_cache.get_or_compute(key="key", compute=compute))
+
+        threads = [threading.Thread(target=get) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [b"[]"] * 8)
+
+    def test_20_get_current_currencies_from_the_snapshot(self):
+        """Test that current rates are served from memory until invalidated."""
+        url = reverse("current")
+
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        currencies_models.CurrentRate.objects.filter(
+            currency=self.mock_currencies[2]
+        ).update(date=self.currenct_time, actualy_end=self.actualy_end)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.json()["count"], 2)
+
+        currencies_snapshot.snapshot_store.invalidate()
+        response = self.client.get(url)
+        self.assertEqual(response.json()["count"], 3)
+
+    def test_21_invalidate_the_snapshot_on_ingested_events(self):
+        """Test that an "ingested" event published on Redis invalidates the snapshot."""
+        client = fakeredis.FakeRedis()
+        snapshot_store = currencies_snapshot.SnapshotStore(ttl=3600)
+        snapshot_store.subscribe(client_factory=lambda: client)
+        self.addCleanup(snapshot_store.unsubscribe)
+        snapshot = snapshot_store.get()
+
+        client.publish(currencies_snapshot.DATA_CHANNEL, 1)
+        deadline = time.monotonic() + 5
+        while snapshot_store.get() is snapshot and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertIsNot(snapshot_store.get(), snapshot)
+        self.assertEqual(len(snapshot_store.get().rates), 3)
+
+    def test_22_answer_current_rates_not_modified(self):
+        """
+        Test that current rates carry an ETag and are answered 304 Not Modified
+        from the snapshot, until the rates change.
+        """
+        url = reverse("current")
+        response = self.client.get(url)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified["ETag"], etag)
+        self.assertEqual(not_modified.content, b"")
+
+        response = self.client.get(url, dict(page_size=1), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        currencies_models.CurrentRate.objects.filter(
+            currency=self.mock_currencies[0]
+        ).update(rate=decimal.Decimal("42"))
+        currencies_snapshot.snapshot_store.invalidate()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_23_answer_history_not_modified(self):
+        """
+        Test that the history is answered 304 Not Modified by ETag without
+        listing it, and by Last-Modified with the time of the last ingestion.
+        """
+        url = reverse("history")
+        response = self.client.get(url)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        client = fakeredis.FakeRedis()
+        client.set(currencies_cache.DATA_VERSION_KEY, 1)
+        client.set(currencies_cache.DATA_MODIFIED_AT_KEY, 1700000000)
+        with mock.patch.object(
+            currencies_cache,
+            "get_response_cache",
+            return_value=currencies_cache.ResponseCache(client=client),
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response["Last-Modified"], "Tue, 14 Nov 2023 22:13:20 GMT")
+
+            with self.assertNumQueries(0):
+                not_modified = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+                )
+            self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+            client.incr(currencies_cache.DATA_VERSION_KEY)
+            client.set(currencies_cache.DATA_MODIFIED_AT_KEY, 1700000060)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_24_resample_history_currencies(self):
+        """Test resampling the history into buckets by currency in the database."""
+        url = reverse("history")
+        for minutes, rate in ((10, "4.0"), (20, "3.0")):
+            currencies_models.HistoryCurrencies.objects.create(
+                currency=self.mock_currencies[2],
+                rate=decimal.Decimal(rate),
+                date=DATE + datetime.timedelta(minutes=minutes),
+                actualy_end=DATE + datetime.timedelta(minutes=MINUTE),
+            )
+        params = dict(currency_id=self.mock_currencies[2].pk, interval="1h")
+
+        checks = [("last", "3.00000"), ("avg", "3.00000"), ("min", "2.00000")]
+        for aggregation, rate in [*checks, ("max", "4.00000")]:
+            with self.subTest(aggregation=aggregation):
+                response = self.client.get(url, dict(params, aggregation=aggregation))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(
+                    response.json()["results"],
+                    [
+                        dict(
+                            currency_id=self.mock_currencies[2].pk,
+                            source="nbu",
+                            bucket="2024-05-01T00:00:00Z",
+                            rate=rate,
+                            samples=3,
+                        )
+                    ],
+                )
+
+        response = self.client.get(url, dict(params, interval="15m"))
+        self.assertEqual(
+            [(entry["bucket"], entry["rate"]) for entry in response.json()["results"]],
+            [("2024-05-01T00:00:00Z", "4.00000"), ("2024-05-01T00:15:00Z", "3.00000")],
+        )
+
+        response = self.client.get(url, dict(params, interval="1w"))
+        self.assertEqual(
+            response.json()["results"][0]["bucket"], "2024-04-29T00:00:00Z"
+        )
+
+        response = self.client.get(url, dict(interval="1d"))
+        self.assertEqual(response.json()["count"], 3)
+
+        for invalid_params in (
+            dict(interval="2h"),
+            dict(interval="1h", aggregation="sum"),
+        ):
+            response = self.client.get(url, invalid_params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_25_resample_archived_history_currencies(self):
+        """Test resampling buckets reaching into the archive and the database."""
+        url = reverse("history")
+        currencies_models.HistoryCurrencies.objects.create(
+            currency=self.mock_currencies[0],
+            rate=decimal.Decimal("1.5"),
+            date=ARCHIVED_DATE + datetime.timedelta(hours=1),
+            actualy_end=ARCHIVED_DATE + datetime.timedelta(hours=2),
+        )
+        params = dict(
+            currency_id=self.mock_currencies[0].pk,
+            date_to=DATE.isoformat(),
+            interval="1d",
+        )
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            HISTORY_ARCHIVE_DIR=directory
+        ):
+            self.create_archive(directory=directory)
+
+            for aggregation, rate in (("last", "1.50000"), ("avg", "2.50000")):
+                with self.subTest(aggregation=aggregation):
+                    response = self.client.get(
+                        url, dict(params, aggregation=aggregation)
+                    )
+                    self.assertEqual(
+                        response.json()["results"],
+                        [
+                            dict(
+                                currency_id=self.mock_currencies[0].pk,
+                                source="nbu",
+                                bucket="2023-01-10T00:00:00Z",
+                                rate=rate,
+                                samples=2,
+                            )
+                        ],
+                    )
+
+    def test_26_get_rates_as_of_dates(self):
+        """Test looking up the rates of all currencies as of dates in one query."""
+        url = reverse("as_of")
+        currencies_models.HistoryCurrencies.objects.create(
+            currency=self.mock_currencies[2],
+            rate=decimal.Decimal("4.0"),
+            date=DATE + datetime.timedelta(minutes=10),
+            actualy_end=DATE + datetime.timedelta(minutes=MINUTE),
+        )
+        dates = [
+            (self.currenct_time + datetime.timedelta(seconds=1)).isoformat(),
+            (DATE + datetime.timedelta(minutes=5)).isoformat(),
+            "2024-05-01T00:15:00",
+        ]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, dict(date=dates))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = response.json()
+        self.assertEqual(
+            [entry["as_of"] for entry in data],
+            ["2024-05-01T00:05:00Z", "2024-05-01T00:15:00Z", dates[0][:-6] + "Z"],
+        )
+        self.assertEqual(
+            [(rate["currency"]["id"], rate["rate"]) for rate in data[0]["rates"]],
+            [(self.mock_currencies[2].pk, "2.00000")],
+        )
+        self.assertEqual(data[1]["rates"][0]["rate"], "4.00000")
+        self.assertEqual(
+            [(rate["currency"]["id"], rate["rate"]) for rate in data[2]["rates"]],
+            [
+                (self.mock_currencies[0].pk, "1.00000"),
+                (self.mock_currencies[1].pk, "2.00000"),
+                (self.mock_currencies[2].pk, "4.00000"),
+            ],
+        )
+
+        for invalid_params in (
+            dict(),
+            dict(date="yesterday"),
+            dict(date=[DATE.isoformat()] * 101),
+        ):
+            response = self.client.get(url, invalid_params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_27_get_rates_as_of_archived_dates(self):
+        """Test looking up the rates as of dates reaching into the archive."""
+        url = reverse("as_of")
+        dates = [
+            (ARCHIVED_DATE + datetime.timedelta(hours=1)).isoformat(),
+            (self.currenct_time + datetime.timedelta(seconds=1)).isoformat(),
+        ]
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            HISTORY_ARCHIVE_DIR=directory
+        ):
+            self.create_archive(directory=directory)
+            data = self.client.get(url, dict(date=dates)).json()
+
+        self.assertEqual(
+            [(rate["id"], rate["rate"]) for rate in data[0]["rates"]],
+            [(1000, "3.50000")],
+        )
+        self.assertEqual(data[1]["rates"][0]["rate"], "1.00000")
+        self.assertEqual(len(data[1]["rates"]), 3)
+
+    def test_28_refuse_views_of_abstract_classes(self):
+        """Test that views missing their validators or rates cannot be created."""
+
+        class NoValidatorsListAPIView(currencies_views.ConditionalListAPIView):
+            pass
+
+        class NoRatesListAPIView(currencies_views.SnapshotListAPIView):
+            pass
+
+        for view_class in (NoValidatorsListAPIView, NoRatesListAPIView):
+            with self.subTest(view_class=view_class.__name__):
+                with self.assertRaises(TypeError):
+                    view_class.as_view()
+
+    def test_29_get_current_rates_of_every_source(self):
+        """Test that the current rates of every source are served side by side."""
+        history_currency = currencies_models.HistoryCurrencies.objects.create(
+            currency=self.mock_currencies[0],
+            rate=decimal.Decimal("1.5"),
+            date=self.currenct_time,
+            actualy_end=self.actualy_end,
+            source="other",
+        )
+        currencies_models.CurrentRate.objects.create(
+            currency=history_currency.currency,
+            rate=history_currency.rate,
+            date=history_currency.date,
+            actualy_end=history_currency.actualy_end,
+            source=history_currency.source,
+        )
+
+        data = self.client.get(reverse("current")).data["results"]
+        self.assertEqual(
+            [(entry["currency"]["id"], entry["source"]) for entry in data],
+            [
+                (self.mock_currencies[0].pk, "nbu"),
+                (self.mock_currencies[0].pk, "other"),
+                (self.mock_currencies[1].pk, "nbu"),
+            ],
+        )
+
+        date = (self.currenct_time + datetime.timedelta(seconds=1)).isoformat()
+        data = self.client.get(reverse("as_of"), dict(date=date)).json()
+        self.assertEqual(
+            [
+                (rate["currency"]["id"], rate["source"], rate["rate"])
+                for rate in data[0]["rates"]
+            ],
+            [
+                (self.mock_currencies[0].pk, "nbu", "1.00000"),
+                (self.mock_currencies[0].pk, "other", "1.50000"),
+                (self.mock_currencies[1].pk, "nbu", "2.00000"),
+                (self.mock_currencies[2].pk, "nbu", "2.00000"),
+            ],
+        )
+
+    def test_30_resample_history_currencies_by_source(self):
+        """Test that resampling never mixes the rates of different sources."""
+        url = reverse("history")
+        for minutes, rate in ((10, "6.0"), (20, "8.0")):
+            currencies_models.HistoryCurrencies.objects.create(
+                currency=self.mock_currencies[2],
+                rate=decimal.Decimal(rate),
+                date=DATE + datetime.timedelta(minutes=minutes),
+                actualy_end=DATE + datetime.timedelta(minutes=MINUTE),
+                source="other",
+            )
+        params = dict(currency_id=self.mock_currencies[2].pk, interval="1h")
+
+        for aggregation, rates in (
+            ("last", ["2.00000", "8.00000"]),
+            ("avg", ["2.00000", "7.00000"]),
+            ("min", ["2.00000", "6.00000"]),
+        ):
+            with self.subTest(aggregation=aggregation):
+                response = self.client.get(url, dict(params, aggregation=aggregation))
+                self.assertEqual(
+                    [
+                        (entry["source"], entry["rate"], entry["samples"])
+                        for entry in response.json()["results"]
+                    ],
+                    [("nbu", rates[0], 1), ("other", rates[1], 2)],
+                )
+
+        bucket = dict(currency_id=1, bucket=DATE, samples=1, date=DATE, id=1)
+        merged = currencies_resampling.merge(
+            [dict(bucket, source="nbu", value=1)],
+            [dict(bucket, source="other", value=3, id=2)],
+            aggregation="avg",
+        )
+        self.assertEqual(
+            [(row["source"], row["value"]) for row in merged],
+            [("nbu", 1), ("other", 3)],
+        )
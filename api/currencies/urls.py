@@ -20,6 +20,12 @@ urlpatterns = [
         name="current",
     ),
     path("history", views.HistoryCurrenciesListAPIView.as_view(), name="history"),
+    path(
+        "history/ohlc",
+        views.CurrencyRollupListAPIView.as_view(),
+        name="history_ohlc",
+    ),
+    path("as_of", views.RatesAsOfListAPIView.as_view(), name="as_of"),
     path(
         "favorite/create",
         views.CreateFavoriteCurrencyAPIView.as_view(),
@@ -3,58 +3,580 @@ Module defines views for currency-related
 APIs in the Django application.
 It includes views to list current currencies,
 all available currencies, historical currency data,
-create and delete favorite currencies, and list
-current favorite currencies for authenticated users.
+its hourly and daily OHLC rollups, the rates as of given dates, create and delete
+favorite currencies, and list current favorite currencies for authenticated users.
+The history is resampled into time buckets in the database on request.
+The read-only lists of rates serialize rows of a single joined `values()`
+query with compiled row serializers and render them with orjson. The lists of
+currencies and history are served from the response cache invalidated by the
+worker, when REDIS_URL is set, and the lists of current rates from the
+in-process snapshot of current rates. The lists of current rates and history
+answer conditional requests with validators computed without serializing.
 """
 
-from django.utils import timezone
-from rest_framework import generics, response, status, request
+import abc
+import datetime
+import functools
+import typing
+
+import orjson
+import pyarrow as pa
+from django import http
+from django.db import models
+from django.utils import cache as cache_utils, dateparse, http as http_utils, timezone
+from rest_framework import exceptions, generics, renderers, response, status, request
+from rest_framework import serializers
+from api import pagination, renderers as api_renderers
 from currencies import (
+    archive as currencies_archive,
+    as_of as currencies_as_of,
+    cache as currencies_cache,
+    snapshot as currencies_snapshot,
     serializers as currencies_serializer,
     models as currencies_models,
     filters as currencies_filters,
+    resampling,
 )
-from django_filters import rest_framework as filters
+from django_filters import rest_framework as filters, utils as filters_utils
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 
 
-class CurrentCurrenciesListAPIView(generics.ListAPIView):
-    """Returns a list of current currencies."""
+class CachedListAPIView(generics.ListAPIView):
+    """
+    List view served from the response cache.
+
+    The response data is cached as JSON under the name of the view and the
+    query parameters, for the current version of the currency data. Clients
+    accepting JSON get the cached bytes as they are, without decoding and
+    encoding them again.
+    """
+
+    def list(
+        self, request: request.Request, *args: tuple, **kwargs: dict
+    ) -> typing.Union[response.Response, http.HttpResponse]:
+        """List the entries, from the response cache when possible."""
+        compute = functools.partial(super().list, request, *args, **kwargs)
+        data = currencies_cache.get_cached(
+            name=type(self).__name__,
+            request=request,
+            compute=lambda: api_renderers.ORJSONRenderer().render(compute().data),
+        )
 
-    serializer_class = currencies_serializer.HistoryCurrenciesSerializer
+        if isinstance(request.accepted_renderer, renderers.JSONRenderer):
+            return http.HttpResponse(data, content_type="application/json")
+
+        return response.Response(orjson.loads(data))
+
+
+class RowListAPIView(generics.ListAPIView):
+    """
+    Fast path of read-only list views.
+
+    The queryset of the view must select the rows of `row_serializer.fields`
+    with `values()`, so a page is fetched by one joined query. The rows are
+    represented by the row serializer, which produces the representation of
+    `serializer_class`, and rendered with orjson.
+    """
+
+    row_serializer: currencies_serializer.RowSerializer
+    renderer_classes = [  # noqa: RUF012
+        api_renderers.ORJSONRenderer,
+        renderers.BrowsableAPIRenderer,
+    ]
+
+    def get_row_serializer(self) -> currencies_serializer.RowSerializer:
+        """Return the row serializer of the rows."""
+        return self.row_serializer
+
+    def list(
+        self, request: request.Request, *args: tuple, **kwargs: dict
+    ) -> response.Response:
+        """List the rows of the queryset, paginated when the view paginates."""
+        queryset = self.filter_queryset(self.get_queryset())
+        row_serializer = self.get_row_serializer()
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                row_serializer.to_representation_many(page)
+            )
+
+        return response.Response(row_serializer.to_representation_many(queryset))
+
+
+class ConditionalListAPIView(abc.ABC, generics.ListAPIView):
+    """
+    List view answering conditional requests.
+
+    `get_validators` computes the ETag and the Last-Modified time of the
+    response without listing its entries, so a request whose If-None-Match
+    or If-Modified-Since matches is answered with 304 Not Modified before
+    anything is queried or serialized. Views of subclasses missing an
+    abstract method cannot be created, so they fail when the URLs are loaded.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs: dict) -> typing.Callable:  # noqa: ANN102
+        """
+        Create the view function of the class.
+
+        Raises:
+            TypeError: If the class has abstract methods.
+
+        """
+        if cls.__abstractmethods__:
+            raise TypeError(
+                f"Can't create a view of abstract class {cls.__name__} with "
+                f"abstract methods {', '.join(sorted(cls.__abstractmethods__))}"
+            )
+
+        return super().as_view(**initkwargs)
+
+    @abc.abstractmethod
+    def get_validators(
+        self,
+    ) -> typing.Tuple[str, typing.Optional[datetime.datetime]]:
+        """
+        Compute the validators of the response.
+
+        Returns:
+            Tuple[str, Optional[datetime.datetime]]: The unquoted ETag
+            and the Last-Modified time, if known.
+
+        """
+
+    def list(
+        self, request: request.Request, *args: tuple, **kwargs: dict
+    ) -> http.HttpResponseBase:
+        """List the entries, unless the client already has them."""
+        etag, last_modified = self.get_validators()
+        etag = cache_utils.quote_etag(etag)
+        last_modified_timestamp = (
+            int(last_modified.timestamp()) if last_modified else None
+        )
+
+        not_modified = cache_utils.get_conditional_response(
+            request, etag=etag, last_modified=last_modified_timestamp
+        )
+        list_response = not_modified or super().list(request, *args, **kwargs)
+
+        list_response["ETag"] = etag
+        if last_modified_timestamp is not None:
+            list_response["Last-Modified"] = http_utils.http_date(
+                last_modified_timestamp
+            )
+
+        return list_response
+
+
+class RepresentationListAPIView(generics.ListAPIView):
+    """List view of entries `get_queryset` returns already represented."""
+
+    def list(
+        self, request: request.Request, *args: tuple, **kwargs: dict
+    ) -> response.Response:
+        """List the representations, paginated when the view paginates."""
+        representations = self.get_queryset()
+
+        page = self.paginate_queryset(representations)
+        if page is not None:
+            return self.get_paginated_response(page)
+
+        return response.Response(representations)
+
+
+class SnapshotListAPIView(ConditionalListAPIView, RepresentationListAPIView):
+    """
+    List view of current rates answered from the in-process snapshot.
+
+    `get_rates` selects the rates to list from the snapshot, so listing them
+    neither queries the database nor serializes anything, and the ETag is
+    built from the digests of their representations.
+    """
+
+    serializer_class = currencies_serializer.CurrentRateSerializer
+    renderer_classes = [  # noqa: RUF012
+        api_renderers.ORJSONRenderer,
+        renderers.BrowsableAPIRenderer,
+    ]
+
+    @functools.cached_property
+    def snapshot(self) -> currencies_snapshot.Snapshot:
+        """The snapshot answering the request."""
+        return currencies_snapshot.get_snapshot()
+
+    @functools.cached_property
+    def current_time(self) -> datetime.datetime:
+        """The time of the request."""
+        return timezone.now()
+
+    @functools.cached_property
+    def rates(self) -> typing.List[currencies_snapshot.SnapshotRate]:
+        """The rates to list."""
+        return self.get_rates()
+
+    @abc.abstractmethod
+    def get_rates(self) -> typing.List[currencies_snapshot.SnapshotRate]:
+        """
+        Select the rates to list from the snapshot.
+
+        Returns:
+            List[SnapshotRate]: The rates.
+
+        """
 
     def get_queryset(self):
+        """Return the representations of the rates to list."""
+        return [rate.data for rate in self.rates]
+
+    def get_validators(
+        self,
+    ) -> typing.Tuple[str, typing.Optional[datetime.datetime]]:
         """
-         Retrieves and returns a queryset of currencies valid for the current time.
+        Compute the validators from the rates to list.
 
         Returns:
-            QuerySet: A query to the Currencies model, filtered by the current time.
+            Tuple[str, Optional[datetime.datetime]]: The ETag and the last
+            time the rates changed, if known.
+
+        """
+        etag = currencies_cache.get_request_digest(
+            self.request, *(rate.digest for rate in self.rates)
+        )
+
+        return etag, self.snapshot.get_last_modified(self.current_time)
+
+
+class CurrentCurrenciesListAPIView(SnapshotListAPIView):
+    """Returns a list of current currencies."""
 
+    def get_rates(self) -> typing.List[currencies_snapshot.SnapshotRate]:
         """
-        current_time = timezone.now()
-        queryset = currencies_models.HistoryCurrencies.objects.filter(
-            date__lt=current_time, actualy_end__gt=current_time
-        ).distinct("currency")
+         Retrieves and returns the currencies valid for the current time.
 
-        return queryset
+        The current rates are read from the in-process snapshot of the
+        CurrentRate model, which holds one row per currency and source.
+
+        Returns:
+            List[SnapshotRate]: The current rates.
+
+        """
+        return self.snapshot.get_current_rates(current_time=self.current_time)
 
 
-class CurrenciesListAPIView(generics.ListAPIView):
+class CurrenciesListAPIView(CachedListAPIView):
     """View to list all available currencies."""
 
     serializer_class = currencies_serializer.CurrencySerializer
     queryset = currencies_models.Currency.objects.all()
 
 
-class HistoryCurrenciesListAPIView(generics.ListAPIView):
-    """View to list historical data of currencies within a specified date range."""
+class HistoryCurrenciesListAPIView(
+    ConditionalListAPIView, CachedListAPIView, RowListAPIView
+):
+    """
+    View to list historical data of currencies within a specified date range.
+
+    When the date range reaches into months archived by the worker,
+    their entries are listed first, followed by the entries of the database.
+    With `pagination=cursor` the entries are walked by keyset
+    on (date, id) instead of by page number.
+    With `interval` (15m, 1h, 1d or 1w) the entries are resampled into one row
+    per bucket per currency and source, with the `aggregation` (last, avg, min or max,
+    last by default) of their rates, in larger pages.
+    """
 
     serializer_class = currencies_serializer.HistoryCurrenciesSerializer
-    queryset = currencies_models.HistoryCurrencies.objects.all()
+    row_serializer = currencies_serializer.HISTORY_ROW_SERIALIZER
+    queryset = currencies_models.HistoryCurrencies.objects.values(
+        *currencies_serializer.HISTORY_ROW_SERIALIZER.fields
+    )
+    pagination_class = pagination.HistoryPagination
     filter_backends = [filters.DjangoFilterBackend]  # noqa: RUF012
     filterset_class = currencies_filters.DateTimeRangeFilter
 
+    def get_validators(
+        self,
+    ) -> typing.Tuple[str, typing.Optional[datetime.datetime]]:
+        """
+        Compute the validators from the state of the currency data.
+
+        With REDIS_URL set, the ETag follows the data version bumped by the
+        worker, and Last-Modified is the time of the last ingestion.
+        Otherwise the ETag is built from one aggregate over the filtered
+        entries, which changes whenever entries are added or extended.
+
+        Returns:
+            Tuple[str, Optional[datetime.datetime]]: The ETag and the
+            Last-Modified time, if known.
+
+        Raises:
+            ValidationError: If the filters are invalid.
+
+        """
+        name = type(self).__name__
+        data_state = currencies_cache.get_data_state()
+        if data_state is not None:
+            etag = currencies_cache.get_request_digest(
+                self.request, name, str(data_state.version)
+            )
+            return etag, data_state.modified_at
+
+        filterset = self.filterset_class(
+            self.request.query_params,
+            queryset=currencies_models.HistoryCurrencies.objects.all(),
+        )
+        if not filterset.is_valid():
+            raise filters_utils.translate_validation(filterset.errors)
+
+        summary = filterset.qs.aggregate(
+            count=models.Count("id"),
+            last_id=models.Max("id"),
+            last_end=models.Max("actualy_end"),
+        )
+        etag = currencies_cache.get_request_digest(
+            self.request, name, *(str(value) for value in summary.values())
+        )
+
+        return etag, None
+
+    @functools.cached_property
+    def resampling(self) -> typing.Optional[typing.Tuple[resampling.Interval, str]]:
+        """
+        The interval and aggregation of the resampling, None if not requested.
+
+        Raises:
+            ValidationError: If the interval or the aggregation is unknown.
+
+        """
+        params = self.request.query_params
+        if "interval" not in params:
+            return None
+
+        interval = resampling.INTERVALS.get(params["interval"])
+        if interval is None:
+            raise exceptions.ValidationError(
+                {"interval": [f"Must be one of: {', '.join(resampling.INTERVALS)}."]}
+            )
+
+        aggregation = params.get("aggregation", "last")
+        if aggregation not in resampling.AGGREGATIONS:
+            raise exceptions.ValidationError(
+                {
+                    "aggregation": [
+                        f"Must be one of: {', '.join(resampling.AGGREGATIONS)}."
+                    ]
+                }
+            )
+
+        return interval, aggregation
+
+    @property
+    def paginator(self) -> typing.Optional[pagination.CustomPagination]:
+        """The paginator of the view, with larger pages when resampling."""
+        if self.resampling is not None and not hasattr(self, "_paginator"):
+            self._paginator = pagination.ResamplePagination()
+
+        return super().paginator
+
+    def get_serializer_class(self):
+        """Return the serializer of the entries, or of the buckets."""
+        if self.resampling is not None:
+            return currencies_serializer.ResampledHistorySerializer
+
+        return super().get_serializer_class()
+
+    def get_row_serializer(self) -> currencies_serializer.RowSerializer:
+        """Return the row serializer of the entries, or of the buckets."""
+        if self.resampling is not None:
+            return currencies_serializer.RESAMPLED_HISTORY_ROW_SERIALIZER
+
+        return super().get_row_serializer()
+
+    def get_queryset(self):
+        """Return the rows of the entries, or the entries to resample."""
+        if self.resampling is not None:
+            return currencies_models.HistoryCurrencies.objects.all()
+
+        return super().get_queryset()
+
+    def filter_queryset(self, queryset: models.QuerySet):
+        """
+        Filter the entries, including the archived ones, and resample them.
+
+        Args:
+            queryset (QuerySet): The entries in the database.
+
+        Returns:
+            The filtered queryset, or an ArchivedHistory sequence
+            when archived entries match the filters. When resampling,
+            the resampled queryset, or a list merging the buckets of the
+            archive when archived entries match the filters.
+
+        """
+        queryset = super().filter_queryset(queryset)
+        archived = self.read_archive(queryset)
+
+        if self.resampling is not None:
+            interval, aggregation = self.resampling
+            buckets = resampling.resample(queryset, interval, aggregation)
+            if archived is None:
+                return buckets
+
+            return resampling.merge(
+                resampling.resample_archive(archived, interval, aggregation),
+                buckets,
+                aggregation=aggregation,
+            )
+
+        if archived is None:
+            return queryset
+
+        return currencies_archive.ArchivedHistory(
+            archived=archived, queryset=queryset.order_by("date", "id")
+        )
+
+    def read_archive(self, queryset: models.QuerySet) -> typing.Optional[pa.Table]:
+        """
+        Read the archived entries matching the filters.
+
+        Args:
+            queryset (QuerySet): The entries in the database.
+
+        Returns:
+            Optional[pa.Table]: The archived entries, None if there is no
+            archive or no archived entry matches the filters.
+
+        """
+        history_archive = currencies_archive.get_archive()
+        if history_archive is None:
+            return None
+
+        filterset = self.filterset_class(self.request.query_params, queryset=queryset)
+        filterset.is_valid()
+        params = filterset.form.cleaned_data
+        archived = history_archive.read(
+            date_from=params.get("date_from"),
+            date_to=params.get("date_to"),
+            currency_id=(
+                int(params["currency_id"]) if params.get("currency_id") else None
+            ),
+        )
+        if not archived.num_rows:
+            return None
+
+        return archived
+
+
+class CurrencyRollupListAPIView(generics.ListAPIView):
+    """
+    View to list the OHLC rollups of currency rates by hour or by day.
+
+    The `interval` query parameter selects the rollup, `day` by default.
+    The average of a bucket is computed from the sum and number of its samples.
+    """
+
+    serializer_class = currencies_serializer.CurrencyRollupSerializer
+    filter_backends = [filters.DjangoFilterBackend]  # noqa: RUF012
+    filterset_class = currencies_filters.RollupFilter
+    rollup_models = {  # noqa: RUF012
+        "hour": currencies_models.HourlyCurrencyRollup,
+        "day": currencies_models.DailyCurrencyRollup,
+    }
+
+    def get_queryset(self):
+        """
+        Retrieves the rollups of the requested interval with their average.
+
+        Returns:
+            QuerySet: A query to the rollup model of the interval,
+            ordered by bucket.
+
+        Raises:
+            ValidationError: If the interval is unknown.
+
+        """
+        interval = self.request.query_params.get("interval", "day")
+        rollup_model = self.rollup_models.get(interval)
+        if rollup_model is None:
+            raise exceptions.ValidationError(
+                {"interval": [f"Must be one of: {', '.join(self.rollup_models)}."]}
+            )
+
+        return rollup_model.objects.annotate(
+            avg=models.ExpressionWrapper(
+                models.F("rate_sum") / models.F("samples"),
+                output_field=models.DecimalField(max_digits=10, decimal_places=5),
+            )
+        ).order_by("bucket", "currency_id", "source")
+
+
+class RatesAsOfListAPIView(CachedListAPIView, RepresentationListAPIView):
+    """
+    View to list the rates of all currencies as of one or more dates.
+
+    Every `date` query parameter, up to `max_dates`, gets the latest entry
+    of every currency at or before it, looked up by index in one query.
+    """
+
+    serializer_class = currencies_serializer.RatesAsOfSerializer
+    renderer_classes = [  # noqa: RUF012
+        api_renderers.ORJSONRenderer,
+        renderers.BrowsableAPIRenderer,
+    ]
+    pagination_class = None
+    max_dates = 100
+
+    def get_dates(self) -> typing.List[datetime.datetime]:
+        """
+        Parse the dates of the request.
+
+        Naive dates are in the current time zone.
+
+        Returns:
+            List[datetime.datetime]: The distinct dates, in ascending order.
+
+        Raises:
+            ValidationError: If no date is given, too many dates are given,
+                or a date is invalid.
+
+        """
+        values = self.request.query_params.getlist("date")
+        if not values:
+            raise exceptions.ValidationError({"date": ["This parameter is required."]})
+        if len(values) > self.max_dates:
+            raise exceptions.ValidationError(
+                {"date": [f"Ensure there are no more than {self.max_dates} dates."]}
+            )
+
+        dates = set()
+        for value in values:
+            try:
+                date = dateparse.parse_datetime(value)
+            except ValueError:
+                date = None
+            if date is None:
+                raise exceptions.ValidationError(
+                    {"date": [f"Enter a valid date/time: {value}."]}
+                )
+            dates.add(timezone.make_aware(date) if timezone.is_naive(date) else date)
+
+        return sorted(dates)
+
+    def get_queryset(self):
+        """Return the representations of the rates as of every date."""
+        date_field = serializers.DateTimeField()
+        row_serializer = currencies_serializer.HISTORY_ROW_SERIALIZER
+
+        return [
+            dict(
+                as_of=date_field.to_representation(date),
+                rates=row_serializer.to_representation_many(rows),
+            )
+            for date, rows in currencies_as_of.get_rates_as_of(self.get_dates()).items()
+        ]
+
 
 class CreateFavoriteCurrencyAPIView(generics.CreateAPIView):
     """View to create a favorite currency for the authenticated user."""
@@ -92,24 +614,21 @@ class DeleteFavoriteCurrencyAPIView(generics.DestroyAPIView):
         return response.Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class CurrentFavoriteCurrenciesListAPIView(generics.ListAPIView):
+class CurrentFavoriteCurrenciesListAPIView(SnapshotListAPIView):
     """View to list current favorite currencies for the authenticated user."""
 
-    serializer_class = currencies_serializer.HistoryCurrenciesSerializer
     permission_classes = [IsAuthenticated]  # noqa: RUF012
 
-    def get_queryset(self):
-        """Get queryset of current favorite currencies for the authenticated user."""
-        current_time = timezone.now()
-
-        favorite_currencies = currencies_models.FavoriteCurrency.objects.filter(
-            user=self.request.user
-        ).select_related("currency")
-
-        queryset = currencies_models.HistoryCurrencies.objects.filter(
-            currency__in=favorite_currencies.values_list("currency", flat=True),
-            date__lte=current_time,
-            actualy_end__gte=current_time,
-        ).distinct("currency")
+    def get_rates(self) -> typing.List[currencies_snapshot.SnapshotRate]:
+        """Get current favorite currencies for the authenticated user."""
+        favorite_currency_ids = set(
+            currencies_models.FavoriteCurrency.objects.filter(
+                user=self.request.user
+            ).values_list("currency_id", flat=True)
+        )
 
-        return queryset
+        return self.snapshot.get_current_rates(
+            current_time=self.current_time,
+            currency_ids=favorite_currency_ids,
+            inclusive=True,
+        )
@@ -0,0 +1,54 @@
+"""Command line entry point for backfilling historical currencies."""
+
+import argparse
+import datetime
+
+from components.core import logger
+from worker import tasks as worker_tasks
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse the command line arguments.
+
+    Returns:
+        argparse.Namespace: The date range and the number of parsing processes.
+
+    """
+    parser = argparse.ArgumentParser(
+        description="Backfill National Bank rates over a date range."
+    )
+    parser.add_argument(
+        "date_from",
+        type=datetime.date.fromisoformat,
+        help="First date of the range, YYYY-MM-DD",
+    )
+    parser.add_argument(
+        "date_to",
+        type=datetime.date.fromisoformat,
+        nargs="?",
+        default=datetime.date.today() - datetime.timedelta(days=1),
+        help="Last date of the range, YYYY-MM-DD, yesterday by default "
+        "and at the latest",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Number of processes parsing the payloads",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """Run the backfill for the date range given on the command line."""
+    args = parse_args()
+    rows_count = worker_tasks.backfill_currencies(
+        date_from=args.date_from, date_to=args.date_to, processes=args.processes
+    )
+    logger.app_logger.info(f"Backfill finished: {rows_count} rows written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+Benchmark of the whole ingestion pipeline on replayed payloads.
+
+Every payload size is served by a local stub HTTP server and ingested by
+`RatesIngestionService.save_currencies_data` into an in-memory SQLite
+database, or into a throwaway schema of a PostgreSQL database with
+--postgres-url. Every size is polled twice: the cold poll creates the
+currencies and their history, the warm one repeats the same rates, which
+resolves the currencies from the cache and, in compact mode, only extends
+the stored history.
+
+For every poll and stage (fetch, parse, resolve, write, rollup) the duration,
+rows per second, SQL statements sent through SQLAlchemy (the COPY of bulk
+mode on PostgreSQL is not counted) and peak traced memory are reported,
+and the results are written as JSON to compare them between commits.
+
+Run it from the worker directory:
+
+    python -m benchmarks.bench_ingestion --sizes 60 1000 10000 100000
+    python -m benchmarks.bench_ingestion --compare benchmarks/results/old.json
+"""
+
+import argparse
+import contextlib
+import dataclasses
+import datetime
+import http.server
+import json
+import os
+import pathlib
+import platform
+import subprocess
+import threading
+import time
+import tracemalloc
+import typing
+
+import sqlalchemy
+from sqlalchemy import orm
+
+from benchmarks import payloads
+from components.core import database, http_client, metrics
+from components.core.testing_database import create_sqlite_inmemory_session
+from components.currencies import cache as currency_cache, repository
+from components.third_party import ingestion
+from components.third_party.national_bank import provider as national_bank_provider
+
+RESULTS_DIR: pathlib.Path = pathlib.Path(__file__).parent / "results"
+SIZES: typing.List[int] = [60, 1000, 10000, 100000]
+POLLS: typing.List[str] = ["cold", "warm"]
+
+
+@dataclasses.dataclass
+class StageResult:
+    seconds: float = 0.0
+    queries: int = 0
+    peak_memory: int = 0
+
+
+class StageProfiler:
+    def __init__(self):
+        """Initializes a StageProfiler with no recorded stage."""
+        self.stages: typing.Dict[str, StageResult] = {}
+        self._track_stage = metrics.track_stage
+
+    @contextlib.contextmanager
+    def track_stage(self, stage: str) -> typing.Iterator[None]:
+        """
+        Measure a stage on top of its Prometheus metrics.
+
+        Args:
+            stage (str): Name of the stage.
+
+        Yields:
+            None
+
+        """
+        stage_result = self.stages.setdefault(stage, StageResult())
+        tracemalloc.reset_peak()
+        memory_before, _ = tracemalloc.get_traced_memory()
+        started_at = time.perf_counter()
+        try:
+            with self._track_stage(stage=stage):
+                yield
+        finally:
+            stage_result.seconds += time.perf_counter() - started_at
+            _, peak_memory = tracemalloc.get_traced_memory()
+            stage_result.peak_memory = max(
+                stage_result.peak_memory, peak_memory - memory_before
+            )
+
+    def count_query(self, *args: object):
+        """
+        Count a statement sent to the database in the current stage.
+
+        Args:
+            args: Arguments of the SQLAlchemy event.
+
+        """
+        stage = metrics.current_stage.get()
+        self.stages.setdefault(stage, StageResult()).queries += 1
+
+    @contextlib.contextmanager
+    def profile(self, engine: sqlalchemy.engine.Engine) -> typing.Iterator[None]:
+        """
+        A context manager profiling the stages run in its block.
+
+        Args:
+            engine (sqlalchemy.engine.Engine): The engine whose statements
+            are counted.
+
+        Yields:
+            None
+
+        """
+        self.stages = {}
+        sqlalchemy.event.listen(engine, "before_cursor_execute", self.count_query)
+        metrics.track_stage = self.track_stage
+        try:
+            yield
+        finally:
+            metrics.track_stage = self._track_stage
+            sqlalchemy.event.remove(engine, "before_cursor_execute", self.count_query)
+
+
+class PayloadHandler(http.server.BaseHTTPRequestHandler):
+    payload: bytes = b"[]"
+
+    def do_GET(self):  # noqa: N802
+        """Serve the current payload."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(self.payload)))
+        self.end_headers()
+        self.wfile.write(self.payload)
+
+    def log_message(self, *args: object):
+        """Keep the benchmark output free of access logs."""
+
+
+@contextlib.contextmanager
+def serve_payloads() -> typing.Iterator[str]:
+    """
+    Run a stub of the National Bank API on a free local port.
+
+    Yields:
+        str: URL of the stub.
+
+    """
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), PayloadHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/exchange?json"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextlib.contextmanager
+def create_postgres_session(url: str) -> typing.Iterator[orm.Session]:
+    """
+    Create a session bound to a throwaway schema of a PostgreSQL database.
+
+    Args:
+        url (str): URL of the database.
+
+    Yields:
+        orm.Session: The session.
+
+    """
+    schema = f"benchmark_{os.getpid()}"
+    engine = sqlalchemy.create_engine(
+        url, connect_args={"options": f"-csearch_path={schema}"}
+    )
+    with engine.begin() as conn:
+        conn.execute(sqlalchemy.text(f"CREATE SCHEMA {schema}"))
+    database.Base.metadata.create_all(bind=engine)
+    session = orm.sessionmaker(bind=engine, expire_on_commit=False)()
+
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as conn:
+            conn.execute(sqlalchemy.text(f"DROP SCHEMA {schema} CASCADE"))
+        engine.dispose()
+
+
+def run_size(
+    rows: int,
+    url: str,
+    fetcher: http_client.AsyncFetcher,
+    template_rows: typing.List[typing.Dict],
+    postgres_url: typing.Optional[str],
+    mode: str,
+) -> typing.Dict[str, typing.Any]:
+    """
+    Ingest a payload of the given size twice into a fresh database.
+
+    Args:
+        rows (int): Number of rows of the payload.
+        url (str): URL of the stub API.
+        fetcher (http_client.AsyncFetcher): The fetcher.
+        template_rows (List[Dict]): Rows repeated to fill the payload.
+        postgres_url (Optional[str]): URL of a PostgreSQL database,
+        SQLite in memory when None.
+        mode (str): How the history is written: compact, bulk or create.
+
+    Returns:
+        Dict[str, Any]: Results of every poll.
+
+    """
+    PayloadHandler.payload = payloads.build_payload(
+        rows=rows, template_rows=template_rows
+    )
+    session = (
+        create_postgres_session(url=postgres_url)
+        if postgres_url
+        else create_sqlite_inmemory_session()
+    )
+    profiler = StageProfiler()
+    polls = {}
+
+    with session as conn:
+        rates_ingestion = ingestion.RatesIngestionService(
+            conn=conn,
+            providers=[
+                national_bank_provider.NationalBankProvider(url=url, timeout=60)
+            ],
+            currency_repo=repository.CurrencyRepostitory(
+                cache=currency_cache.CurrencyIdCache()
+            ),
+            fetcher=fetcher,
+            deadline=600,
+        )
+        for poll in POLLS:
+            with profiler.profile(engine=conn.get_bind()):
+                started_at = time.perf_counter()
+                rates_ingestion.save_currencies_data(
+                    bulk=mode == "bulk", compact=mode == "compact"
+                )
+                seconds = time.perf_counter() - started_at
+
+            polls[poll] = dict(
+                seconds=seconds,
+                rows_per_second=rows / seconds,
+                queries=sum(stage.queries for stage in profiler.stages.values()),
+                stages={
+                    stage: dict(
+                        dataclasses.asdict(stage_result),
+                        rows_per_second=rows / max(stage_result.seconds, 1e-9),
+                    )
+                    for stage, stage_result in profiler.stages.items()
+                },
+            )
+
+    return dict(rows=rows, payload_bytes=len(PayloadHandler.payload), polls=polls)
+
+
+def get_commit() -> typing.Optional[str]:
+    """
+    Retrieve the commit of the benchmarked tree.
+
+    Returns:
+        Optional[str]: The short commit hash, None outside of a git checkout.
+
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S603, S607
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(
+    results: typing.Dict[str, typing.Any],
+    baseline: typing.Optional[typing.Dict[str, typing.Any]] = None,
+):
+    """
+    Print the results, compared with a baseline if given.
+
+    Args:
+        results (Dict[str, Any]): The results.
+        baseline (Optional[Dict[str, Any]]): Results of a previous run.
+
+    """
+    baseline_sizes = {size["rows"]: size for size in (baseline or {}).get("sizes", [])}
+    for size in results["sizes"]:
+        for poll, poll_result in size["polls"].items():
+            line = (
+                f"{size['rows']:>7} rows {poll:>8}: "
+                f"{poll_result['seconds'] * 1000:9.1f} ms "
+                f"{poll_result['rows_per_second']:10.0f} rows/s "
+                f"{poll_result['queries']:5} queries"
+            )
+            baseline_size = baseline_sizes.get(size["rows"])
+            if baseline_size and poll in baseline_size["polls"]:
+                speedup = (
+                    baseline_size["polls"][poll]["seconds"] / poll_result["seconds"]
+                )
+                line += f" ({speedup:.2f}x vs {baseline.get('commit')})"
+            print(line)
+
+            for stage, stage_result in poll_result["stages"].items():
+                print(
+                    f"{'':>23}{stage:>8}: "
+                    f"{stage_result['seconds'] * 1000:9.1f} ms "
+                    f"{stage_result['rows_per_second']:10.0f} rows/s "
+                    f"{stage_result['queries']:5} queries "
+                    f"{stage_result['peak_memory'] / 2**20:8.2f} MiB peak"
+                )
+
+
+def main():
+    """Run the benchmark for every size, print and write the results."""
+    arg_parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    arg_parser.add_argument(
+        "--mode", choices=["compact", "bulk", "create"], default="compact"
+    )
+    arg_parser.add_argument(
+        "--recorded",
+        type=pathlib.Path,
+        help="payload recorded from the National Bank API to replay",
+    )
+    arg_parser.add_argument(
+        "--postgres-url", help="benchmark a PostgreSQL database instead of SQLite"
+    )
+    arg_parser.add_argument("--output", type=pathlib.Path)
+    arg_parser.add_argument(
+        "--compare", type=pathlib.Path, help="results of a previous run"
+    )
+    args = arg_parser.parse_args()
+
+    template_rows = payloads.load_rows(recorded=args.recorded)
+    fetcher = http_client.AsyncFetcher(retries=0, hedge_after=None)
+    tracemalloc.start()
+
+    with serve_payloads() as url:
+        sizes = [
+            run_size(
+                rows=rows,
+                url=url,
+                fetcher=fetcher,
+                template_rows=template_rows,
+                postgres_url=args.postgres_url,
+                mode=args.mode,
+            )
+            for rows in args.sizes
+        ]
+
+    tracemalloc.stop()
+    fetcher.close()
+
+    commit = get_commit()
+    results = dict(
+        commit=commit,
+        created_at=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        python=platform.python_version(),
+        backend="postgresql" if args.postgres_url else "sqlite",
+        mode=args.mode,
+        sizes=sizes,
+    )
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_results(results=results, baseline=baseline)
+
+    output = args.output or RESULTS_DIR / f"ingestion-{commit or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Micro-benchmark of the National Bank payload parsing.
+
+Compares the former parsing path (decode to str, json.loads and a
+TypeAdapter built on every call) with the compiled validators of
+the parser module on a synthetic payload.
+
+Run it from the worker directory:
+
+    python -m benchmarks.bench_parse --rows 10000
+"""
+
+import argparse
+import json
+import timeit
+import typing
+
+import pydantic
+
+from benchmarks import payloads
+from components.third_party.national_bank import parser, schemas
+
+
+def parse_legacy(content: bytes) -> typing.List[schemas.CurrencyData]:
+    """
+    Parse a payload the way the service did before the compiled validators.
+
+    Args:
+        content (bytes): The JSON payload.
+
+    Returns:
+        List[schemas.CurrencyData]: The parsed currency data.
+
+    """
+    raw_data = json.loads(content.decode("utf-8"))
+    type_adapter = pydantic.TypeAdapter(typing.List[schemas.CurrencyData])
+    return type_adapter.validate_python(raw_data)
+
+
+def main():
+    """Time every parsing path and print the results."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--rows", type=int, default=10000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    content = payloads.build_payload(rows=args.rows)
+    parsers = dict(
+        legacy=parse_legacy,
+        validate_json=parser.parse_currencies,
+        compact_rows=parser.parse_currency_rows,
+    )
+
+    timings = {
+        name: min(timeit.repeat(lambda: parse(content), number=1, repeat=args.repeat))
+        for name, parse in parsers.items()
+    }
+
+    print(f"{args.rows} rows, {len(content)} bytes")
+    for name, seconds in timings.items():
+        print(
+            f"{name:>14}: {seconds * 1000:8.2f} ms "
+            f"({timings['legacy'] / seconds:.1f}x vs legacy)"
+        )
+
+
+if __name__ == "__main__":
+    main()
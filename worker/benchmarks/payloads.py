@@ -0,0 +1,71 @@
+"""
+National Bank payloads for the benchmarks.
+
+A payload of any size is built by repeating the rows of a payload
+recorded from the National Bank API, or of a single synthetic row when
+no recording is given, with a distinct currency code on every row.
+"""
+
+import json
+import pathlib
+import typing
+
+SYNTHETIC_ROW: typing.Dict[str, typing.Any] = dict(
+    r030=36,
+    txt="Австралійський долар",
+    rate=26.2832,
+    cc="AUD",
+    exchangedate="16.05.2024",
+)
+
+
+def load_rows(
+    recorded: typing.Optional[pathlib.Path] = None,
+) -> typing.List[typing.Dict[str, typing.Any]]:
+    """
+    Load the template rows of the payloads.
+
+    Args:
+        recorded (Optional[pathlib.Path]): A payload recorded from
+        the National Bank API.
+
+    Returns:
+        List[Dict[str, Any]]: The template rows.
+
+    """
+    if recorded is None:
+        return [SYNTHETIC_ROW]
+
+    return json.loads(recorded.read_bytes())
+
+
+def build_payload(
+    rows: int, template_rows: typing.Optional[typing.List[typing.Dict]] = None
+) -> bytes:
+    """
+    Build a National Bank payload with the given number of rows.
+
+    Args:
+        rows (int): Number of rows of the payload.
+        template_rows (Optional[List[Dict]]): Rows repeated to fill
+        the payload, the synthetic row by default.
+
+    Returns:
+        bytes: The UTF-8 encoded JSON payload.
+
+    """
+    template_rows = template_rows or [SYNTHETIC_ROW]
+
+    return json.dumps(
+        [
+            {
+                **template_rows[row % len(template_rows)],
+                "r030": row + 1,
+                "rate": round(
+                    template_rows[row % len(template_rows)]["rate"] + row / 10000, 4
+                ),
+            }
+            for row in range(rows)
+        ],
+        ensure_ascii=False,
+    ).encode("utf-8")
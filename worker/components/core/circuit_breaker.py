@@ -0,0 +1,183 @@
+"""
+Module for stopping calls to an upstream which keeps failing.
+
+This module provides the CircuitBreaker class, which keeps the state of
+the circuits of many upstreams in Redis, so every worker replica sees the
+same state. A circuit opens after a number of consecutive failures and
+rejects calls without sending them. Once the reset timeout passes, the
+circuit is half-open: a single replica sends a probe call, whose success
+closes the circuit and whose failure opens it again.
+"""
+
+import enum
+import time
+import typing
+
+import redis
+
+from components.core import config, constants, logger
+
+cnfg = config.config
+
+RECORD_FAILURE_SCRIPT: str = """
+local failures = redis.call('hincrby', KEYS[1], 'failures', 1)
+redis.call('expire', KEYS[1], ARGV[3])
+if failures >= tonumber(ARGV[1]) or redis.call('exists', KEYS[2]) == 1 then
+    redis.call('hset', KEYS[1], 'opened_at', ARGV[2], 'failures', 0)
+    redis.call('del', KEYS[2])
+    return 1
+end
+return 0
+"""
+
+
+class CircuitState(str, enum.Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        client: redis.Redis,
+        failure_threshold: int = cnfg.CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: int = cnfg.CIRCUIT_RESET_TIMEOUT,
+        key_prefix: str = constants.CIRCUIT_KEY_PREFIX,
+        clock: typing.Callable[[], float] = time.time,
+    ):
+        """
+        Initializes a CircuitBreaker instance.
+
+        Args:
+            client (redis.Redis): The Redis client.
+            failure_threshold (int): Number of consecutive failures
+            which open a circuit.
+            reset_timeout (int): Number of seconds an open circuit rejects
+            calls before a probe call is let through.
+            key_prefix (str): Prefix of the Redis keys.
+            clock (Callable[[], float]): Wall clock shared by the replicas.
+
+        """
+        self._client = client
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._key_prefix = key_prefix
+        self._clock = clock
+        self._record_failure = client.register_script(RECORD_FAILURE_SCRIPT)
+
+    def get_state(self, name: str) -> CircuitState:
+        """
+        Retrieve the state of a circuit.
+
+        Args:
+            name (str): Name of the circuit.
+
+        Returns:
+            CircuitState: The state of the circuit.
+
+        """
+        opened_at = self._client.hget(self._get_key(name), "opened_at")
+        if opened_at is None:
+            return CircuitState.CLOSED
+
+        if self._clock() < float(opened_at) + self._reset_timeout:
+            return CircuitState.OPEN
+
+        return CircuitState.HALF_OPEN
+
+    def allow_request(self, name: str) -> bool:
+        """
+        Check whether a call may be sent to an upstream.
+
+        A half-open circuit lets a single call through across all replicas.
+
+        Args:
+            name (str): Name of the circuit.
+
+        Returns:
+            bool: True if the call may be sent.
+
+        """
+        state = self.get_state(name)
+        if state is CircuitState.CLOSED:
+            return True
+
+        if state is CircuitState.HALF_OPEN and self._client.set(
+            self._get_probe_key(name), 1, nx=True, ex=self._reset_timeout
+        ):
+            logger.app_logger.info(f"Circuit {name} is half-open, sending a probe")
+            return True
+
+        rejected = self._client.incr(constants.CIRCUIT_REJECTED_KEY)
+        logger.app_logger.warning(
+            f"Circuit {name} is open, call rejected ({rejected} in total)"
+        )
+        return False
+
+    def record_success(self, name: str):
+        """
+        Record a successful call, which closes the circuit.
+
+        Args:
+            name (str): Name of the circuit.
+
+        """
+        self._client.delete(self._get_key(name), self._get_probe_key(name))
+
+    def record_failure(self, name: str) -> bool:
+        """
+        Record a failed call.
+
+        The circuit opens when the failures reach the threshold
+        or when the failed call was the probe of a half-open circuit.
+
+        Args:
+            name (str): Name of the circuit.
+
+        Returns:
+            bool: True if the circuit was opened.
+
+        """
+        is_opened = bool(
+            self._record_failure(
+                keys=[self._get_key(name), self._get_probe_key(name)],
+                args=[
+                    self._failure_threshold,
+                    self._clock(),
+                    self._reset_timeout * constants.CIRCUIT_STATE_TTL_FACTOR,
+                ],
+            )
+        )
+        if is_opened:
+            logger.app_logger.warning(
+                f"Circuit {name} opened for {self._reset_timeout}s"
+            )
+
+        return is_opened
+
+    def _get_key(self, name: str) -> str:
+        """
+        Build the Redis key of a circuit.
+
+        Args:
+            name (str): Name of the circuit.
+
+        Returns:
+            str: The Redis key.
+
+        """
+        return f"{self._key_prefix}:{name}"
+
+    def _get_probe_key(self, name: str) -> str:
+        """
+        Build the Redis key of the probe call of a circuit.
+
+        Args:
+            name (str): Name of the circuit.
+
+        Returns:
+            str: The Redis key.
+
+        """
+        return f"{self._key_prefix}:{name}:probe"
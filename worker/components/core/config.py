@@ -6,6 +6,8 @@ libraries to load settings from a .env.example file
 and provide access to these settings as a Config object.
 """
 
+import typing
+
 import pydantic_settings
 import dotenv
 
@@ -17,5 +19,30 @@ class Config(pydantic_settings.BaseSettings):
     BANK_URL: str
     REDIS_URL: str
 
+    RATE_PROVIDERS: typing.List[str] = ["nbu"]
+
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_CONCURRENCY: int = 10
+    HTTP_RETRIES: int = 3
+    HTTP_HEDGE_AFTER: float = 2.0
+
+    CIRCUIT_FAILURE_THRESHOLD: int = 3
+    CIRCUIT_RESET_TIMEOUT: int = 300
+    INGESTION_DEADLINE: float = 30.0
+
+    METRICS_PORT: typing.Optional[int] = 9100
+
+    HISTORY_PARTITIONS_AHEAD: int = 3
+    HISTORY_RETENTION_MONTHS: typing.Optional[int] = None
+    HISTORY_DROP_EXPIRED: bool = False
+    HISTORY_ARCHIVE_DIR: typing.Optional[str] = None
+    HISTORY_ARCHIVE_AFTER_MONTHS: int = 12
+
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
 
 config = Config()  # type: ignore
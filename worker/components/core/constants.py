@@ -0,0 +1,23 @@
+"""Constants for core module."""
+
+HTTP_RETRY_BACKOFF: float = 0.5
+HTTP_RETRY_STATUSES: frozenset = frozenset({429, 500, 502, 503, 504})
+HTTP_KEEPALIVE_EXPIRY: float = 60.0
+HTTP_HEADERS: dict = {"Accept-Encoding": "gzip, deflate"}
+
+FINGERPRINT_KEY_PREFIX: str = "worker:fingerprint"
+FINGERPRINT_TTL: int = 60 * 60 * 24
+SKIPPED_POLLS_KEY: str = "worker:metrics:skipped_polls"
+
+LOCK_KEY_PREFIX: str = "worker:lock"
+LOCK_CONTENTION_KEY: str = "worker:metrics:lock_contention"
+GET_CURRENCIES_LOCK_NAME: str = "get_currencies"
+GET_CURRENCIES_TICK: int = 15 * 60 * 1000
+
+CIRCUIT_KEY_PREFIX: str = "worker:circuit"
+CIRCUIT_REJECTED_KEY: str = "worker:metrics:circuit_rejected"
+CIRCUIT_STATE_TTL_FACTOR: int = 10
+
+DATA_VERSION_KEY: str = "currencies:data_version"
+DATA_MODIFIED_AT_KEY: str = "currencies:data_modified_at"
+DATA_CHANNEL: str = "currencies:ingested"
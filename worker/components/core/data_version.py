@@ -0,0 +1,70 @@
+"""
+Module for publishing the version of the currency data.
+
+This module provides the DataVersion class, a counter in Redis which the
+worker increments after every poll that stored or extended rates. The API
+keys its response cache by this counter, so a single increment invalidates
+every cached response, and every increment is published as an "ingested"
+event, on which the API processes reload their snapshot of current rates.
+The time of the last increment is kept next to the counter, so the API
+can answer conditional requests.
+"""
+
+import time
+
+import redis
+
+from components.core import constants
+
+
+class DataVersion:
+    def __init__(
+        self,
+        client: redis.Redis,
+        key: str = constants.DATA_VERSION_KEY,
+        modified_at_key: str = constants.DATA_MODIFIED_AT_KEY,
+        channel: str = constants.DATA_CHANNEL,
+    ):
+        """
+        Initializes a DataVersion instance.
+
+        Args:
+            client (redis.Redis): The Redis client.
+            key (str): Redis key of the counter, shared with the API.
+            modified_at_key (str): Redis key of the Unix time
+            of the last increment.
+            channel (str): Redis channel of the "ingested" events.
+
+        """
+        self._client = client
+        self._key = key
+        self._modified_at_key = modified_at_key
+        self._channel = channel
+
+    def bump(self) -> int:
+        """
+        Increment the version of the currency data and publish it.
+
+        The counter and the time of the increment are updated atomically.
+
+        Returns:
+            int: The new version.
+
+        """
+        pipeline = self._client.pipeline()
+        pipeline.incr(self._key)
+        pipeline.set(self._modified_at_key, int(time.time()))
+        version = int(pipeline.execute()[0])
+        self._client.publish(self._channel, version)
+
+        return version
+
+    def get(self) -> int:
+        """
+        Retrieve the version of the currency data.
+
+        Returns:
+            int: The version, 0 if the data was never versioned.
+
+        """
+        return int(self._client.get(self._key) or 0)
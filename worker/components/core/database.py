@@ -3,8 +3,9 @@ Module for managing database connections and sessions.
 
 This module provides the DatabaseMngr class,
 which handles database connections
-and provides methods for creating sessions and
-managing connections in a context.
+and provides methods for creating sessions,
+managing connections in a context and
+recreating the engine in forked worker processes.
 """
 
 import typing
@@ -12,7 +13,7 @@ import contextlib
 import sqlalchemy
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.session import Session
-from components.core import config
+from components.core import config, metrics
 from sqlalchemy import orm
 
 Base = orm.declarative_base()
@@ -33,17 +34,19 @@ class DatabaseMngr:
 
         """
         self.engine = engine
+        self._session_maker = sessionmaker(bind=self.engine)
 
     def get_session(self) -> sessionmaker:
         """
-        Creates and returns a sessionmaker
-        instance bound to the engine.
+        Returns the sessionmaker instance bound to the engine.
+
+        The sessionmaker is created once per DatabaseMngr and reused.
 
         Returns:
             sessionmaker: A sessionmaker instance.
 
         """
-        return sessionmaker(bind=self.engine)
+        return self._session_maker
 
     @contextlib.contextmanager
     def connect(self):
@@ -74,8 +77,27 @@ class DatabaseMngr:
         if not DatabaseMngr.instance:
             engine = sqlalchemy.create_engine(
                 cnfg.POSTGRES_URL,
-                echo=True,
+                echo=cnfg.DB_ECHO,
+                pool_size=cnfg.DB_POOL_SIZE,
+                max_overflow=cnfg.DB_MAX_OVERFLOW,
+                pool_recycle=cnfg.DB_POOL_RECYCLE,
+                pool_pre_ping=cnfg.DB_POOL_PRE_PING,
             )
+            metrics.instrument_engine(engine)
             DatabaseMngr.instance = DatabaseMngr(engine)
 
         return typing.cast(DatabaseMngr, DatabaseMngr.instance)
+
+    @staticmethod
+    def reset_db():
+        """
+        Drops the DatabaseMngr instance inherited from a parent process.
+
+        The pooled connections of the inherited engine belong to the parent,
+        so they are discarded without being closed and the next `get_db` call
+        creates a new engine for this process.
+
+        """
+        if DatabaseMngr.instance:
+            DatabaseMngr.instance.engine.dispose(close=False)
+            DatabaseMngr.instance = None
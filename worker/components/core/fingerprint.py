@@ -0,0 +1,187 @@
+"""
+Module for remembering the last payload fetched from a URL.
+
+This module provides the PayloadFingerprintStore class, which keeps
+the content hash and the HTTP validators (ETag, Last-Modified) of the last
+stored payload of every URL in Redis. The worker uses it to send conditional
+requests and to skip polls whose payload did not change.
+"""
+
+import dataclasses
+import hashlib
+import typing
+
+import redis
+
+from components.core import constants, http_client, logger, metrics
+
+
+@dataclasses.dataclass(frozen=True)
+class PayloadFingerprint:
+    digest: str
+    etag: typing.Optional[str] = None
+    last_modified: typing.Optional[str] = None
+
+    def get_validators(self) -> typing.Dict[str, str]:
+        """
+        Build the headers of a conditional request.
+
+        Returns:
+            Dict[str, str]: The If-None-Match and If-Modified-Since headers
+            supported by the upstream.
+
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        return headers
+
+
+class PayloadFingerprintStore:
+    def __init__(
+        self,
+        client: redis.Redis,
+        key_prefix: str = constants.FINGERPRINT_KEY_PREFIX,
+        ttl: int = constants.FINGERPRINT_TTL,
+    ):
+        """
+        Initializes a PayloadFingerprintStore instance.
+
+        Args:
+            client (redis.Redis): The Redis client.
+            key_prefix (str): Prefix of the Redis keys.
+            ttl (int): Number of seconds a fingerprint is kept, which bounds
+            how long polls can be skipped without a full write.
+
+        """
+        self._client = client
+        self._key_prefix = key_prefix
+        self._ttl = ttl
+
+    @staticmethod
+    def get_digest(content: bytes) -> str:
+        """
+        Compute the content hash of a payload.
+
+        Args:
+            content (bytes): The payload.
+
+        Returns:
+            str: The hex digest of the payload.
+
+        """
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+    def get(self, url: str) -> typing.Optional[PayloadFingerprint]:
+        """
+        Retrieve the fingerprint of the last stored payload of a URL.
+
+        Args:
+            url (str): The fetched URL.
+
+        Returns:
+            Optional[PayloadFingerprint]: The fingerprint, if any.
+
+        """
+        values = {
+            key.decode(): value.decode()
+            for key, value in self._client.hgetall(self._get_key(url)).items()
+        }
+        if "digest" not in values:
+            return None
+
+        return PayloadFingerprint(**values)
+
+    def save(self, result: http_client.FetchResult):
+        """
+        Remember the fingerprint of a stored payload.
+
+        Args:
+            result (http_client.FetchResult): The response whose payload
+            was stored.
+
+        """
+        fingerprint = PayloadFingerprint(
+            digest=self.get_digest(result.content),
+            etag=result.headers.get("ETag"),
+            last_modified=result.headers.get("Last-Modified"),
+        )
+        key = self._get_key(result.url)
+
+        pipeline = self._client.pipeline()
+        pipeline.delete(key)
+        pipeline.hset(
+            key,
+            mapping={
+                field: value
+                for field, value in dataclasses.asdict(fingerprint).items()
+                if value is not None
+            },
+        )
+        pipeline.expire(key, self._ttl)
+        pipeline.execute()
+
+    def is_unchanged(
+        self,
+        result: http_client.FetchResult,
+        fingerprint: typing.Optional[PayloadFingerprint],
+    ) -> bool:
+        """
+        Check whether a response repeats the last stored payload.
+
+        Args:
+            result (http_client.FetchResult): The response to check.
+            fingerprint (Optional[PayloadFingerprint]): The fingerprint of
+            the last stored payload.
+
+        Returns:
+            bool: True if the upstream answered 304 Not Modified
+            or the payload hash did not change.
+
+        """
+        if fingerprint is None:
+            return False
+
+        return result.status_code == 304 or (
+            fingerprint.digest == self.get_digest(result.content)
+        )
+
+    def clear(self, url: str):
+        """
+        Forget the fingerprint of a URL, so the next poll is stored in full.
+
+        Args:
+            url (str): The fetched URL.
+
+        """
+        self._client.delete(self._get_key(url))
+
+    def record_skip(self, url: str):
+        """
+        Count a poll skipped because its payload did not change.
+
+        Args:
+            url (str): The fetched URL.
+
+        """
+        metrics.skipped_polls.labels(url=url).inc()
+        skipped_polls = self._client.incr(constants.SKIPPED_POLLS_KEY)
+        logger.app_logger.info(
+            f"Payload of {url} unchanged, poll skipped ({skipped_polls} in total)"
+        )
+
+    def _get_key(self, url: str) -> str:
+        """
+        Build the Redis key of a URL.
+
+        Args:
+            url (str): The fetched URL.
+
+        Returns:
+            str: The Redis key.
+
+        """
+        return f"{self._key_prefix}:{url}"
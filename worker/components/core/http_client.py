@@ -0,0 +1,413 @@
+"""
+Module providing a pooled asynchronous HTTP fetcher.
+
+This module defines the AsyncFetcher class, which keeps a persistent
+httpx connection pool on a background event loop, retries failed requests
+with jittered exponential backoff under an optional deadline, hedges slow
+requests and fetches many URLs concurrently under a configurable limit.
+Synchronous code uses it through `fetch_sync` and `fetch_many_sync`.
+"""
+
+import asyncio
+import dataclasses
+import os
+import random
+import threading
+import time
+import typing
+
+import httpx
+
+from components.core import config, constants, logger
+
+cnfg = config.config
+
+T = typing.TypeVar("T")
+
+
+@dataclasses.dataclass(frozen=True)
+class FetchResult:
+    url: str
+    status_code: typing.Optional[int] = None
+    content: bytes = b""
+    headers: typing.Mapping[str, str] = dataclasses.field(default_factory=dict)
+    error: typing.Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """
+        Whether the request succeeded.
+
+        Returns:
+            bool: True if a response without error was received.
+
+        """
+        return self.error is None
+
+    @property
+    def text(self) -> str:
+        """
+        Decoded response body.
+
+        Returns:
+            str: The response body decoded as UTF-8.
+
+        """
+        return self.content.decode("utf-8")
+
+
+class AsyncFetcher:
+    def __init__(
+        self,
+        max_connections: int = cnfg.HTTP_MAX_CONNECTIONS,
+        concurrency: int = cnfg.HTTP_CONCURRENCY,
+        retries: int = cnfg.HTTP_RETRIES,
+        backoff: float = constants.HTTP_RETRY_BACKOFF,
+        hedge_after: typing.Optional[float] = cnfg.HTTP_HEDGE_AFTER,
+        transport: typing.Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Initializes an AsyncFetcher instance.
+
+        Args:
+            max_connections (int): Size of the connection pool.
+            concurrency (int): Maximum number of requests in flight.
+            retries (int): Number of retries of a failed request.
+            backoff (float): Base delay in seconds between retries,
+            doubled after every attempt and randomized.
+            hedge_after (Optional[float]): Number of seconds after which
+            a request still running is hedged with a second one,
+            None to disable hedging.
+            transport (Optional[httpx.AsyncBaseTransport]): Custom transport,
+            used by tests to stub the network.
+
+        """
+        self._max_connections = max_connections
+        self._concurrency = concurrency
+        self._retries = retries
+        self._backoff = backoff
+        self._hedge_after = hedge_after
+        self._transport = transport
+
+        self._lock = threading.Lock()
+        self._reset_state()
+
+    def _reset_state(self):
+        """Forget the event loop, client and semaphore of this process."""
+        self._pid = os.getpid()
+        self._loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self._client: typing.Optional[httpx.AsyncClient] = None
+        self._semaphore: typing.Optional[asyncio.Semaphore] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Return the pooled client, creating it on first use.
+
+        Returns:
+            httpx.AsyncClient: The client bound to the current event loop.
+
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=constants.HTTP_HEADERS,
+                limits=httpx.Limits(
+                    max_connections=self._max_connections,
+                    max_keepalive_connections=self._max_connections,
+                    keepalive_expiry=constants.HTTP_KEEPALIVE_EXPIRY,
+                ),
+                transport=self._transport,
+            )
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+
+        return self._client
+
+    async def fetch(
+        self,
+        url: str,
+        headers: typing.Optional[typing.Mapping[str, str]] = None,
+        timeout: typing.Optional[float] = None,
+        deadline: typing.Optional[float] = None,
+    ) -> FetchResult:
+        """
+        Fetch a URL, retrying transport errors and retryable statuses.
+
+        Retries wait a random delay of up to the exponential backoff, so
+        replicas failing together do not retry together. With a deadline,
+        every attempt is bounded by it and no retry starts after it.
+
+        Args:
+            url (str): The URL to fetch.
+            headers (Optional[Mapping[str, str]]): Extra request headers.
+            timeout (Optional[float]): Request timeout in seconds.
+            deadline (Optional[float]): Time of the `time.monotonic` clock
+            after which the fetch gives up.
+
+        Returns:
+            FetchResult: The response, or the last error if every attempt failed.
+
+        """
+        error = None
+
+        for attempt in range(self._retries + 1):
+            if attempt:
+                delay = random.uniform(  # noqa: S311
+                    0, self._backoff * 2 ** (attempt - 1)
+                )
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    break
+                await asyncio.sleep(delay)
+
+            attempt_timeout = timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    error = error or "DeadlineExceeded: no time left for a retry"
+                    break
+                attempt_timeout = min(timeout or remaining, remaining)
+
+            try:
+                response = await self._hedged_get(
+                    url=url, headers=headers, timeout=attempt_timeout
+                )
+            except httpx.HTTPError as ex:
+                error = f"{type(ex).__name__}: {ex}"
+                logger.app_logger.warning(f"Fetching {url} failed: {error}")
+                continue
+
+            if response.status_code in constants.HTTP_RETRY_STATUSES:
+                error = f"HTTP {response.status_code}"
+                logger.app_logger.warning(f"Fetching {url} failed: {error}")
+                continue
+
+            if response.is_error:
+                return FetchResult(
+                    url=url,
+                    status_code=response.status_code,
+                    headers=response.headers,
+                    error=f"HTTP {response.status_code}",
+                )
+
+            return FetchResult(
+                url=url,
+                status_code=response.status_code,
+                content=response.content,
+                headers=response.headers,
+            )
+
+        return FetchResult(url=url, error=error)
+
+    async def _hedged_get(
+        self,
+        url: str,
+        headers: typing.Optional[typing.Mapping[str, str]],
+        timeout: typing.Optional[float],
+    ) -> httpx.Response:
+        """
+        Send a request, hedging it with a second one if it is slow.
+
+        When the first request is still running after `hedge_after` seconds,
+        the same request is sent again and the first response received wins;
+        the other request is cancelled.
+
+        Args:
+            url (str): The URL to fetch.
+            headers (Optional[Mapping[str, str]]): Extra request headers.
+            timeout (Optional[float]): Timeout in seconds of the attempt.
+
+        Returns:
+            httpx.Response: The first response received.
+
+        """
+        started_at = time.monotonic()
+        primary = asyncio.ensure_future(
+            self._get(url=url, headers=headers, timeout=timeout)
+        )
+        if self._hedge_after is None or (
+            timeout is not None and timeout <= self._hedge_after
+        ):
+            return await primary
+
+        pending: typing.Set[asyncio.Future] = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self._hedge_after)
+            if done:
+                return primary.result()
+
+            logger.app_logger.info(f"Hedging the slow request to {url}")
+            pending.add(
+                asyncio.ensure_future(
+                    self._get(
+                        url=url,
+                        headers=headers,
+                        timeout=(
+                            timeout - (time.monotonic() - started_at)
+                            if timeout is not None
+                            else None
+                        ),
+                    )
+                )
+            )
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                responses = [task for task in done if task.exception() is None]
+                if responses:
+                    return responses[0].result()
+                if not pending:
+                    return done.pop().result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _get(
+        self,
+        url: str,
+        headers: typing.Optional[typing.Mapping[str, str]],
+        timeout: typing.Optional[float],
+    ) -> httpx.Response:
+        """
+        Send a single request within the concurrency limit.
+
+        Args:
+            url (str): The URL to fetch.
+            headers (Optional[Mapping[str, str]]): Extra request headers.
+            timeout (Optional[float]): Request timeout in seconds.
+
+        Returns:
+            httpx.Response: The response.
+
+        """
+        client = self._get_client()
+        semaphore = typing.cast(asyncio.Semaphore, self._semaphore)
+
+        async with semaphore:
+            return await client.get(url, headers=headers, timeout=timeout)
+
+    async def fetch_many(
+        self,
+        urls: typing.Iterable[str],
+        timeout: typing.Optional[float] = None,
+    ) -> typing.List[FetchResult]:
+        """
+        Fetch many URLs concurrently.
+
+        Args:
+            urls (Iterable[str]): The URLs to fetch.
+            timeout (Optional[float]): Timeout in seconds of every request.
+
+        Returns:
+            List[FetchResult]: The results, in the order of the URLs.
+
+        """
+        return list(
+            await asyncio.gather(*(self.fetch(url, timeout=timeout) for url in urls))
+        )
+
+    def fetch_sync(
+        self,
+        url: str,
+        headers: typing.Optional[typing.Mapping[str, str]] = None,
+        timeout: typing.Optional[float] = None,
+    ) -> FetchResult:
+        """
+        Fetch a URL from synchronous code.
+
+        Args:
+            url (str): The URL to fetch.
+            headers (Optional[Mapping[str, str]]): Extra request headers.
+            timeout (Optional[float]): Request timeout in seconds.
+
+        Returns:
+            FetchResult: The response, or the last error if every attempt failed.
+
+        """
+        return self.run(self.fetch(url, headers=headers, timeout=timeout))
+
+    def fetch_many_sync(
+        self,
+        urls: typing.Iterable[str],
+        timeout: typing.Optional[float] = None,
+    ) -> typing.List[FetchResult]:
+        """
+        Fetch many URLs concurrently from synchronous code.
+
+        Args:
+            urls (Iterable[str]): The URLs to fetch.
+            timeout (Optional[float]): Timeout in seconds of every request.
+
+        Returns:
+            List[FetchResult]: The results, in the order of the URLs.
+
+        """
+        return self.run(self.fetch_many(urls, timeout=timeout))
+
+    def run(self, coroutine: typing.Coroutine[typing.Any, typing.Any, T]) -> T:
+        """
+        Run a coroutine on the background event loop and wait for its result.
+
+        Args:
+            coroutine (Coroutine): The coroutine to run.
+
+        Returns:
+            T: The result of the coroutine.
+
+        """
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._get_loop())
+        return future.result()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Return the background event loop, starting it on first use.
+
+        A forked child process does not inherit the loop thread, so the state
+        is recreated when the process id changes.
+
+        Returns:
+            asyncio.AbstractEventLoop: The running background event loop.
+
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset_state()
+
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="http-fetcher",
+                    daemon=True,
+                ).start()
+
+            return self._loop
+
+    def close(self):
+        """Close the connection pool and stop the background event loop."""
+        with self._lock:
+            loop, client = self._loop, self._client
+            if loop is None or self._pid != os.getpid():
+                self._reset_state()
+                return
+
+            if client is not None:
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            self._reset_state()
+
+    instance: typing.Optional[typing.Any] = None
+
+    @staticmethod
+    def get_fetcher():
+        """
+        Retrieves the AsyncFetcher instance of the process.
+
+        If an instance does not exist, creates a new one with the default settings.
+
+        Returns:
+            AsyncFetcher: An AsyncFetcher instance.
+
+        """
+        if not AsyncFetcher.instance:
+            AsyncFetcher.instance = AsyncFetcher()
+
+        return typing.cast(AsyncFetcher, AsyncFetcher.instance)
@@ -0,0 +1,223 @@
+"""
+Module for running a job on a single worker at a time.
+
+This module provides the LeaseLock class, a Redis lease with an expiry.
+Every acquired lease gets a fencing token, a number which grows with every
+acquisition, so a worker whose lease expired while it was still running
+can tell that another worker took over before it writes anything.
+
+The lease is advisory: the token is compared in Redis right before a write,
+not by the write itself, so a lease expiring between the check and the write
+goes unnoticed. Leases last far longer than a write, which keeps that window
+small, but the writes must stay safe to repeat.
+
+A job scheduled on ticks, such as the poll of the rates, keeps its lease until
+the end of the tick with `get_tick_ttl` and `hold(keep=True)`, so the copies
+of a tick scheduled by several beats find it taken even after the first
+one finished.
+"""
+
+import contextlib
+import dataclasses
+import time
+import typing
+
+import redis
+
+from components.core import constants, logger, metrics
+
+ACQUIRE_SCRIPT: str = """
+if redis.call('exists', KEYS[1]) == 1 then
+    return false
+end
+local token = redis.call('incr', KEYS[2])
+redis.call('set', KEYS[1], token, 'PX', ARGV[1])
+return token
+"""
+
+RELEASE_SCRIPT: str = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaseLostError(Exception):
+    """Raised when a lease expired and was taken over by another worker."""
+
+
+@dataclasses.dataclass(frozen=True)
+class Lease:
+    lock: "LeaseLock"
+    token: int
+
+    def is_held(self) -> bool:
+        """
+        Check whether the lease is still held.
+
+        Returns:
+            bool: True if the lease did not expire nor was taken over.
+
+        """
+        return self.lock.get_token() == self.token
+
+    def ensure_held(self):
+        """
+        Check that the lease is still held before a write.
+
+        The check is advisory: the lease may still expire before the write.
+
+        Raises:
+            LeaseLostError: If the lease expired or was taken over.
+
+        """
+        if not self.is_held():
+            raise LeaseLostError(
+                f"Lease {self.lock.name} with token {self.token} was lost"
+            )
+
+
+class LeaseLock:
+    def __init__(
+        self,
+        client: redis.Redis,
+        name: str,
+        ttl: int,
+        key_prefix: str = constants.LOCK_KEY_PREFIX,
+    ):
+        """
+        Initializes a LeaseLock instance.
+
+        Args:
+            client (redis.Redis): The Redis client.
+            name (str): Name of the lock.
+            ttl (int): Number of milliseconds after which the lease expires,
+            even if its holder never releases it.
+            key_prefix (str): Prefix of the Redis keys.
+
+        """
+        self._client = client
+        self._ttl = ttl
+        self._key = f"{key_prefix}:{name}"
+        self._fence_key = f"{key_prefix}:{name}:fence"
+        self._acquire = client.register_script(ACQUIRE_SCRIPT)
+        self._release = client.register_script(RELEASE_SCRIPT)
+        self.name = name
+
+    def acquire(self, ttl: typing.Optional[int] = None) -> typing.Optional[Lease]:
+        """
+        Try to take the lease, without waiting.
+
+        The check and the assignment of the fencing token run
+        in a single script, so this costs one round trip.
+
+        Args:
+            ttl (Optional[int]): Number of milliseconds after which the lease
+            expires, the ttl of the lock by default.
+
+        Returns:
+            Optional[Lease]: The lease, or None if another worker holds it.
+
+        """
+        token = self._acquire(
+            keys=[self._key, self._fence_key],
+            args=[self._ttl if ttl is None else ttl],
+        )
+        if token is None:
+            metrics.lock_contention.labels(lock=self.name).inc()
+            contention = self._client.incr(constants.LOCK_CONTENTION_KEY)
+            logger.app_logger.info(
+                f"Lock {self.name} is held by another worker "
+                f"({contention} contended acquisitions in total)"
+            )
+            return None
+
+        return Lease(lock=self, token=int(token))
+
+    @contextlib.contextmanager
+    def hold(
+        self, ttl: typing.Optional[int] = None, keep: bool = False
+    ) -> typing.Iterator[typing.Optional[Lease]]:
+        """
+        A context manager holding the lease while its block runs.
+
+        Args:
+            ttl (Optional[int]): Number of milliseconds after which the lease
+            expires, the ttl of the lock by default.
+            keep (bool): Keep the lease until it expires when the block
+            completes, instead of releasing it. It is released anyway
+            if the block raises, so another worker may retry.
+
+        Yields:
+            Optional[Lease]: The lease, or None if another worker holds it.
+
+        """
+        lease = self.acquire(ttl=ttl)
+        completed = False
+        try:
+            yield lease
+            completed = True
+        finally:
+            released = lease is None or (keep and completed) or self.release(lease)
+            if not released:
+                logger.app_logger.warning(
+                    f"Lease {self.name} with token {lease.token} expired "
+                    "before it was released"
+                )
+
+    def release(self, lease: Lease) -> bool:
+        """
+        Give the lease back.
+
+        The key is deleted only if it still holds the fencing token
+        of the lease, so an expired lease never releases its successor.
+
+        Args:
+            lease (Lease): The acquired lease.
+
+        Returns:
+            bool: True if the lease was still held and got released.
+
+        """
+        return bool(self._release(keys=[self._key], args=[lease.token]))
+
+    def get_token(self) -> typing.Optional[int]:
+        """
+        Retrieve the fencing token of the current lease.
+
+        Returns:
+            Optional[int]: The fencing token, or None if the lock is free.
+
+        """
+        token = self._client.get(self._key)
+        return int(token) if token is not None else None
+
+    def get_contention(self) -> int:
+        """
+        Retrieve the number of acquisitions which found the lock taken.
+
+        Returns:
+            int: The contention counter.
+
+        """
+        return int(self._client.get(constants.LOCK_CONTENTION_KEY) or 0)
+
+
+def get_tick_ttl(interval: int, now: typing.Optional[float] = None) -> int:
+    """
+    Return the time left until the end of the current tick.
+
+    Ticks are aligned on the epoch, like the crontab schedules
+    of the beat with an interval dividing an hour.
+
+    Args:
+        interval (int): Number of milliseconds of a tick.
+        now (Optional[float]): The UNIX time, the current time by default.
+
+    Returns:
+        int: Number of milliseconds until the next tick starts, at least 1.
+
+    """
+    now_ms = int((time.time() if now is None else now) * 1000)
+    return max(interval - now_ms % interval, 1)
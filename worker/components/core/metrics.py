@@ -0,0 +1,158 @@
+"""
+Module defining the Prometheus metrics of the worker.
+
+The ingestion pipeline is split into stages (fetch, parse, resolve, write,
+rollup) whose latency and failures are measured with `track_stage`. Every SQL
+statement sent by an instrumented engine is counted as a database round
+trip of the stage it ran in. Polls skipped because their payload did not
+change and lease acquisitions lost to another worker are counted too.
+
+Celery runs tasks in forked child processes, so when PROMETHEUS_MULTIPROC_DIR
+is set the metrics are written to that directory and merged by the scrape
+endpoint of the parent process.
+"""
+
+import contextlib
+import contextvars
+import os
+import pathlib
+import typing
+
+import prometheus_client
+import sqlalchemy
+from prometheus_client import multiprocess
+
+from components.core import logger
+
+STAGE_OTHER: str = "other"
+
+current_stage: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "current_stage", default=STAGE_OTHER
+)
+
+stage_duration = prometheus_client.Histogram(
+    "worker_stage_duration_seconds",
+    "Duration of the stages of the ingestion pipeline.",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30),
+)
+stage_failures = prometheus_client.Counter(
+    "worker_stage_failures_total",
+    "Failures of the stages of the ingestion pipeline by error type.",
+    ["stage", "error"],
+)
+payload_bytes = prometheus_client.Histogram(
+    "worker_payload_bytes",
+    "Size of the fetched payloads.",
+    ["source"],
+    buckets=(1e3, 5e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6),
+)
+rows_written = prometheus_client.Counter(
+    "worker_rows_written_total",
+    "Currency history rows written.",
+    ["source"],
+)
+db_round_trips = prometheus_client.Counter(
+    "worker_db_round_trips_total",
+    "SQL statements sent to the database by stage.",
+    ["stage"],
+)
+skipped_polls = prometheus_client.Counter(
+    "worker_skipped_polls_total",
+    "Polls skipped because their payload did not change.",
+    ["url"],
+)
+lock_contention = prometheus_client.Counter(
+    "worker_lock_contention_total",
+    "Lease acquisitions failed because another worker held the lease.",
+    ["lock"],
+)
+
+
+@contextlib.contextmanager
+def track_stage(stage: str) -> typing.Iterator[None]:
+    """
+    A context manager measuring a stage of the ingestion pipeline.
+
+    The duration of the block is observed, an exception raised by it
+    is counted by its type, and the statements it sends to the database
+    are counted as round trips of the stage.
+
+    Args:
+        stage (str): Name of the stage.
+
+    Yields:
+        None
+
+    """
+    token = current_stage.set(stage)
+    try:
+        with stage_duration.labels(stage=stage).time():
+            yield
+    except Exception as ex:
+        record_failure(stage=stage, error=type(ex).__name__)
+        raise
+    finally:
+        current_stage.reset(token)
+
+
+def record_failure(stage: str, error: str):
+    """
+    Count a failure of a stage.
+
+    Args:
+        stage (str): Name of the stage.
+        error (str): Type of the error, the text before the first colon
+        of an error message is used.
+
+    """
+    stage_failures.labels(stage=stage, error=error.split(":", 1)[0]).inc()
+
+
+def instrument_engine(engine: sqlalchemy.engine.Engine):
+    """
+    Count the statements an engine sends to the database.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The engine to instrument.
+
+    """
+
+    @sqlalchemy.event.listens_for(engine, "before_cursor_execute")
+    def count_round_trip(*args: object):
+        db_round_trips.labels(stage=current_stage.get()).inc()
+
+
+def start_metrics_server(port: int):
+    """
+    Serve the metrics on a local HTTP endpoint.
+
+    With PROMETHEUS_MULTIPROC_DIR set, the files left by previous runs
+    are removed and the endpoint merges the metrics of all processes.
+
+    Args:
+        port (int): Port of the endpoint.
+
+    """
+    registry = prometheus_client.REGISTRY
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        for path in pathlib.Path(multiproc_dir).glob("*.db"):
+            path.unlink()
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+    prometheus_client.start_http_server(port, registry=registry)
+    logger.app_logger.info(f"Serving metrics on port {port}")
+
+
+def mark_process_dead(pid: int):
+    """
+    Drop the live metrics of an exited process.
+
+    Args:
+        pid (int): Id of the process.
+
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,37 @@
+"""
+Module for managing the Redis connection of the worker.
+
+This module provides the RedisMngr class, which lazily creates
+a single Redis client for the process from the configured REDIS_URL.
+Redis is already the Celery broker, so the worker uses it for
+its shared state too.
+"""
+
+import typing
+
+import redis
+
+from components.core import config
+
+cnfg = config.config
+
+
+class RedisMngr:
+    instance: typing.Optional[redis.Redis] = None
+
+    @staticmethod
+    def get_client() -> redis.Redis:
+        """
+        Retrieves the Redis client of the process.
+
+        If a client does not exist, creates a new one from REDIS_URL.
+        The connection pool of the client reconnects after a fork.
+
+        Returns:
+            redis.Redis: A Redis client.
+
+        """
+        if RedisMngr.instance is None:
+            RedisMngr.instance = redis.Redis.from_url(cnfg.REDIS_URL)
+
+        return RedisMngr.instance
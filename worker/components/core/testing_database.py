@@ -1,9 +1,14 @@
 """
 Module providing functionality for 
-creating SQLite in-memory sessions.
+creating SQLite in-memory sessions,
+and PostgreSQL sessions in throwaway schemas.
 """
 
 import contextlib
+import typing
+import uuid
+
+import sqlalchemy
 from sqlalchemy import create_engine, orm
 
 from components.core import database
@@ -41,3 +46,48 @@ def create_sqlite_inmemory_session():
         session.close()
         database.Base.metadata.drop_all(bind=engine)
         engine.dispose()
+
+
+@contextlib.contextmanager
+def create_postgres_session(
+    url: str, tables: typing.Optional[typing.Sequence[sqlalchemy.Table]] = None
+):
+    """
+    Context manager for creating a PostgreSQL session in a throwaway schema.
+
+    This context manager creates a schema with a unique name in the
+    database, makes it the search path of every connection, initializes
+    the tables in it and provides a session for database operations.
+    After the context block, the schema is dropped with everything
+    created in it.
+
+    Args:
+        url (str): URL of the PostgreSQL database.
+        tables (Optional[Sequence[sqlalchemy.Table]]): The tables to
+        initialize, all tables of Base.metadata by default.
+
+    Yields:
+        sqlalchemy.orm.Session: A session object
+        for interacting with the schema.
+
+    """
+    schema = f"test_{uuid.uuid4().hex}"
+    engine = create_engine(
+        url, echo=False, connect_args={"options": f"-csearch_path={schema}"}
+    )
+
+    with engine.begin() as connection:
+        connection.execute(sqlalchemy.text(f"CREATE SCHEMA {schema}"))
+        database.Base.metadata.create_all(bind=connection, tables=tables)
+    session_maker = orm.sessionmaker(bind=engine, expire_on_commit=False)
+
+    session = session_maker()
+
+    try:
+        yield session
+
+    finally:
+        session.close()
+        with engine.begin() as connection:
+            connection.execute(sqlalchemy.text(f"DROP SCHEMA {schema} CASCADE"))
+        engine.dispose()
@@ -0,0 +1,109 @@
+"""
+Module providing unit tests for
+the CircuitBreaker class.
+"""
+
+import fakeredis
+import pytest
+
+from components.core import circuit_breaker
+
+NAME: str = "nbu"
+RESET_TIMEOUT: int = 60
+
+
+class FakeClock:
+    def __init__(self):
+        """Initializes a clock stopped at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """
+        Return the current time of the clock.
+
+        Returns:
+            float: The current time.
+
+        """
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """
+    Fixture for creating a clock moved by the tests.
+
+    Returns:
+        FakeClock: The clock.
+
+    """
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock: FakeClock) -> circuit_breaker.CircuitBreaker:
+    """
+    Fixture for creating a CircuitBreaker backed by fake Redis.
+
+    Args:
+        clock (FakeClock): The clock of the breaker.
+
+    Returns:
+        circuit_breaker.CircuitBreaker: The breaker.
+
+    """
+    return circuit_breaker.CircuitBreaker(
+        client=fakeredis.FakeRedis(),
+        failure_threshold=2,
+        reset_timeout=RESET_TIMEOUT,
+        clock=clock,
+    )
+
+
+def test_circuit_opens_after_failures(breaker: circuit_breaker.CircuitBreaker):
+    """
+    Test that consecutive failures open the circuit and a success resets them.
+
+    Args:
+        breaker (circuit_breaker.CircuitBreaker): The breaker.
+
+    """
+    breaker.record_failure(name=NAME)
+    breaker.record_success(name=NAME)
+    assert not breaker.record_failure(name=NAME)
+    assert breaker.allow_request(name=NAME)
+
+    assert breaker.record_failure(name=NAME)
+    assert breaker.get_state(name=NAME) is circuit_breaker.CircuitState.OPEN
+    assert not breaker.allow_request(name=NAME)
+
+
+def test_half_open_circuit_lets_one_probe_through(
+    breaker: circuit_breaker.CircuitBreaker, clock: FakeClock
+):
+    """
+    Test that a half-open circuit lets a single probe through,
+    whose failure opens the circuit again and whose success closes it.
+
+    Args:
+        breaker (circuit_breaker.CircuitBreaker): The breaker.
+        clock (FakeClock): The clock of the breaker.
+
+    """
+    breaker.record_failure(name=NAME)
+    breaker.record_failure(name=NAME)
+    clock.now += RESET_TIMEOUT
+
+    assert breaker.get_state(name=NAME) is circuit_breaker.CircuitState.HALF_OPEN
+    assert breaker.allow_request(name=NAME)
+    assert not breaker.allow_request(name=NAME)
+
+    assert breaker.record_failure(name=NAME)
+    assert breaker.get_state(name=NAME) is circuit_breaker.CircuitState.OPEN
+
+    clock.now += RESET_TIMEOUT
+    assert breaker.allow_request(name=NAME)
+    breaker.record_success(name=NAME)
+
+    assert breaker.get_state(name=NAME) is circuit_breaker.CircuitState.CLOSED
+    assert breaker.allow_request(name=NAME)
@@ -0,0 +1,31 @@
+"""
+Module providing unit tests for
+the DataVersion class.
+"""
+
+import time
+
+import fakeredis
+
+from components.core import constants, data_version
+
+
+def test_bump_publishes_version():
+    """
+    Test that every bump increments the version, records its time
+    and publishes it.
+    """
+    client = fakeredis.FakeRedis()
+    pubsub = client.pubsub()
+    pubsub.subscribe(constants.DATA_CHANNEL)
+    currency_data_version = data_version.DataVersion(client=client)
+
+    assert currency_data_version.get() == 0
+    assert [currency_data_version.bump(), currency_data_version.bump()] == [1, 2]
+    assert [
+        message["data"]
+        for message in iter(lambda: pubsub.get_message(timeout=1), None)
+        if message["type"] == "message"
+    ] == [b"1", b"2"]
+    assert currency_data_version.get() == 2
+    assert int(client.get(constants.DATA_MODIFIED_AT_KEY)) <= time.time()
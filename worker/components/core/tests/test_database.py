@@ -0,0 +1,63 @@
+"""
+Module providing unit tests for
+the engine lifecycle of the DatabaseMngr class.
+"""
+
+import typing
+
+import pytest
+
+from components.core import config, database
+
+
+@pytest.fixture
+def database_mngr() -> typing.Iterator[database.DatabaseMngr]:
+    """
+    Fixture for creating a DatabaseMngr from the configuration.
+
+    Yields:
+        database.DatabaseMngr: The DatabaseMngr instance.
+
+    """
+    database.DatabaseMngr.reset_db()
+    yield database.DatabaseMngr.get_db()
+    database.DatabaseMngr.reset_db()
+
+
+def test_get_db_applies_pool_settings(database_mngr: database.DatabaseMngr):
+    """
+    Test that the engine is created with the pool settings of the configuration
+    and that the sessionmaker is created only once.
+
+    Args:
+        database_mngr (database.DatabaseMngr): The DatabaseMngr instance.
+
+    """
+    cnfg = config.config
+    engine = database_mngr.engine
+
+    assert engine.echo is cnfg.DB_ECHO
+    assert engine.pool.size() == cnfg.DB_POOL_SIZE
+    assert engine.pool._max_overflow == cnfg.DB_MAX_OVERFLOW
+    assert engine.pool._recycle == cnfg.DB_POOL_RECYCLE
+    assert engine.pool._pre_ping is cnfg.DB_POOL_PRE_PING
+    assert database_mngr.get_session() is database_mngr.get_session()
+    assert database.DatabaseMngr.get_db() is database_mngr
+
+
+def test_reset_db_replaces_engine(database_mngr: database.DatabaseMngr):
+    """
+    Test that reset_db drops the inherited engine
+    so that the next get_db call creates a new one.
+
+    Args:
+        database_mngr (database.DatabaseMngr): The DatabaseMngr instance.
+
+    """
+    database.DatabaseMngr.reset_db()
+
+    new_database_mngr = database.DatabaseMngr.get_db()
+
+    assert database.DatabaseMngr.instance is new_database_mngr
+    assert new_database_mngr is not database_mngr
+    assert new_database_mngr.engine is not database_mngr.engine
@@ -0,0 +1,109 @@
+"""
+Module providing unit tests for
+the PayloadFingerprintStore class.
+"""
+
+import fakeredis
+import prometheus_client
+import pytest
+
+from components.core import constants, fingerprint, http_client
+
+URL: str = "https://example.com/api"
+
+
+@pytest.fixture
+def redis_client() -> fakeredis.FakeRedis:
+    """
+    Fixture for creating a fake Redis client.
+
+    Returns:
+        fakeredis.FakeRedis: The fake Redis client.
+
+    """
+    return fakeredis.FakeRedis()
+
+
+@pytest.fixture
+def fingerprint_store(
+    redis_client: fakeredis.FakeRedis,
+) -> fingerprint.PayloadFingerprintStore:
+    """
+    Fixture for creating a PayloadFingerprintStore backed by fake Redis.
+
+    Args:
+        redis_client (fakeredis.FakeRedis): The fake Redis client.
+
+    Returns:
+        fingerprint.PayloadFingerprintStore: The fingerprint store.
+
+    """
+    return fingerprint.PayloadFingerprintStore(client=redis_client)
+
+
+def test_save_and_compare_fingerprint(
+    fingerprint_store: fingerprint.PayloadFingerprintStore,
+):
+    """
+    Test that a saved payload is recognised and its validators are sent back.
+
+    Args:
+        fingerprint_store (fingerprint.PayloadFingerprintStore): The store to test.
+
+    """
+    assert fingerprint_store.get(url=URL) is None
+
+    result = http_client.FetchResult(
+        url=URL, status_code=200, content=b"[]", headers={"ETag": '"v1"'}
+    )
+    fingerprint_store.save(result=result)
+    payload_fingerprint = fingerprint_store.get(url=URL)
+
+    assert payload_fingerprint is not None
+    assert payload_fingerprint.get_validators() == {"If-None-Match": '"v1"'}
+    assert fingerprint_store.is_unchanged(
+        result=result, fingerprint=payload_fingerprint
+    )
+    assert fingerprint_store.is_unchanged(
+        result=http_client.FetchResult(url=URL, status_code=304),
+        fingerprint=payload_fingerprint,
+    )
+    assert not fingerprint_store.is_unchanged(
+        result=http_client.FetchResult(url=URL, status_code=200, content=b"[{}]"),
+        fingerprint=payload_fingerprint,
+    )
+
+    fingerprint_store.clear(url=URL)
+    assert fingerprint_store.get(url=URL) is None
+
+
+def test_record_skip(
+    fingerprint_store: fingerprint.PayloadFingerprintStore,
+    redis_client: fakeredis.FakeRedis,
+):
+    """
+    Test that skipped polls are counted in Redis and by Prometheus.
+
+    Args:
+        fingerprint_store (fingerprint.PayloadFingerprintStore): The store to test.
+        redis_client (fakeredis.FakeRedis): The fake Redis client.
+
+    """
+    labels = {"url": URL}
+    skipped_polls = (
+        prometheus_client.REGISTRY.get_sample_value(
+            "worker_skipped_polls_total", labels
+        )
+        or 0
+    )
+
+    fingerprint_store.record_skip(url=URL)
+    fingerprint_store.record_skip(url=URL)
+
+    assert int(redis_client.get(constants.SKIPPED_POLLS_KEY)) == 2
+    assert (
+        prometheus_client.REGISTRY.get_sample_value(
+            "worker_skipped_polls_total", labels
+        )
+        == skipped_polls + 2
+    )
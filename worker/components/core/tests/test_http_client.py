@@ -0,0 +1,156 @@
+"""
+Module providing unit tests for
+the AsyncFetcher class.
+"""
+
+import asyncio
+import gzip
+import time
+import typing
+
+import httpx
+import pytest
+
+from components.core import http_client
+
+
+@pytest.fixture
+def create_fetcher() -> typing.Iterator[typing.Callable]:
+    """
+    Fixture for creating fetchers backed by a mock transport.
+
+    Yields:
+        Callable: A function creating an AsyncFetcher for a request handler.
+
+    """
+    fetchers = []
+
+    def create(handler: typing.Callable, **kwargs: float):
+        fetcher = http_client.AsyncFetcher(
+            transport=httpx.MockTransport(handler), backoff=0, **kwargs
+        )
+        fetchers.append(fetcher)
+        return fetcher
+
+    yield create
+
+    for fetcher in fetchers:
+        fetcher.close()
+
+
+def test_fetch_retries_failed_requests(create_fetcher: typing.Callable):
+    """
+    Test that retryable statuses are retried until a request succeeds.
+
+    Args:
+        create_fetcher (callable): Fixture function for creating fetchers.
+
+    """
+    statuses = [503, 502, 200]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(statuses.pop(0), content=b"[]")
+
+    result = create_fetcher(handler, retries=2).fetch_sync("https://example.com")
+
+    assert result.ok and result.content == b"[]"
+    assert not statuses
+
+
+def test_fetch_decodes_gzip(create_fetcher: typing.Callable):
+    """
+    Test that gzip is negotiated and compressed bodies are decoded.
+
+    Args:
+        create_fetcher (callable): Fixture function for creating fetchers.
+
+    """
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert "gzip" in request.headers["Accept-Encoding"]
+        return httpx.Response(
+            200,
+            content=gzip.compress(b"[]"),
+            headers={"Content-Encoding": "gzip"},
+        )
+
+    result = create_fetcher(handler).fetch_sync("https://example.com")
+
+    assert result.content == b"[]"
+
+
+def test_fetch_many_respects_concurrency(create_fetcher: typing.Callable):
+    """
+    Test that fetch_many never has more requests in flight than allowed.
+
+    Args:
+        create_fetcher (callable): Fixture function for creating fetchers.
+
+    """
+    in_flight = []
+    max_in_flight = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        in_flight.append(request)
+        max_in_flight.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(request)
+        return httpx.Response(200, content=request.url.query)
+
+    urls = [f"https://example.com/?date={day}" for day in range(10)]
+    results = create_fetcher(handler, concurrency=3).fetch_many_sync(urls)
+
+    assert [result.content for result in results] == [
+        f"date={day}".encode() for day in range(10)
+    ]
+    assert max(max_in_flight) == 3
+
+
+def test_fetch_hedges_slow_requests(create_fetcher: typing.Callable):
+    """
+    Test that a slow request is hedged and the first response wins.
+
+    Args:
+        create_fetcher (callable): Fixture function for creating fetchers.
+
+    """
+    requests_count = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal requests_count
+        requests_count += 1
+        if requests_count == 1:
+            await asyncio.sleep(5)
+        return httpx.Response(200, content=str(requests_count).encode())
+
+    fetcher = create_fetcher(handler, retries=0, hedge_after=0.05)
+
+    started_at = time.perf_counter()
+    result = fetcher.fetch_sync("https://example.com", timeout=10)
+
+    assert time.perf_counter() - started_at < 1
+    assert result.ok and result.content == b"2"
+
+
+def test_fetch_gives_up_at_deadline(create_fetcher: typing.Callable):
+    """
+    Test that retries stop at the deadline instead of exhausting the retries.
+
+    Args:
+        create_fetcher (callable): Fixture function for creating fetchers.
+
+    """
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.05)
+        return httpx.Response(503)
+
+    fetcher = create_fetcher(handler, retries=100, hedge_after=None)
+
+    started_at = time.perf_counter()
+    result = fetcher.run(
+        fetcher.fetch("https://example.com", deadline=time.monotonic() + 0.3)
+    )
+
+    assert time.perf_counter() - started_at < 1
+    assert not result.ok
@@ -0,0 +1,167 @@
+"""
+Module providing unit tests for
+the LeaseLock class.
+"""
+
+import time
+
+import fakeredis
+import prometheus_client
+import pytest
+
+from components.core import constants, lock
+
+
+@pytest.fixture
+def redis_client() -> fakeredis.FakeRedis:
+    """
+    Fixture for creating a fake Redis client.
+
+    Returns:
+        fakeredis.FakeRedis: The fake Redis client.
+
+    """
+    return fakeredis.FakeRedis()
+
+
+@pytest.fixture
+def lease_lock(redis_client: fakeredis.FakeRedis) -> lock.LeaseLock:
+    """
+    Fixture for creating a LeaseLock backed by fake Redis.
+
+    Args:
+        redis_client (fakeredis.FakeRedis): The fake Redis client.
+
+    Returns:
+        lock.LeaseLock: The lock.
+
+    """
+    return lock.LeaseLock(client=redis_client, name="test", ttl=60_000)
+
+
+def test_acquire_is_exclusive(lease_lock: lock.LeaseLock):
+    """
+    Test that only one holder gets the lease
+    and that contended acquisitions are counted in Redis and by Prometheus.
+
+    Args:
+        lease_lock (lock.LeaseLock): The lock.
+
+    """
+    labels = {"lock": lease_lock.name}
+    contention = (
+        prometheus_client.REGISTRY.get_sample_value(
+            "worker_lock_contention_total", labels
+        )
+        or 0
+    )
+    lease = lease_lock.acquire()
+
+    assert lease is not None
+    assert lease.is_held()
+    assert lease_lock.acquire() is None
+    assert lease_lock.acquire() is None
+    assert lease_lock.get_contention() == 2
+    assert (
+        prometheus_client.REGISTRY.get_sample_value(
+            "worker_lock_contention_total", labels
+        )
+        == contention + 2
+    )
+
+    assert lease_lock.release(lease)
+    assert lease_lock.get_token() is None
+
+
+def test_fencing_token_grows(lease_lock: lock.LeaseLock):
+    """
+    Test that every lease gets a greater fencing token
+    and that a stale lease neither passes the check nor releases its successor.
+
+    Args:
+        lease_lock (lock.LeaseLock): The lock.
+
+    """
+    stale_lease = lease_lock.acquire()
+    lease_lock.release(stale_lease)
+    lease = lease_lock.acquire()
+
+    assert lease.token > stale_lease.token
+    assert not stale_lease.is_held()
+    assert not lease_lock.release(stale_lease)
+    assert lease.is_held()
+
+    with pytest.raises(lock.LeaseLostError):
+        stale_lease.ensure_held()
+
+
+def test_lease_expires(redis_client: fakeredis.FakeRedis):
+    """
+    Test that a lease which is never released expires.
+
+    Args:
+        redis_client (fakeredis.FakeRedis): The fake Redis client.
+
+    """
+    lease_lock = lock.LeaseLock(client=redis_client, name="test", ttl=50)
+
+    lease = lease_lock.acquire()
+    time.sleep(0.1)
+
+    assert not lease.is_held()
+    assert lease_lock.acquire() is not None
+
+
+def test_hold(lease_lock: lock.LeaseLock, redis_client: fakeredis.FakeRedis):
+    """
+    Test that hold releases the lease when its block exits.
+
+    Args:
+        lease_lock (lock.LeaseLock): The lock.
+        redis_client (fakeredis.FakeRedis): The fake Redis client.
+
+    """
+    with lease_lock.hold() as lease:
+        assert lease is not None
+
+        with lease_lock.hold() as contended_lease:
+            assert contended_lease is None
+
+    assert lease_lock.get_token() is None
+    assert int(redis_client.get(constants.LOCK_CONTENTION_KEY)) == 1
+
+
+def test_hold_keeps_lease_for_tick(lease_lock: lock.LeaseLock):
+    """
+    Test that a lease kept for a tick is not taken again after its block
+    completes, and that it is released if the block raises.
+
+    Args:
+        lease_lock (lock.LeaseLock): The lock.
+
+    """
+    with lease_lock.hold(keep=True) as lease:
+        assert lease is not None
+
+    with lease_lock.hold(keep=True) as duplicate_lease:
+        assert duplicate_lease is None
+    assert lease.is_held()
+
+    lease_lock.release(lease)
+    with pytest.raises(RuntimeError):
+        with lease_lock.hold(keep=True) as failed_lease:
+            assert failed_lease is not None
+            raise RuntimeError("poll failed")
+
+    assert lease_lock.get_token() is None
+
+
+def test_get_tick_ttl():
+    """Test that the ttl of a tick runs until the next tick starts."""
+    interval = 15 * 60 * 1000
+
+    assert lock.get_tick_ttl(interval=interval, now=1_800_000_000) == interval
+    assert lock.get_tick_ttl(interval=interval, now=1_800_000_060.5) == (
+        interval - 60_500
+    )
+    assert lock.get_tick_ttl(interval=interval, now=1_800_000_899.9999) == 1
@@ -0,0 +1,61 @@
+"""
+Module providing unit tests for
+the metrics of the ingestion pipeline.
+"""
+
+import typing
+
+import prometheus_client
+import pytest
+import sqlalchemy
+
+from components.core import metrics
+
+
+def get_sample(name: str, labels: typing.Dict[str, str]) -> float:
+    """
+    Read a sample of the default registry.
+
+    Args:
+        name (str): Name of the sample.
+        labels (Dict[str, str]): Labels of the sample.
+
+    Returns:
+        float: The value of the sample, 0 if it was not recorded yet.
+
+    """
+    return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_track_stage_counts_failures():
+    """Test that a stage is timed and its exceptions are counted by type."""
+    labels = {"stage": "test_stage"}
+    failure_labels = {"stage": "test_stage", "error": "ValueError"}
+    count = get_sample("worker_stage_duration_seconds_count", labels)
+    failures = get_sample("worker_stage_failures_total", failure_labels)
+
+    with metrics.track_stage(stage="test_stage"):
+        pass
+
+    with pytest.raises(ValueError), metrics.track_stage(stage="test_stage"):
+        raise ValueError
+
+    assert get_sample("worker_stage_duration_seconds_count", labels) == count + 2
+    assert get_sample("worker_stage_failures_total", failure_labels) == failures + 1
+    assert metrics.current_stage.get() == metrics.STAGE_OTHER
+
+
+def test_instrument_engine_counts_round_trips():
+    """Test that the statements of an engine are counted by stage."""
+    engine = sqlalchemy.create_engine("sqlite:///:memory:")
+    metrics.instrument_engine(engine)
+    labels = {"stage": "test_round_trips"}
+    round_trips = get_sample("worker_db_round_trips_total", labels)
+
+    with metrics.track_stage(stage="test_round_trips"), engine.connect() as conn:
+        conn.execute(sqlalchemy.text("SELECT 1"))
+        conn.execute(sqlalchemy.text("SELECT 2"))
+
+    engine.dispose()
+
+    assert get_sample("worker_db_round_trips_total", labels) == round_trips + 2
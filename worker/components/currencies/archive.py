@@ -0,0 +1,230 @@
+"""
+Module for archiving old currency history to Parquet files.
+
+Every rate is kept forever, but old entries are rarely read, so whole months
+of `history_currencies` older than a retention are exported to one
+zstd-compressed Parquet file per month and then removed from the database.
+This module contains the `HistoryArchive` class, which writes the files,
+and the `HistoryArchiveService` class, which moves expired months from the
+database to the archive. The API reads the archived months back
+(see `currencies.archive` of the API).
+"""
+
+import datetime
+import os
+import pathlib
+import typing
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import orm
+
+from components.core import logger
+from components.currencies import (
+    constants,
+    history_currencies_repository,
+    partition_repository,
+)
+
+SCHEMA: pa.Schema = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("currency_id", pa.int64()),
+        ("rate", pa.decimal128(10, constants.RATE_SCALE)),
+        ("date", pa.timestamp("us", tz="UTC")),
+        ("actualy_end", pa.timestamp("us", tz="UTC")),
+        ("source", pa.string()),
+    ]
+)
+
+
+class HistoryArchive:
+    def __init__(self, directory: typing.Union[str, pathlib.Path]):
+        """
+        Initializes a HistoryArchive instance.
+
+        Args:
+            directory (Union[str, pathlib.Path]): Directory of the archive,
+            created on the first write.
+
+        """
+        self._directory = pathlib.Path(directory)
+
+    def get_path(self, month: datetime.date) -> pathlib.Path:
+        """
+        Build the path of the file of a month.
+
+        Args:
+            month (datetime.date): A day of the month.
+
+        Returns:
+            pathlib.Path: The path of the file.
+
+        """
+        return self._directory / f"{constants.ARCHIVE_FILE_PREFIX}{month:%Y_%m}.parquet"
+
+    def write_month(
+        self,
+        month: datetime.date,
+        entries: typing.Sequence[typing.Mapping[str, typing.Any]],
+    ) -> int:
+        """
+        Write the entries of a month to its file.
+
+        Entries already archived for the month are kept, unless they have the
+        id of a written entry, so a month can be archived again. The file is
+        written next to its final path and then moved over it, so readers
+        never see a partial file.
+
+        Args:
+            month (datetime.date): A day of the month.
+            entries (Sequence[Mapping[str, Any]]): The entries.
+
+        Returns:
+            int: Number of entries in the file.
+
+        """
+        table = pa.Table.from_pylist(
+            [{field: entry[field] for field in SCHEMA.names} for entry in entries],
+            schema=SCHEMA,
+        )
+
+        path = self.get_path(month)
+        if path.exists():
+            archived = pq.read_table(path, memory_map=True)
+            archived = archived.filter(
+                pc.invert(pc.is_in(archived["id"], value_set=table["id"]))
+            )
+            table = pa.concat_tables([archived, table])
+
+        table = table.sort_by([("date", "ascending"), ("id", "ascending")])
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_name(f"{path.name}.tmp")
+        pq.write_table(table, temporary_path, compression=constants.ARCHIVE_COMPRESSION)
+        os.replace(temporary_path, path)
+
+        return table.num_rows
+
+
+class HistoryArchiveService:
+    def __init__(
+        self,
+        conn: orm.Session,
+        archive: HistoryArchive,
+        history_currencies_repo: history_currencies_repository.HistoryCurrenciesRepository = history_currencies_repository.HistoryCurrenciesRepository(),  # noqa: E501
+        partition_repo: partition_repository.HistoryPartitionRepository = partition_repository.HistoryPartitionRepository(),  # noqa: E501
+    ):
+        """
+        Initializes a HistoryArchiveService instance.
+
+        Args:
+            conn (orm.Session): Database connection.
+            archive (HistoryArchive): The archive.
+            history_currencies_repo (HistoryCurrenciesRepository): Repository
+            of the currency history.
+            partition_repo (HistoryPartitionRepository): Repository of the
+            monthly partitions of the currency history.
+
+        """
+        self._conn = conn
+        self._archive = archive
+        self._history_currencies_repo: (
+            history_currencies_repository.HistoryCurrenciesRepository
+        ) = history_currencies_repo
+        self._partition_repo: partition_repository.HistoryPartitionRepository = (
+            partition_repo
+        )
+
+    def archive_before(self, before: datetime.date) -> typing.List[datetime.date]:
+        """
+        Move the months ended before a date from the database to the archive.
+
+        The months are processed from the oldest one. Only the entries whose
+        validity ended within their month are archived: entries still valid,
+        as compacted entries extended past the month, stay in the database
+        until a later run. The entries of a month are written to its file
+        first and only then removed from the database in one transaction:
+        on PostgreSQL the partition of the month is dropped when it holds
+        no entry still valid, and the archived entries left are deleted.
+
+        Args:
+            before (datetime.date): The date the months must end before.
+
+        Returns:
+            List[datetime.date]: The first days of the archived months.
+
+        """
+        oldest_date = self._history_currencies_repo.get_oldest_date(conn=self._conn)
+        if oldest_date is None:
+            return []
+
+        is_partitioned = self._partition_repo.is_partitioned(conn=self._conn)
+        archived_months = []
+        month = oldest_date.date().replace(day=1)
+
+        while partition_repository.add_months(month, 1) <= before:
+            next_month = partition_repository.add_months(month, 1)
+            if self._archive_month(
+                month=month, next_month=next_month, is_partitioned=is_partitioned
+            ):
+                archived_months.append(month)
+            month = next_month
+
+        return archived_months
+
+    def _archive_month(
+        self, month: datetime.date, next_month: datetime.date, is_partitioned: bool
+    ) -> bool:
+        """
+        Move the entries of a month ended within it to the archive.
+
+        Args:
+            month (datetime.date): The first day of the month.
+            next_month (datetime.date): The first day of the next month.
+            is_partitioned (bool): Whether the history table is partitioned.
+
+        Returns:
+            bool: True if the month had ended entries.
+
+        """
+        date_from = datetime.datetime.combine(
+            month, datetime.time.min, tzinfo=datetime.timezone.utc
+        )
+        date_to = datetime.datetime.combine(
+            next_month, datetime.time.min, tzinfo=datetime.timezone.utc
+        )
+
+        entries = self._history_currencies_repo.get_entries(
+            date_from=date_from, date_to=date_to, conn=self._conn, ended_before=date_to
+        )
+        if not entries:
+            return False
+
+        archived_count = self._archive.write_month(month=month, entries=entries)
+
+        try:
+            if is_partitioned and not self._history_currencies_repo.has_open_entries(
+                date_from=date_from, date_to=date_to, conn=self._conn
+            ):
+                self._partition_repo.detach_partition(
+                    month=month, conn=self._conn, drop=True
+                )
+            self._history_currencies_repo.delete_entries(
+                date_from=date_from,
+                date_to=date_to,
+                conn=self._conn,
+                ended_before=date_to,
+            )
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            raise
+
+        logger.app_logger.info(
+            f"Archived {len(entries)} history entries of {month:%Y-%m} "
+            f"to {self._archive.get_path(month)} ({archived_count} archived)"
+        )
+
+        return True
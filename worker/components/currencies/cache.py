@@ -0,0 +1,110 @@
+"""
+Module providing a process-local cache of currency ids.
+
+This module defines the CurrencyIdCache class, a bounded TTL cache
+mapping NBU currency codes (r030) to `Currency.id`, and the
+`currency_id_cache` instance shared by the worker process.
+"""
+
+import collections
+import threading
+import time
+import typing
+
+from components.currencies import constants
+
+
+class CurrencyIdCache:
+    def __init__(
+        self,
+        max_size: int = constants.CURRENCY_CACHE_MAX_SIZE,
+        ttl: float = constants.CURRENCY_CACHE_TTL,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initializes a CurrencyIdCache instance.
+
+        Args:
+            max_size (int): Maximum number of cached codes, the least recently
+            used ones are evicted first.
+            ttl (float): Number of seconds an entry stays valid.
+            clock (Callable[[], float]): Monotonic clock used for expiration.
+
+        """
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: collections.OrderedDict[int, typing.Tuple[int, float]] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get_many(self, codes: typing.Iterable[int]) -> typing.Dict[int, int]:
+        """
+        Return cached ids for the given codes.
+
+        Expired entries are dropped and counted as misses.
+
+        Args:
+            codes (typing.Iterable[int]): Currency codes (r030) to look up.
+
+        Returns:
+            typing.Dict[int, int]: Mapping of cached codes to currency ids.
+
+        """
+        now = self._clock()
+        found = {}
+
+        with self._lock:
+            for code in codes:
+                entry = self._entries.get(code)
+                if entry is None or entry[1] <= now:
+                    self._entries.pop(code, None)
+                    self.misses += 1
+                    continue
+
+                self._entries.move_to_end(code)
+                found[code] = entry[0]
+                self.hits += 1
+
+        return found
+
+    def set_many(self, codes_to_ids: typing.Mapping[int, int]):
+        """
+        Store currency ids in the cache.
+
+        Args:
+            codes_to_ids (typing.Mapping[int, int]): Mapping of currency
+            codes (r030) to currency ids.
+
+        """
+        expires_at = self._clock() + self._ttl
+
+        with self._lock:
+            for code, currency_id in codes_to_ids.items():
+                self._entries[code] = (currency_id, expires_at)
+                self._entries.move_to_end(code)
+
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> typing.Dict[str, int]:
+        """
+        Return the cache counters.
+
+        Returns:
+            typing.Dict[str, int]: Number of hits, misses and cached entries.
+
+        """
+        return dict(hits=self.hits, misses=self.misses, size=len(self._entries))
+
+
+currency_id_cache = CurrencyIdCache()
@@ -0,0 +1,80 @@
+"""
+Module for managing the checkpoints of the historical backfill.
+
+This module contains the `BackfillCheckpointRepository` class, which records
+the exchange dates already stored by the backfill, so an interrupted
+backfill can be restarted without fetching or inserting them again.
+"""
+
+import datetime
+import typing
+
+import sqlalchemy
+from sqlalchemy import orm
+
+from components.currencies import models as currency_models
+
+
+class BackfillCheckpointRepository:
+    def __init__(
+        self,
+        checkpoint_model: type[
+            currency_models.BackfillCheckpoint
+        ] = currency_models.BackfillCheckpoint,
+    ):
+
+        self._checkpoint_model = checkpoint_model
+
+    def get_completed_dates(
+        self,
+        date_from: datetime.date,
+        date_to: datetime.date,
+        conn: orm.Session,
+    ) -> typing.Set[datetime.date]:
+        """
+        Retrieve the dates of a range that were already backfilled.
+
+        Args:
+            date_from (datetime.date): First date of the range.
+            date_to (datetime.date): Last date of the range, inclusive.
+            conn (orm.Session): Database connection.
+
+        Returns:
+            typing.Set[datetime.date]: The checkpointed dates.
+
+        """
+        query = sqlalchemy.select(self._checkpoint_model.date).where(
+            self._checkpoint_model.date.between(date_from, date_to)
+        )
+        result = conn.execute(query)
+
+        return set(result.scalars().all())
+
+    def create_checkpoints(
+        self,
+        dates_to_rows: typing.Mapping[datetime.date, int],
+        conn: orm.Session,
+    ):
+        """
+        Record backfilled dates.
+
+        The method does not commit, so the checkpoints are stored in the same
+        transaction as the history rows they describe.
+
+        Args:
+            dates_to_rows (typing.Mapping[datetime.date, int]): Mapping of
+            backfilled dates to the number of rows written for them.
+            conn (orm.Session): Database connection.
+
+        """
+        if not dates_to_rows:
+            return
+
+        created_at = datetime.datetime.now(datetime.timezone.utc)
+        conn.execute(
+            sqlalchemy.insert(self._checkpoint_model.__table__),
+            [
+                dict(date=date, rows=rows, created_at=created_at)
+                for date, rows in dates_to_rows.items()
+            ],
+        )
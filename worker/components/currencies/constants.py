@@ -1,3 +1,14 @@
 """Constants for currencies module."""
 
 MINUTE: int = 30
+RATE_SCALE: int = 5
+CURRENCY_CACHE_TTL: int = 60 * 60
+CURRENCY_CACHE_MAX_SIZE: int = 1024
+
+DEFAULT_SOURCE: str = "nbu"
+
+ROLLUP_HOUR: str = "hour"
+ROLLUP_DAY: str = "day"
+
+ARCHIVE_FILE_PREFIX: str = "history_currencies_"
+ARCHIVE_COMPRESSION: str = "zstd"
@@ -0,0 +1,121 @@
+"""
+Module for maintaining the current rate of every currency.
+
+This module contains the `CurrentRateRepository` class, which keeps the
+`current_rate` table, one row per currency and source holding the latest
+rate of the source and its validity window, in step with the currency
+history. Its methods do not
+commit, so the history repository calls them in the transaction of the
+history write they mirror.
+"""
+
+import datetime
+import typing
+
+import sqlalchemy
+from sqlalchemy import orm
+from sqlalchemy.dialects import postgresql, sqlite
+
+from components.currencies import constants, models as currency_models, schemas
+
+
+class CurrentRateRepository:
+    def __init__(
+        self,
+        current_rate_model: type[
+            currency_models.CurrentRate
+        ] = currency_models.CurrentRate,
+    ):
+
+        self._current_rate_model = current_rate_model
+
+    def upsert_rows(
+        self,
+        rows: typing.Iterable[schemas.HistoryCurrencyRow],
+        conn: orm.Session,
+    ):
+        """
+        Make the latest of history rows the current rates of their currencies.
+
+        Only the latest row of every currency and source is written, and it
+        replaces the current rate of the currency from the same source unless
+        that one starts later, so writing older history, as the backfill does,
+        keeps it. Sources never replace the current rates of each other.
+
+        Args:
+            rows (typing.Iterable[schemas.HistoryCurrencyRow]): The rows.
+            conn (orm.Session): Database connection.
+
+        """
+        latest_rows: typing.Dict[typing.Tuple[int, str], schemas.HistoryCurrencyRow] = (
+            {}
+        )
+        for row in rows:
+            key = (row.currency_id, row.source)
+            latest_row = latest_rows.get(key)
+            if latest_row is None or latest_row.date <= row.date:
+                latest_rows[key] = row
+
+        if not latest_rows:
+            return
+
+        table = self._current_rate_model.__table__
+        insert = self._get_insert(conn=conn)(table)
+        conn.execute(
+            insert.on_conflict_do_update(
+                index_elements=["currency_id", "source"],
+                set_=dict(
+                    rate=insert.excluded.rate,
+                    date=insert.excluded.date,
+                    actualy_end=insert.excluded.actualy_end,
+                ),
+                where=table.c.date <= insert.excluded.date,
+            ),
+            [row._asdict() for row in latest_rows.values()],
+        )
+
+    def extend(
+        self,
+        currency_ids: typing.Collection[int],
+        actualy_end: datetime.datetime,
+        conn: orm.Session,
+        source: str = constants.DEFAULT_SOURCE,
+    ):
+        """
+        Extend the validity of the current rates of currencies from a source.
+
+        Args:
+            currency_ids (typing.Collection[int]): Ids of the currencies.
+            actualy_end (datetime.datetime): The new end of validity.
+            conn (orm.Session): Database connection.
+            source (str): Source of the rates.
+
+        """
+        if not currency_ids:
+            return
+
+        conn.execute(
+            sqlalchemy.update(self._current_rate_model.__table__)
+            .where(
+                self._current_rate_model.currency_id.in_(currency_ids),
+                self._current_rate_model.source == source,
+            )
+            .values(actualy_end=actualy_end)
+        )
+
+    @staticmethod
+    def _get_insert(conn: orm.Session) -> typing.Callable:
+        """
+        Return the dialect specific insert construct supporting ON CONFLICT.
+
+        Args:
+            conn (orm.Session): Database connection.
+
+        Returns:
+            typing.Callable: The insert construct of the bound dialect.
+
+        """
+        if conn.get_bind().dialect.name == "sqlite":
+            return sqlite.insert
+
+        return postgresql.insert
@@ -4,12 +4,29 @@ Module for managing historical currency data.
 This module contains the `HistoryCurrenciesRepository` class, which provides
 functionality for creating and retrieving historical currency entries in the database.
 It utilizes SQLAlchemy for database interactions and defines methods for creating
-new historical currency entries and retrieving all existing entries.
+new historical currency entries, extending the validity of unchanged rates
+instead of duplicating them, writing entries in bulk without the ORM,
+retrieving and deleting the entries of date ranges for archival and
+retrieving all existing entries. Every entry is tagged with the source
+(rate provider) it was fetched from. Every write also maintains the current
+rate of the written currencies and folds the written rates into the rollups
+of the history in the same transaction.
 """
 
+import csv
 import datetime
+import decimal
+import io
+import time
 
-from components.currencies import models as currency_models, constants
+from components.core import logger, metrics
+from components.currencies import (
+    constants,
+    current_rate_repository,
+    models as currency_models,
+    rollup_repository,
+    schemas,
+)
 import typing
 from components.third_party.national_bank import schemas as national_bank_schemas
 from sqlalchemy import orm
@@ -22,14 +39,21 @@ class HistoryCurrenciesRepository:
         history_currencies_models: type[
             currency_models.HistoryCurrencies
         ] = currency_models.HistoryCurrencies,
+        current_rate_repo: current_rate_repository.CurrentRateRepository = current_rate_repository.CurrentRateRepository(),  # noqa: E501
+        rollup_repo: rollup_repository.CurrencyRollupRepository = rollup_repository.CurrencyRollupRepository(),  # noqa: E501
     ):
 
         self._history_currencies_model = history_currencies_models
+        self._current_rate_repo: current_rate_repository.CurrentRateRepository = (
+            current_rate_repo
+        )
+        self._rollup_repo: rollup_repository.CurrencyRollupRepository = rollup_repo
 
     def create_currencies(
         self,
         currencies_data: typing.List[national_bank_schemas.CurrencyData],
         conn: orm.Session,
+        source: str = constants.DEFAULT_SOURCE,
     ) -> typing.List[currency_models.HistoryCurrencies]:
         """
         Create historical currency entries in the database.
@@ -38,6 +62,7 @@ class HistoryCurrenciesRepository:
             currencies_data (typing.List[national_bank_schemas.CurrencyData]): List of
             currency data to create.
             conn (orm.Session): Database connection.
+            source (str): Source of the rates.
 
         Returns:
             typing.List[currency_models.HistoryCurrencies]: List of created historical
@@ -52,15 +77,569 @@ class HistoryCurrenciesRepository:
                 rate=currency_data.rate,
                 date=dt_utc,
                 actualy_end=dt_utc + datetime.timedelta(minutes=constants.MINUTE),
+                source=source,
             )
             for currency_data in currencies_data
         ]
 
+        rows = self._get_rows(currencies_objs=currencies_objs)
         conn.add_all(currencies_objs)
+        self._current_rate_repo.upsert_rows(rows=rows, conn=conn)
+        self._roll_up(rows=rows, conn=conn)
         conn.commit()
 
         return currencies_objs
 
+    def extend_or_create_currencies(
+        self,
+        currencies_data: typing.List[national_bank_schemas.CurrencyData],
+        conn: orm.Session,
+        source: str = constants.DEFAULT_SOURCE,
+    ) -> typing.Tuple[typing.List[currency_models.HistoryCurrencies], int]:
+        """
+        Store currency rates, compacting unchanged rates into one interval.
+
+        The latest entry of every currency from the source
+        is looked up with a single query.
+        When it is still valid and its rate is unchanged, its `actualy_end`
+        is extended; all such entries are updated with a single statement.
+        Otherwise a new entry is created and a still valid latest entry with
+        a different rate is closed at the current time, so validity intervals
+        of a currency never overlap. Every stored rate, extended or created,
+        is sampled into the rollups at the current time.
+
+        Args:
+            currencies_data (typing.List[national_bank_schemas.CurrencyData]): List of
+            currency data to store.
+            conn (orm.Session): Database connection.
+            source (str): Source of the rates.
+
+        Returns:
+            typing.Tuple[typing.List[currency_models.HistoryCurrencies], int]: Created
+            historical currency objects and the number of extended entries.
+
+        """
+        dt_utc = datetime.datetime.utcnow()
+        actualy_end = dt_utc + datetime.timedelta(minutes=constants.MINUTE)
+
+        open_entries = self._get_open_entries(
+            currency_ids=[
+                typing.cast(int, currency_data.currency_id)
+                for currency_data in currencies_data
+            ],
+            date=dt_utc,
+            source=source,
+            conn=conn,
+        )
+
+        extended_ids = []
+        extended_rows = []
+        closed_ids = []
+        changed_data = []
+        for currency_data in currencies_data:
+            open_entry = open_entries.get(typing.cast(int, currency_data.currency_id))
+            if open_entry is None:
+                changed_data.append(currency_data)
+            elif self._normalize_rate(open_entry[1]) == self._normalize_rate(
+                currency_data.rate
+            ):
+                extended_ids.append(open_entry[0])
+                extended_rows.append(
+                    schemas.HistoryCurrencyRow(
+                        currency_id=typing.cast(int, currency_data.currency_id),
+                        rate=open_entry[1],
+                        date=dt_utc,
+                        actualy_end=actualy_end,
+                        source=source,
+                    )
+                )
+            else:
+                closed_ids.append(open_entry[0])
+                changed_data.append(currency_data)
+
+        self._set_actualy_end(ids=extended_ids, actualy_end=actualy_end, conn=conn)
+        self._set_actualy_end(ids=closed_ids, actualy_end=dt_utc, conn=conn)
+
+        currencies_objs = [
+            self._history_currencies_model(
+                currency_id=currency_data.currency_id,
+                rate=currency_data.rate,
+                date=dt_utc,
+                actualy_end=actualy_end,
+                source=source,
+            )
+            for currency_data in changed_data
+        ]
+
+        created_rows = self._get_rows(currencies_objs=currencies_objs)
+        conn.add_all(currencies_objs)
+        self._current_rate_repo.extend(
+            currency_ids=[row.currency_id for row in extended_rows],
+            actualy_end=actualy_end,
+            conn=conn,
+            source=source,
+        )
+        self._current_rate_repo.upsert_rows(rows=created_rows, conn=conn)
+        self._roll_up(rows=extended_rows + created_rows, conn=conn)
+        conn.commit()
+
+        return currencies_objs, len(extended_ids)
+
+    def extend_open_currencies(
+        self, conn: orm.Session, source: str = constants.DEFAULT_SOURCE
+    ) -> typing.List[schemas.HistoryCurrencyRow]:
+        """
+        Extend the validity of every entry of a source that is still valid.
+
+        Used when a poll returned the same rates as the previous one,
+        so they are kept current with a single statement, and sampled
+        into the rollups at the current time.
+
+        Args:
+            conn (orm.Session): Database connection.
+            source (str): Source of the rates.
+
+        Returns:
+            typing.List[schemas.HistoryCurrencyRow]: The extended rates,
+            valid from the current time to their new end of validity.
+
+        """
+        dt_utc = datetime.datetime.utcnow()
+        actualy_end = dt_utc + datetime.timedelta(minutes=constants.MINUTE)
+
+        model = self._history_currencies_model
+        result = conn.execute(
+            sqlalchemy.update(model.__table__)
+            .where(
+                model.source == source,
+                model.actualy_end >= dt_utc,
+                model.actualy_end < actualy_end,
+            )
+            .values(actualy_end=actualy_end)
+            .returning(model.currency_id, model.rate)
+        )
+        rows = [
+            schemas.HistoryCurrencyRow(
+                currency_id=currency_id,
+                rate=rate,
+                date=dt_utc,
+                actualy_end=actualy_end,
+                source=source,
+            )
+            for currency_id, rate in result.all()
+        ]
+        self._current_rate_repo.extend(
+            currency_ids=[row.currency_id for row in rows],
+            actualy_end=actualy_end,
+            conn=conn,
+            source=source,
+        )
+        self._roll_up(rows=rows, conn=conn)
+        conn.commit()
+
+        return rows
+
+    def _get_open_entries(
+        self,
+        currency_ids: typing.List[int],
+        date: datetime.datetime,
+        source: str,
+        conn: orm.Session,
+    ) -> typing.Dict[int, typing.Tuple[int, decimal.Decimal]]:
+        """
+        Retrieve the latest entries of currencies that are still valid at a date.
+
+        Args:
+            currency_ids (typing.List[int]): Ids of the currencies.
+            date (datetime.datetime): The date the entries must be valid at.
+            source (str): Source of the entries.
+            conn (orm.Session): Database connection.
+
+        Returns:
+            typing.Dict[int, typing.Tuple[int, decimal.Decimal]]: Mapping of
+            currency ids to the id and rate of their open entry.
+
+        """
+        model = self._history_currencies_model
+        latest_dates = (
+            sqlalchemy.select(
+                model.currency_id, sqlalchemy.func.max(model.date).label("date")
+            )
+            .where(model.currency_id.in_(currency_ids), model.source == source)
+            .group_by(model.currency_id)
+            .subquery()
+        )
+        query = (
+            sqlalchemy.select(model.currency_id, model.id, model.rate)
+            .join(
+                latest_dates,
+                sqlalchemy.and_(
+                    model.currency_id == latest_dates.c.currency_id,
+                    model.date == latest_dates.c.date,
+                ),
+            )
+            .where(model.source == source, model.actualy_end >= date)
+        )
+        result = conn.execute(query)
+
+        return {
+            currency_id: (history_id, rate)
+            for currency_id, history_id, rate in result.all()
+        }
+
+    def _set_actualy_end(
+        self,
+        ids: typing.List[int],
+        actualy_end: datetime.datetime,
+        conn: orm.Session,
+    ):
+        """
+        Set the end of validity of many entries with a single statement.
+
+        Args:
+            ids (typing.List[int]): Ids of the entries.
+            actualy_end (datetime.datetime): The new end of validity.
+            conn (orm.Session): Database connection.
+
+        """
+        if not ids:
+            return
+
+        conn.execute(
+            sqlalchemy.update(self._history_currencies_model.__table__)
+            .where(self._history_currencies_model.id.in_(ids))
+            .values(actualy_end=actualy_end)
+        )
+
+    def _roll_up(
+        self,
+        rows: typing.Iterable[schemas.HistoryCurrencyRow],
+        conn: orm.Session,
+    ):
+        """
+        Sample written rows into the rollups of the history.
+
+        Args:
+            rows (typing.Iterable[schemas.HistoryCurrencyRow]): The rows.
+            conn (orm.Session): Database connection.
+
+        """
+        with metrics.track_stage(stage="rollup"):
+            self._rollup_repo.add_rows(rows=rows, conn=conn)
+
+    @staticmethod
+    def _get_rows(
+        currencies_objs: typing.Iterable[currency_models.HistoryCurrencies],
+    ) -> typing.List[schemas.HistoryCurrencyRow]:
+        """
+        Build history rows from historical currency objects.
+
+        Args:
+            currencies_objs (typing.Iterable): Historical currency objects.
+
+        Returns:
+            typing.List[schemas.HistoryCurrencyRow]: The rows.
+
+        """
+        return [
+            schemas.HistoryCurrencyRow(
+                currency_id=currencies_obj.currency_id,
+                rate=currencies_obj.rate,
+                date=currencies_obj.date,
+                actualy_end=currencies_obj.actualy_end,
+                source=currencies_obj.source,
+            )
+            for currencies_obj in currencies_objs
+        ]
+
+    @staticmethod
+    def _normalize_rate(rate: decimal.Decimal) -> decimal.Decimal:
+        """
+        Round a rate to the precision stored in the database.
+
+        Args:
+            rate (decimal.Decimal): The rate to round.
+
+        Returns:
+            decimal.Decimal: The rate with the stored number of decimal places.
+
+        """
+        return decimal.Decimal(rate).quantize(
+            decimal.Decimal(1).scaleb(-constants.RATE_SCALE)
+        )
+
+    def build_rows(
+        self,
+        currencies_data: typing.Iterable[national_bank_schemas.CurrencyData],
+        date: typing.Optional[datetime.datetime] = None,
+        source: str = constants.DEFAULT_SOURCE,
+    ) -> typing.List[schemas.HistoryCurrencyRow]:
+        """
+        Build history rows for bulk writing from currency data.
+
+        Args:
+            currencies_data (typing.Iterable): Currency data with
+            resolved currency ids.
+            date (typing.Optional[datetime.datetime]): Start of the rates
+            validity, the current UTC time by default.
+            source (str): Source of the rates.
+
+        Returns:
+            typing.List[schemas.HistoryCurrencyRow]: Rows ready for
+            `bulk_create_currencies`.
+
+        """
+        date = date or datetime.datetime.utcnow()
+        actualy_end = date + datetime.timedelta(minutes=constants.MINUTE)
+
+        return [
+            schemas.HistoryCurrencyRow(
+                currency_id=typing.cast(int, currency_data.currency_id),
+                rate=currency_data.rate,
+                date=date,
+                actualy_end=actualy_end,
+                source=source,
+            )
+            for currency_data in currencies_data
+        ]
+
+    def bulk_create_currencies(
+        self,
+        rows: typing.Iterable[schemas.HistoryCurrencyRow],
+        conn: orm.Session,
+    ) -> int:
+        """
+        Write historical currency entries in bulk, skipping ORM objects.
+
+        On PostgreSQL with psycopg2 the rows are streamed with COPY, on other
+        backends they are written with a single executemany INSERT. The latest
+        rows become the current rates of their currencies unless these are
+        more recent, and all rows are folded into the rollups. The method
+        does not commit, so it runs inside the caller's
+        transaction.
+
+        Args:
+            rows (typing.Iterable[schemas.HistoryCurrencyRow]): Rows to write.
+            conn (orm.Session): Database connection.
+
+        Returns:
+            int: Number of written rows.
+
+        """
+        started_at = time.perf_counter()
+        rows = list(rows)
+
+        if conn.get_bind().dialect.driver == "psycopg2":
+            rows_count = self._copy_rows(rows=rows, conn=conn)
+        else:
+            rows_count = self._insert_rows(rows=rows, conn=conn)
+        self._current_rate_repo.upsert_rows(rows=rows, conn=conn)
+        self._roll_up(rows=rows, conn=conn)
+
+        elapsed = max(time.perf_counter() - started_at, 1e-9)
+        logger.app_logger.info(
+            f"Bulk wrote {rows_count} history rows in {elapsed:.3f}s "
+            f"({rows_count / elapsed:.0f} rows/s)"
+        )
+
+        return rows_count
+
+    def _copy_rows(
+        self,
+        rows: typing.Iterable[schemas.HistoryCurrencyRow],
+        conn: orm.Session,
+    ) -> int:
+        """
+        Stream rows into the history table with PostgreSQL COPY.
+
+        Args:
+            rows (typing.Iterable[schemas.HistoryCurrencyRow]): Rows to write.
+            conn (orm.Session): Database connection.
+
+        Returns:
+            int: Number of written rows.
+
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        rows_count = 0
+        for row in rows:
+            writer.writerow(row)
+            rows_count += 1
+        buffer.seek(0)
+
+        columns = ", ".join(schemas.HistoryCurrencyRow._fields)
+        copy_sql = (
+            f"COPY {self._history_currencies_model.__tablename__} ({columns}) "
+            "FROM STDIN WITH (FORMAT csv)"
+        )
+
+        dbapi_connection = conn.connection().connection.dbapi_connection
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(copy_sql, buffer)
+
+        return rows_count
+
+    def _insert_rows(
+        self,
+        rows: typing.Iterable[schemas.HistoryCurrencyRow],
+        conn: orm.Session,
+    ) -> int:
+        """
+        Write rows into the history table with a Core executemany INSERT.
+
+        Args:
+            rows (typing.Iterable[schemas.HistoryCurrencyRow]): Rows to write.
+            conn (orm.Session): Database connection.
+
+        Returns:
+            int: Number of written rows.
+
+        """
+        values = [row._asdict() for row in rows]
+        if values:
+            conn.execute(
+                sqlalchemy.insert(self._history_currencies_model.__table__), values
+            )
+
+        return len(values)
+
+    def get_oldest_date(self, conn: orm.Session) -> typing.Optional[datetime.datetime]:
+        """
+        Retrieve the date of the oldest historical currency entry.
+
+        Args:
+            conn (orm.Session): Database connection.
+
+        Returns:
+            typing.Optional[datetime.datetime]: The date, None without entries.
+
+        """
+        return conn.execute(
+            sqlalchemy.select(sqlalchemy.func.min(self._history_currencies_model.date))
+        ).scalar()
+
+    def get_entries(
+        self,
+        date_from: datetime.datetime,
+        date_to: datetime.datetime,
+        conn: orm.Session,
+        ended_before: typing.Optional[datetime.datetime] = None,
+    ) -> typing.List[typing.Dict[str, typing.Any]]:
+        """
+        Retrieve the entries of a date range as plain mappings, skipping ORM objects.
+
+        Args:
+            date_from (datetime.datetime): Start of the range.
+            date_to (datetime.datetime): End of the range, exclusive.
+            conn (orm.Session): Database connection.
+            ended_before (typing.Optional[datetime.datetime]): Only retrieve
+            the entries whose validity ends before this date.
+
+        Returns:
+            typing.List[typing.Dict[str, typing.Any]]: The entries
+            ordered by date and id.
+
+        """
+        model = self._history_currencies_model
+        result = conn.execute(
+            sqlalchemy.select(model.__table__)
+            .where(*self._get_range_conditions(date_from, date_to, ended_before))
+            .order_by(model.date, model.id)
+        )
+
+        return [dict(entry) for entry in result.mappings()]
+
+    def has_open_entries(
+        self,
+        date_from: datetime.datetime,
+        date_to: datetime.datetime,
+        conn: orm.Session,
+    ) -> bool:
+        """
+        Check whether entries of a date range are still valid at its end.
+
+        Compacted entries are extended while their rate is unchanged, so an
+        entry of an old range can still be the valid one.
+
+        Args:
+            date_from (datetime.datetime): Start of the range.
+            date_to (datetime.datetime): End of the range, exclusive.
+            conn (orm.Session): Database connection.
+
+        Returns:
+            bool: True if an entry of the range ends at or after its end.
+
+        """
+        model = self._history_currencies_model
+        return conn.execute(
+            sqlalchemy.select(
+                sqlalchemy.exists().where(
+                    model.date >= date_from,
+                    model.date < date_to,
+                    model.actualy_end >= date_to,
+                )
+            )
+        ).scalar()
+
+    def delete_entries(
+        self,
+        date_from: datetime.datetime,
+        date_to: datetime.datetime,
+        conn: orm.Session,
+        ended_before: typing.Optional[datetime.datetime] = None,
+    ) -> int:
+        """
+        Delete the entries of a date range with a single statement.
+
+        The method does not commit, so it runs inside the caller's transaction.
+
+        Args:
+            date_from (datetime.datetime): Start of the range.
+            date_to (datetime.datetime): End of the range, exclusive.
+            conn (orm.Session): Database connection.
+            ended_before (typing.Optional[datetime.datetime]): Only delete
+            the entries whose validity ends before this date.
+
+        Returns:
+            int: Number of deleted entries.
+
+        """
+        model = self._history_currencies_model
+        result = conn.execute(
+            sqlalchemy.delete(model.__table__).where(
+                *self._get_range_conditions(date_from, date_to, ended_before)
+            )
+        )
+
+        return result.rowcount
+
+    def _get_range_conditions(
+        self,
+        date_from: datetime.datetime,
+        date_to: datetime.datetime,
+        ended_before: typing.Optional[datetime.datetime],
+    ) -> typing.List[sqlalchemy.ColumnElement]:
+        """
+        Build the conditions selecting the entries of a date range.
+
+        Args:
+            date_from (datetime.datetime): Start of the range.
+            date_to (datetime.datetime): End of the range, exclusive.
+            ended_before (typing.Optional[datetime.datetime]): Only select
+            the entries whose validity ends before this date.
+
+        Returns:
+            typing.List[sqlalchemy.ColumnElement]: The conditions.
+
+        """
+        model = self._history_currencies_model
+        conditions = [model.date >= date_from, model.date < date_to]
+        if ended_before is not None:
+            conditions.append(model.actualy_end < ended_before)
+
+        return conditions
+
     def get_all(
         self,
         conn: orm.Session,
@@ -1,10 +1,15 @@
 """
 Module defining the Currencies class
-representing currency data in the database.
+representing currency data in the database,
+along with the current rate of every currency
+and the hourly and daily OHLC rollups of the currency history.
 """
 
+import typing
+
 import sqlalchemy
 from components.core import database
+from components.currencies import constants
 
 
 class Currency(database.Base):
@@ -12,7 +17,7 @@ class Currency(database.Base):
     __tablename__ = "currency"
 
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True, autoincrement=True)
-    code = sqlalchemy.Column(sqlalchemy.Integer)
+    code = sqlalchemy.Column(sqlalchemy.Integer, unique=True)
     text_code = sqlalchemy.Column(sqlalchemy.String(3))
     name = sqlalchemy.Column(sqlalchemy.String(100))
 
@@ -28,3 +33,83 @@ class HistoryCurrencies(database.Base):
         sqlalchemy.Integer, sqlalchemy.ForeignKey("currency.id"), nullable=True
     )
     actualy_end = sqlalchemy.Column(sqlalchemy.TIMESTAMP(timezone=True))
+    source = sqlalchemy.Column(
+        sqlalchemy.String(32), nullable=False, default=constants.DEFAULT_SOURCE
+    )
+
+
+class CurrentRate(database.Base):
+
+    __tablename__ = "current_rate"
+    __table_args__ = (
+        sqlalchemy.UniqueConstraint(
+            "currency_id", "source", name="current_rate_currency_source_unique"
+        ),
+    )
+
+    id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True, autoincrement=True)
+    currency_id = sqlalchemy.Column(
+        sqlalchemy.Integer, sqlalchemy.ForeignKey("currency.id"), nullable=False
+    )
+    rate = sqlalchemy.Column(sqlalchemy.DECIMAL(precision=10, scale=5))  # type: ignore
+    date = sqlalchemy.Column(sqlalchemy.TIMESTAMP(timezone=True))
+    actualy_end = sqlalchemy.Column(sqlalchemy.TIMESTAMP(timezone=True))
+    source = sqlalchemy.Column(
+        sqlalchemy.String(32), nullable=False, default=constants.DEFAULT_SOURCE
+    )
+
+
+class BackfillCheckpoint(database.Base):
+
+    __tablename__ = "backfill_checkpoint"
+
+    id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True, autoincrement=True)
+    date = sqlalchemy.Column(sqlalchemy.Date, unique=True)
+    rows = sqlalchemy.Column(sqlalchemy.Integer)
+    created_at = sqlalchemy.Column(sqlalchemy.TIMESTAMP(timezone=True))
+
+
+class CurrencyRollupMixin:
+
+    interval: typing.ClassVar[str]
+
+    id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True, autoincrement=True)
+    currency_id = sqlalchemy.Column(
+        sqlalchemy.Integer, sqlalchemy.ForeignKey("currency.id"), nullable=False
+    )
+    source = sqlalchemy.Column(
+        sqlalchemy.String(32), nullable=False, default=constants.DEFAULT_SOURCE
+    )
+    bucket = sqlalchemy.Column(sqlalchemy.TIMESTAMP(timezone=True), nullable=False)
+    open = sqlalchemy.Column(sqlalchemy.DECIMAL(precision=10, scale=5))  # type: ignore
+    high = sqlalchemy.Column(sqlalchemy.DECIMAL(precision=10, scale=5))  # type: ignore
+    low = sqlalchemy.Column(sqlalchemy.DECIMAL(precision=10, scale=5))  # type: ignore
+    close = sqlalchemy.Column(sqlalchemy.DECIMAL(precision=10, scale=5))  # type: ignore
+    rate_sum = sqlalchemy.Column(
+        sqlalchemy.DECIMAL(precision=20, scale=5)  # type: ignore
+    )
+    samples = sqlalchemy.Column(sqlalchemy.Integer)
+
+
+class HourlyCurrencyRollup(CurrencyRollupMixin, database.Base):
+
+    __tablename__ = "currency_rollup_hourly"
+    __table_args__ = (
+        sqlalchemy.UniqueConstraint(
+            "currency_id", "source", "bucket", name="currency_rollup_hourly_unique"
+        ),
+    )
+
+    interval = constants.ROLLUP_HOUR
+
+
+class DailyCurrencyRollup(CurrencyRollupMixin, database.Base):
+
+    __tablename__ = "currency_rollup_daily"
+    __table_args__ = (
+        sqlalchemy.UniqueConstraint(
+            "currency_id", "source", "bucket", name="currency_rollup_daily_unique"
+        ),
+    )
+
+    interval = constants.ROLLUP_DAY
@@ -0,0 +1,309 @@
+"""
+Module for managing the monthly partitions of the currency history.
+
+On PostgreSQL `history_currencies` is partitioned by month of `date`
+(see the `0006_partition_history_currencies` migration of the API).
+This module contains the `HistoryPartitionRepository` class, which
+pre-creates the partitions of the coming months, moves entries of other
+months out of the default partition, and detaches, and optionally drops,
+the partitions of expired months.
+"""
+
+import datetime
+import re
+import typing
+
+import sqlalchemy
+from sqlalchemy import orm
+
+from components.core import logger
+from components.currencies import models as currency_models
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    """
+    Compute the first day of a month relative to another one.
+
+    Args:
+        month (datetime.date): A day of the reference month.
+        months (int): Number of months to add, may be negative.
+
+    Returns:
+        datetime.date: The first day of the resulting month.
+
+    """
+    month_index = month.year * 12 + month.month - 1 + months
+    return datetime.date(month_index // 12, month_index % 12 + 1, 1)
+
+
+class HistoryPartitionRepository:
+    def __init__(
+        self,
+        history_currencies_models: type[
+            currency_models.HistoryCurrencies
+        ] = currency_models.HistoryCurrencies,
+    ):
+
+        self._table: str = history_currencies_models.__tablename__
+        self._default_partition: str = f"{self._table}_default"
+        self._partition_pattern = re.compile(
+            rf"^{re.escape(self._table)}_p(\d{{4}})_(\d{{2}})$"
+        )
+
+    def get_partition_name(self, month: datetime.date) -> str:
+        """
+        Build the name of the partition of a month.
+
+        Args:
+            month (datetime.date): A day of the month.
+
+        Returns:
+            str: The name of the partition.
+
+        """
+        return f"{self._table}_p{month:%Y_%m}"
+
+    def is_partitioned(self, conn: orm.Session) -> bool:
+        """
+        Check whether the history table is partitioned.
+
+        Args:
+            conn (orm.Session): Database connection.
+
+        Returns:
+            bool: True on PostgreSQL once the history table is partitioned.
+
+        """
+        if conn.get_bind().dialect.name != "postgresql":
+            return False
+
+        relkind = conn.execute(
+            sqlalchemy.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"),
+            {"t": self._table},
+        ).scalar()
+
+        return relkind == "p"
+
+    def get_partitions(self, conn: orm.Session) -> typing.Dict[datetime.date, str]:
+        """
+        Retrieve the monthly partitions attached to the history table.
+
+        Args:
+            conn (orm.Session): Database connection.
+
+        Returns:
+            typing.Dict[datetime.date, str]: Mapping of the first days
+            of the months to the names of their partitions.
+
+        """
+        result = conn.execute(
+            sqlalchemy.text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = to_regclass(:t)"
+            ),
+            {"t": self._table},
+        )
+
+        partitions = {}
+        for (name,) in result.all():
+            match = self._partition_pattern.match(name)
+            if match:
+                month = datetime.date(int(match[1]), int(match[2]), 1)
+                partitions[month] = name
+
+        return partitions
+
+    def create_partitions(
+        self, month_from: datetime.date, months: int, conn: orm.Session
+    ) -> typing.List[str]:
+        """
+        Create the missing partitions of a range of months.
+
+        A partition is created as a standalone table, filled with the entries
+        of its month found in the default partition and then attached, so the
+        default partition never holds entries of an attached month.
+
+        Args:
+            month_from (datetime.date): A day of the first month.
+            months (int): Number of months.
+            conn (orm.Session): Database connection.
+
+        Returns:
+            typing.List[str]: Names of the created partitions.
+
+        """
+        partitions = self.get_partitions(conn=conn)
+        created = []
+
+        for month_index in range(months):
+            month = add_months(month_from, month_index)
+            if month not in partitions:
+                created.append(self._create_partition(month=month, conn=conn))
+
+        conn.commit()
+        if created:
+            logger.app_logger.info(f"Created history partitions: {', '.join(created)}")
+
+        return created
+
+    def get_default_months(self, conn: orm.Session) -> typing.List[datetime.date]:
+        """
+        Retrieve the months of the entries held by the default partition.
+
+        Args:
+            conn (orm.Session): Database connection.
+
+        Returns:
+            typing.List[datetime.date]: The first days of the months,
+            in ascending order.
+
+        """
+        result = conn.execute(
+            sqlalchemy.text(
+                "SELECT DISTINCT date_trunc('month', date AT TIME ZONE 'UTC')::date "  # noqa: S608
+                f"FROM {self._default_partition} ORDER BY 1"
+            )
+        )
+
+        return [month for (month,) in result.all()]
+
+    def split_default_partition(self, conn: orm.Session) -> typing.List[str]:
+        """
+        Create the partitions of the months with entries in the default partition.
+
+        Entries written out of the pre-created months, as the backfill of
+        older history does, land in the default partition, where date range
+        queries cannot prune them and expired months cannot be detached.
+        They are moved to the partitions of their months like
+        `create_partitions` does.
+
+        Args:
+            conn (orm.Session): Database connection.
+
+        Returns:
+            typing.List[str]: Names of the created partitions.
+
+        """
+        partitions = self.get_partitions(conn=conn)
+        created = [
+            self._create_partition(month=month, conn=conn)
+            for month in self.get_default_months(conn=conn)
+            if month not in partitions
+        ]
+
+        conn.commit()
+        if created:
+            logger.app_logger.info(
+                f"Moved history out of the default partition: {', '.join(created)}"
+            )
+
+        return created
+
+    def _create_partition(self, month: datetime.date, conn: orm.Session) -> str:
+        """
+        Create the partition of a month with its entries of the default partition.
+
+        The method does not commit, so it runs inside the caller's transaction.
+
+        Args:
+            month (datetime.date): The first day of the month.
+            conn (orm.Session): Database connection.
+
+        Returns:
+            str: Name of the created partition.
+
+        """
+        name = self.get_partition_name(month)
+        start = f"'{month:%Y-%m-%d} 00:00:00+00'"
+        end = f"'{add_months(month, 1):%Y-%m-%d} 00:00:00+00'"
+        in_month = f"date >= {start} AND date < {end}"
+
+        # The identifiers come from the model and the bounds from dates.
+        for statement in (
+            f"CREATE TABLE {name} (LIKE {self._table} "
+            "INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+            f"INSERT INTO {name} SELECT * FROM {self._default_partition} "  # noqa: S608
+            f"WHERE {in_month}",
+            f"DELETE FROM {self._default_partition} WHERE {in_month}",  # noqa: S608
+            f"ALTER TABLE {self._table} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ({start}) TO ({end})",
+        ):
+            conn.execute(sqlalchemy.text(statement))
+
+        return name
+
+    def detach_partitions(
+        self, before: datetime.date, conn: orm.Session, drop: bool = False
+    ) -> typing.List[str]:
+        """
+        Detach the partitions of the months ended before a date.
+
+        A detached partition is a regular table which keeps its entries
+        but is no longer read by the queries of the history table.
+
+        Args:
+            before (datetime.date): The date the months must end before.
+            conn (orm.Session): Database connection.
+            drop (bool): Drop the detached partitions with their entries.
+
+        Returns:
+            typing.List[str]: Names of the detached partitions.
+
+        """
+        detached = []
+        for month, name in sorted(self.get_partitions(conn=conn).items()):
+            if add_months(month, 1) > before:
+                continue
+
+            self._detach(name=name, conn=conn, drop=drop)
+            detached.append(name)
+
+        conn.commit()
+        if detached:
+            logger.app_logger.info(
+                f"{'Dropped' if drop else 'Detached'} history partitions: "
+                f"{', '.join(detached)}"
+            )
+
+        return detached
+
+    def detach_partition(
+        self, month: datetime.date, conn: orm.Session, drop: bool = False
+    ) -> typing.Optional[str]:
+        """
+        Detach the partition of a month, if it exists.
+
+        The method does not commit, so it runs inside the caller's transaction.
+
+        Args:
+            month (datetime.date): A day of the month.
+            conn (orm.Session): Database connection.
+            drop (bool): Drop the detached partition with its entries.
+
+        Returns:
+            typing.Optional[str]: Name of the detached partition, None if the
+            month has no partition.
+
+        """
+        name = self.get_partitions(conn=conn).get(month.replace(day=1))
+        if name is not None:
+            self._detach(name=name, conn=conn, drop=drop)
+
+        return name
+
+    def _detach(self, name: str, conn: orm.Session, drop: bool):
+        """
+        Detach a partition, and drop it if requested, without committing.
+
+        Args:
+            name (str): Name of the partition.
+            conn (orm.Session): Database connection.
+            drop (bool): Drop the detached partition with its entries.
+
+        """
+        conn.execute(
+            sqlalchemy.text(f"ALTER TABLE {self._table} DETACH PARTITION {name}")
+        )
+        if drop:
+            conn.execute(sqlalchemy.text(f"DROP TABLE {name}"))
@@ -11,10 +11,11 @@ SQLite database for isolated and repeatable test runs.
 
 """
 
-from components.currencies import models as currency_models
+from components.currencies import models as currency_models, cache as currency_cache
 import typing
 from components.third_party.national_bank import schemas as national_bank_schemas
 from sqlalchemy import orm
+from sqlalchemy.dialects import postgresql, sqlite
 import sqlalchemy
 
 
@@ -22,9 +23,11 @@ class CurrencyRepostitory:
     def __init__(
         self,
         currency_model: type[currency_models.Currency] = currency_models.Currency,
+        cache: typing.Optional[currency_cache.CurrencyIdCache] = None,
     ):
 
         self._currency_model = currency_model
+        self._cache = cache
 
     def get_or_create(
         self,
@@ -64,3 +67,116 @@ class CurrencyRepostitory:
             conn.add(currency)
             conn.commit()
             return currency, True
+
+    def get_or_create_many(
+        self,
+        currencies_data: typing.Sequence[national_bank_schemas.CurrencyData],
+        conn: orm.Session,
+    ) -> typing.Dict[int, int]:
+        """
+        Resolve currency ids for many currencies at once, creating missing ones.
+
+        Existing currencies are fetched with a single SELECT by code, missing
+        ones are inserted with a single INSERT ... ON CONFLICT (code) DO NOTHING.
+        The method does not commit, so it runs inside the caller's transaction.
+
+        When the repository has a cache, codes found in it are not queried
+        at all and the codes resolved from the database are added to it.
+
+        Args:
+            currencies_data (typing.Sequence): The data for
+            the currencies to get or create.
+            conn (orm.Session): The database session to use for the queries.
+
+        Returns:
+            typing.Dict[int, int]: Mapping of currency code (r030) to currency id.
+
+        """
+        currencies_by_code = {
+            currency_data.r030: currency_data for currency_data in currencies_data
+        }
+        if not currencies_by_code:
+            return {}
+
+        codes_to_ids = {}
+        if self._cache is not None:
+            codes_to_ids = self._cache.get_many(codes=currencies_by_code.keys())
+
+        uncached_codes = currencies_by_code.keys() - codes_to_ids.keys()
+        if not uncached_codes:
+            return codes_to_ids
+
+        resolved_ids = self._select_ids(codes=uncached_codes, conn=conn)
+
+        missing_codes = uncached_codes - resolved_ids.keys()
+        if missing_codes:
+            table = self._currency_model.__table__
+            insert = self._get_insert(conn=conn)(table).values(
+                [
+                    dict(
+                        code=code,
+                        text_code=currencies_by_code[code].cc,
+                        name=currencies_by_code[code].txt,
+                    )
+                    for code in sorted(missing_codes)
+                ]
+            )
+            conn.execute(insert.on_conflict_do_nothing(index_elements=["code"]))
+
+            resolved_ids.update(self._select_ids(codes=missing_codes, conn=conn))
+
+        if self._cache is not None:
+            self._cache.set_many(codes_to_ids=resolved_ids)
+
+        codes_to_ids.update(resolved_ids)
+        return codes_to_ids
+
+    def invalidate_cache(self):
+        """
+        Drop the cached currency ids, if the repository has a cache.
+
+        Must be called when a transaction that may have created currencies
+        is rolled back, so no id of a non-existent row stays cached.
+        """
+        if self._cache is not None:
+            self._cache.invalidate()
+
+    def _select_ids(
+        self,
+        codes: typing.Iterable[int],
+        conn: orm.Session,
+    ) -> typing.Dict[int, int]:
+        """
+        Select currency ids by their codes.
+
+        Args:
+            codes (typing.Iterable[int]): Currency codes (r030) to look up.
+            conn (orm.Session): The database session to use for the query.
+
+        Returns:
+            typing.Dict[int, int]: Mapping of found currency codes to ids.
+
+        """
+        query = sqlalchemy.select(
+            self._currency_model.code, self._currency_model.id
+        ).where(self._currency_model.code.in_(list(codes)))
+        result = conn.execute(query)
+
+        return {code: currency_id for code, currency_id in result.all()}
+
+    @staticmethod
+    def _get_insert(conn: orm.Session) -> typing.Callable:
+        """
+        Return the dialect specific insert construct supporting ON CONFLICT.
+
+        Args:
+            conn (orm.Session): The database session to inspect.
+
+        Returns:
+            typing.Callable: The insert construct of the bound dialect.
+
+        """
+        if conn.get_bind().dialect.name == "sqlite":
+            return sqlite.insert
+
+        return postgresql.insert
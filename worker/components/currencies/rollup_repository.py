@@ -0,0 +1,191 @@
+"""
+Module for maintaining the OHLC rollups of the currency history.
+
+This module contains the `CurrencyRollupRepository` class, which folds
+sampled rates into hourly and daily rollups (open, high, low, close and
+the sum and number of samples the average is computed from) with one
+INSERT ... ON CONFLICT DO UPDATE statement per interval, so the rollups are
+maintained incrementally instead of being recomputed from the history.
+"""
+
+import datetime
+import typing
+
+import sqlalchemy
+from sqlalchemy import orm
+from sqlalchemy.dialects import postgresql, sqlite
+
+from components.currencies import constants, models as currency_models, schemas
+
+RollupModel = typing.Union[
+    type[currency_models.HourlyCurrencyRollup],
+    type[currency_models.DailyCurrencyRollup],
+]
+
+
+def truncate_date(date: datetime.datetime, interval: str) -> datetime.datetime:
+    """
+    Truncate a date to the start of its rollup bucket.
+
+    Args:
+        date (datetime.datetime): The date.
+        interval (str): The interval of the rollup, hour or day.
+
+    Returns:
+        datetime.datetime: The start of the hour or of the day of the date.
+
+    """
+    date = date.replace(minute=0, second=0, microsecond=0)
+    if interval == constants.ROLLUP_DAY:
+        date = date.replace(hour=0)
+
+    return date
+
+
+class CurrencyRollupRepository:
+    def __init__(
+        self,
+        rollup_models: typing.Sequence[RollupModel] = (
+            currency_models.HourlyCurrencyRollup,
+            currency_models.DailyCurrencyRollup,
+        ),
+    ):
+
+        self._rollup_models = rollup_models
+
+    def add_rows(
+        self,
+        rows: typing.Iterable[schemas.HistoryCurrencyRow],
+        conn: orm.Session,
+    ) -> int:
+        """
+        Fold history rows into the rollups of every interval.
+
+        Every row is a sample of the rate of its currency at its date. The
+        samples are first aggregated per bucket in memory, then merged into
+        the stored rollups: the open of an existing bucket is kept, its high
+        and low are widened, its close is replaced and its sum and number
+        of samples are increased. Samples are expected in chronological
+        order. The method does not commit, so it runs inside the caller's
+        transaction.
+
+        Args:
+            rows (typing.Iterable[schemas.HistoryCurrencyRow]): The rows.
+            conn (orm.Session): Database connection.
+
+        Returns:
+            int: Number of written buckets.
+
+        """
+        rows = sorted(rows, key=lambda row: row.date)
+        buckets_count = 0
+
+        for rollup_model in self._rollup_models:
+            buckets = self._aggregate(rows=rows, interval=rollup_model.interval)
+            if buckets:
+                conn.execute(
+                    self._build_upsert(rollup_model=rollup_model, conn=conn),
+                    list(buckets.values()),
+                )
+            buckets_count += len(buckets)
+
+        return buckets_count
+
+    @staticmethod
+    def _aggregate(
+        rows: typing.Sequence[schemas.HistoryCurrencyRow], interval: str
+    ) -> typing.Dict[typing.Tuple[int, str, datetime.datetime], typing.Dict]:
+        """
+        Aggregate chronologically ordered rows per rollup bucket.
+
+        Args:
+            rows (typing.Sequence[schemas.HistoryCurrencyRow]): The rows.
+            interval (str): The interval of the rollup, hour or day.
+
+        Returns:
+            typing.Dict: Mapping of the currency ids, sources and buckets
+            to the values of their rollup.
+
+        """
+        buckets: typing.Dict[typing.Tuple[int, str, datetime.datetime], typing.Dict] = (
+            {}
+        )
+        for row in rows:
+            bucket = truncate_date(row.date, interval=interval)
+            values = buckets.get((row.currency_id, row.source, bucket))
+            if values is None:
+                buckets[(row.currency_id, row.source, bucket)] = dict(
+                    currency_id=row.currency_id,
+                    source=row.source,
+                    bucket=bucket,
+                    open=row.rate,
+                    high=row.rate,
+                    low=row.rate,
+                    close=row.rate,
+                    rate_sum=row.rate,
+                    samples=1,
+                )
+                continue
+
+            values["high"] = max(values["high"], row.rate)
+            values["low"] = min(values["low"], row.rate)
+            values["close"] = row.rate
+            values["rate_sum"] += row.rate
+            values["samples"] += 1
+
+        return buckets
+
+    def _build_upsert(
+        self, rollup_model: RollupModel, conn: orm.Session
+    ) -> sqlalchemy.Insert:
+        """
+        Build the statement merging aggregated buckets into a rollup.
+
+        The statement is executed with the values of many buckets, which
+        the driver sends in batches.
+
+        Args:
+            rollup_model (RollupModel): The model of the rollup.
+            conn (orm.Session): Database connection.
+
+        Returns:
+            sqlalchemy.Insert: The INSERT ... ON CONFLICT DO UPDATE statement.
+
+        """
+        table = rollup_model.__table__
+        insert = self._get_insert(conn=conn)(table)
+        excluded = insert.excluded
+
+        return insert.on_conflict_do_update(
+            index_elements=["currency_id", "source", "bucket"],
+            set_=dict(
+                high=sqlalchemy.case(
+                    (excluded.high > table.c.high, excluded.high),
+                    else_=table.c.high,
+                ),
+                low=sqlalchemy.case(
+                    (excluded.low < table.c.low, excluded.low),
+                    else_=table.c.low,
+                ),
+                close=excluded.close,
+                rate_sum=table.c.rate_sum + excluded.rate_sum,
+                samples=table.c.samples + excluded.samples,
+            ),
+        )
+
+    @staticmethod
+    def _get_insert(conn: orm.Session) -> typing.Callable:
+        """
+        Return the dialect specific insert construct supporting ON CONFLICT.
+
+        Args:
+            conn (orm.Session): Database connection.
+
+        Returns:
+            typing.Callable: The insert construct of the bound dialect.
+
+        """
+        if conn.get_bind().dialect.name == "sqlite":
+            return sqlite.insert
+
+        return postgresql.insert
@@ -0,0 +1,18 @@
+"""
+Module defining lightweight row types
+for writing currency history in bulk.
+"""
+
+import datetime
+import decimal
+import typing
+
+from components.currencies import constants
+
+
+class HistoryCurrencyRow(typing.NamedTuple):
+    currency_id: int
+    rate: decimal.Decimal
+    date: datetime.datetime
+    actualy_end: datetime.datetime
+    source: str = constants.DEFAULT_SOURCE
@@ -0,0 +1,110 @@
+"""
+Module for testing the archival of the currency history.
+
+The tests move the expired months of an in-memory SQLite history
+to Parquet files of a temporary directory and check that the files
+hold every archived entry while the database keeps the recent ones.
+"""
+
+import datetime
+import pathlib
+from decimal import Decimal
+
+import pyarrow.parquet as pq
+
+from components.core.testing_database import create_sqlite_inmemory_session
+from components.currencies import (
+    archive,
+    history_currencies_repository,
+    models as currency_models,
+)
+
+DATES: list[datetime.datetime] = [
+    datetime.datetime(2023, 1, 10),
+    datetime.datetime(2023, 1, 20),
+    datetime.datetime(2023, 3, 5),
+    datetime.datetime(2024, 5, 1),
+]
+
+
+def test_archive_before(tmp_path: pathlib.Path):
+    """
+    Test that expired months are moved to one file per month, except for
+    entries still valid after their month, and that archiving a month again
+    merges its new entries into the file.
+
+    Args:
+        tmp_path (pathlib.Path): Temporary directory of the archive.
+
+    """
+    history_currencies_repo = (
+        history_currencies_repository.HistoryCurrenciesRepository()
+    )
+    history_archive = archive.HistoryArchive(tmp_path)
+
+    with create_sqlite_inmemory_session() as conn:
+        archive_service = archive.HistoryArchiveService(
+            conn=conn,
+            archive=history_archive,
+            history_currencies_repo=history_currencies_repo,
+        )
+        conn.add_all(
+            currency_models.HistoryCurrencies(
+                currency_id=1,
+                rate=Decimal("1.5"),
+                date=date,
+                actualy_end=date + datetime.timedelta(minutes=30),
+                source="nbu",
+            )
+            for date in DATES
+        )
+        conn.add(
+            currency_models.HistoryCurrencies(
+                currency_id=3,
+                rate=Decimal("3.5"),
+                date=datetime.datetime(2023, 3, 6),
+                actualy_end=datetime.datetime(2024, 5, 2),
+                source="nbu",
+            )
+        )
+        conn.commit()
+
+        archived_months = archive_service.archive_before(
+            before=datetime.date(2024, 1, 1)
+        )
+
+        conn.add(
+            currency_models.HistoryCurrencies(
+                currency_id=2,
+                rate=Decimal("2.5"),
+                date=datetime.datetime(2023, 1, 15),
+                actualy_end=datetime.datetime(2023, 1, 16),
+                source="nbu",
+            )
+        )
+        conn.commit()
+        archive_service.archive_before(before=datetime.date(2024, 1, 1))
+
+        remaining_dates = sorted(
+            history_obj.date for history_obj in history_currencies_repo.get_all(conn)
+        )
+
+    january = pq.read_table(history_archive.get_path(datetime.date(2023, 1, 1)))
+    march = pq.read_table(history_archive.get_path(datetime.date(2023, 3, 1)))
+
+    assert archived_months == [datetime.date(2023, 1, 1), datetime.date(2023, 3, 1)]
+    assert remaining_dates == [
+        datetime.datetime(2023, 3, 6),
+        datetime.datetime(2024, 5, 1),
+    ]
+    assert january["currency_id"].to_pylist() == [1, 2, 1]
+    assert january["rate"].to_pylist() == [
+        Decimal("1.50000"),
+        Decimal("2.50000"),
+        Decimal("1.50000"),
+    ]
+    assert march["currency_id"].to_pylist() == [1]
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "history_currencies_2023_01.parquet",
+        "history_currencies_2023_03.parquet",
+    ]
@@ -0,0 +1,136 @@
+"""
+Module for testing the process-local currency id cache.
+
+This module contains tests for the CurrencyIdCache class and for
+the CurrencyRepository working on top of it.
+"""
+
+from components.currencies import cache, repository
+from components.core.testing_database import create_sqlite_inmemory_session
+from components.third_party.national_bank import schemas as national_bank_schemas
+import pytest
+import sqlalchemy
+import typing
+from decimal import Decimal
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """
+        Return the current fake time.
+
+        Returns:
+            float: The current fake time in seconds.
+
+        """
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """
+    Fixture that provides a controllable clock.
+
+    Returns:
+        FakeClock: A clock whose time is set by the test.
+
+    """
+    return FakeClock()
+
+
+@pytest.fixture
+def currencies_data() -> typing.List[national_bank_schemas.CurrencyData]:
+    """
+    Fixture that provides a list of CurrencyData objects for testing.
+
+    Returns:
+        typing.List[national_bank_schemas.CurrencyData]: CurrencyData objects
+        with sample data.
+
+    """
+    return [
+        national_bank_schemas.CurrencyData(
+            r030=36,
+            txt="Австралійський долар",
+            rate=Decimal(26.2832),
+            cc="AUD",
+        ),
+        national_bank_schemas.CurrencyData(
+            r030=124,
+            txt="Канадський долар",
+            rate=Decimal(29.0314),
+            cc="CAD",
+        ),
+    ]
+
+
+def test_cache_expires_entries(clock: FakeClock):
+    """
+    Test that entries are served until their TTL passes.
+
+    Args:
+        clock (FakeClock): The clock driving the cache expiration.
+
+    """
+    currency_id_cache = cache.CurrencyIdCache(ttl=10, clock=clock)
+    currency_id_cache.set_many({36: 1})
+
+    assert currency_id_cache.get_many([36, 124]) == {36: 1}
+
+    clock.now = 10
+    assert currency_id_cache.get_many([36]) == {}
+    assert currency_id_cache.stats() == dict(hits=1, misses=2, size=0)
+
+
+def test_cache_evicts_least_recently_used(clock: FakeClock):
+    """
+    Test that the cache never grows over its maximum size.
+
+    Args:
+        clock (FakeClock): The clock driving the cache expiration.
+
+    """
+    currency_id_cache = cache.CurrencyIdCache(max_size=2, clock=clock)
+    currency_id_cache.set_many({36: 1, 124: 2})
+    currency_id_cache.get_many([36])
+    currency_id_cache.set_many({840: 3})
+
+    assert currency_id_cache.get_many([36, 124, 840]) == {36: 1, 840: 3}
+
+
+def test_repository_steady_state_makes_no_reads(
+    currencies_data: typing.List[national_bank_schemas.CurrencyData],
+    clock: FakeClock,
+):
+    """
+    Test that a warm cache answers get_or_create_many without any query.
+
+    Args:
+        currencies_data (typing.List): The currency data to resolve.
+        clock (FakeClock): The clock driving the cache expiration.
+
+    """
+    currency_repo = repository.CurrencyRepostitory(
+        cache=cache.CurrencyIdCache(clock=clock)
+    )
+
+    with create_sqlite_inmemory_session() as conn:
+        codes_to_ids = currency_repo.get_or_create_many(
+            currencies_data=currencies_data, conn=conn
+        )
+
+        statements = []
+        sqlalchemy.event.listen(
+            conn.get_bind(),
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+
+        assert (
+            currency_repo.get_or_create_many(currencies_data=currencies_data, conn=conn)
+            == codes_to_ids
+        )
+        assert not statements
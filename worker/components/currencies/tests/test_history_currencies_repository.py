@@ -8,11 +8,22 @@ defines test functions to ensure the proper creation and retrieval of
 historical currency entries.
 """
 
-from components.currencies import repository, history_currencies_repository
+import datetime
+
+import sqlalchemy
+
+from components.currencies import (
+    constants,
+    history_currencies_repository,
+    models as currency_models,
+    repository,
+    rollup_repository,
+)
 from components.core.testing_database import create_sqlite_inmemory_session
 from components.third_party.national_bank import schemas as national_bank_schemas
 import pytest
 from decimal import Decimal
+from unittest.mock import patch
 
 
 @pytest.fixture
@@ -124,3 +135,255 @@ def test_get_currencies(
 
         history_currencies_objs = history_currencies_repo.get_all(conn=conn)
         assert history_currencies_objs
+
+
+def test_bulk_create_currencies(
+    currency_data: national_bank_schemas.CurrencyData,
+    currency_repo: repository.CurrencyRepostitory,
+    history_currencies_repo: history_currencies_repository.HistoryCurrenciesRepository,
+):
+    """
+    Test writing historical currency entries in bulk.
+
+    Args:
+        currency_data (national_bank_schemas.CurrencyData): Currency data
+        to be used for testing.
+        currency_repo (repository.CurrencyRepostitory): Currency repository for fetching
+        or creating currencies.
+        history_currencies_repo: Repository for
+        managing historical currency data.
+
+    """
+    with create_sqlite_inmemory_session() as conn:
+        codes_to_ids = currency_repo.get_or_create_many(
+            currencies_data=[currency_data], conn=conn
+        )
+        currency_data.currency_id = codes_to_ids[currency_data.r030]
+
+        rows = history_currencies_repo.build_rows(currencies_data=[currency_data])
+        rows_count = history_currencies_repo.bulk_create_currencies(
+            rows=rows, conn=conn
+        )
+
+        history_currencies_objs = history_currencies_repo.get_all(conn=conn)
+        assert rows_count == len(history_currencies_objs) == 1
+        assert history_currencies_objs[0].currency_id == currency_data.currency_id
+
+
+def test_extend_or_create_currencies(
+    currency_data: national_bank_schemas.CurrencyData,
+    currency_repo: repository.CurrencyRepostitory,
+    history_currencies_repo: history_currencies_repository.HistoryCurrenciesRepository,
+):
+    """
+    Test that unchanged rates extend the open entry instead of inserting a new one.
+
+    Args:
+        currency_data (national_bank_schemas.CurrencyData): Currency data
+        to be used for testing.
+        currency_repo (repository.CurrencyRepostitory): Currency repository for fetching
+        or creating currencies.
+        history_currencies_repo: Repository for
+        managing historical currency data.
+
+    """
+    with create_sqlite_inmemory_session() as conn:
+        currency, is_created = currency_repo.get_or_create(
+            currency_data=currency_data, conn=conn
+        )
+        currency_data.currency_id = currency.id  # type: ignore
+
+        created_objs, extended_count = (
+            history_currencies_repo.extend_or_create_currencies(
+                currencies_data=[currency_data], conn=conn
+            )
+        )
+        assert len(created_objs) == 1 and extended_count == 0
+        first_actualy_end = created_objs[0].actualy_end
+
+        created_objs, extended_count = (
+            history_currencies_repo.extend_or_create_currencies(
+                currencies_data=[currency_data], conn=conn
+            )
+        )
+        assert not created_objs and extended_count == 1
+
+        history_currencies_objs = history_currencies_repo.get_all(conn=conn)
+        assert len(history_currencies_objs) == 1
+        conn.refresh(history_currencies_objs[0])
+        assert history_currencies_objs[0].actualy_end > first_actualy_end
+
+        currency_data.rate += 1
+        created_objs, extended_count = (
+            history_currencies_repo.extend_or_create_currencies(
+                currencies_data=[currency_data], conn=conn
+            )
+        )
+        assert len(created_objs) == 1 and extended_count == 0
+
+        conn.refresh(history_currencies_objs[0])
+        assert history_currencies_objs[0].actualy_end == created_objs[0].date
+
+
+def test_current_rate_follows_writes(
+    currency_data: national_bank_schemas.CurrencyData,
+    currency_repo: repository.CurrencyRepostitory,
+    history_currencies_repo: history_currencies_repository.HistoryCurrenciesRepository,
+):
+    """
+    Test that every write keeps the current rate of the currency up to date,
+    and that writing older history does not replace it.
+
+    Args:
+        currency_data (national_bank_schemas.CurrencyData): Currency data
+        to be used for testing.
+        currency_repo (repository.CurrencyRepostitory): Currency repository for fetching
+        or creating currencies.
+        history_currencies_repo: Repository for
+        managing historical currency data.
+
+    """
+    with create_sqlite_inmemory_session() as conn:
+        codes_to_ids = currency_repo.get_or_create_many(
+            currencies_data=[currency_data], conn=conn
+        )
+        currency_data.currency_id = codes_to_ids[currency_data.r030]
+
+        created_objs, _ = history_currencies_repo.extend_or_create_currencies(
+            currencies_data=[currency_data], conn=conn
+        )
+        history_currencies_repo.extend_or_create_currencies(
+            currencies_data=[currency_data], conn=conn
+        )
+        current_rate = conn.execute(
+            sqlalchemy.select(currency_models.CurrentRate)
+        ).scalar_one()
+        assert current_rate.date == created_objs[0].date
+        assert current_rate.actualy_end > created_objs[0].actualy_end
+
+        currency_data.rate += 1
+        history_currencies_repo.extend_or_create_currencies(
+            currencies_data=[currency_data], conn=conn
+        )
+        history_currencies_repo.bulk_create_currencies(
+            rows=history_currencies_repo.build_rows(
+                currencies_data=[currency_data], date=datetime.datetime(2020, 1, 1)
+            ),
+            conn=conn,
+        )
+        conn.commit()
+
+        conn.refresh(current_rate)
+        assert current_rate.rate == round(currency_data.rate, 5)
+        assert current_rate.date > created_objs[0].date
+
+
+def test_current_rate_per_source(
+    currency_data: national_bank_schemas.CurrencyData,
+    currency_repo: repository.CurrencyRepostitory,
+    history_currencies_repo: history_currencies_repository.HistoryCurrenciesRepository,
+):
+    """
+    Test that every source keeps its own current rate of a currency,
+    which the writes of other sources neither replace nor extend.
+
+    Args:
+        currency_data (national_bank_schemas.CurrencyData): Currency data
+        to be used for testing.
+        currency_repo (repository.CurrencyRepostitory): Currency repository for fetching
+        or creating currencies.
+        history_currencies_repo: Repository for
+        managing historical currency data.
+
+    """
+    with create_sqlite_inmemory_session() as conn:
+        codes_to_ids = currency_repo.get_or_create_many(
+            currencies_data=[currency_data], conn=conn
+        )
+        currency_data.currency_id = codes_to_ids[currency_data.r030]
+
+        history_currencies_repo.extend_or_create_currencies(
+            currencies_data=[currency_data], conn=conn
+        )
+        currency_data.rate += 1
+        history_currencies_repo.extend_or_create_currencies(
+            currencies_data=[currency_data], conn=conn, source="other"
+        )
+        current_rates = {
+            current_rate.source: current_rate
+            for current_rate in conn.execute(
+                sqlalchemy.select(currency_models.CurrentRate)
+            ).scalars()
+        }
+        assert set(current_rates) == {constants.DEFAULT_SOURCE, "other"}
+        assert current_rates["other"].rate == round(currency_data.rate, 5)
+        assert current_rates[constants.DEFAULT_SOURCE].rate == round(
+            currency_data.rate - 1, 5
+        )
+
+        actualy_end = current_rates[constants.DEFAULT_SOURCE].actualy_end
+        history_currencies_repo.extend_or_create_currencies(
+            currencies_data=[currency_data], conn=conn, source="other"
+        )
+        conn.commit()
+
+        conn.refresh(current_rates[constants.DEFAULT_SOURCE])
+        conn.refresh(current_rates["other"])
+        assert current_rates[constants.DEFAULT_SOURCE].actualy_end == actualy_end
+        assert current_rates["other"].actualy_end > actualy_end
+
+
+def test_rollups_follow_writes(
+    currency_data: national_bank_schemas.CurrencyData,
+    currency_repo: repository.CurrencyRepostitory,
+):
+    """
+    Test that the stored rates are sampled into the rollups at their date,
+    and that the history is not written when the rollups fail.
+
+    Args:
+        currency_data (national_bank_schemas.CurrencyData): Currency data
+        to be used for testing.
+        currency_repo (repository.CurrencyRepostitory): Currency repository for fetching
+        or creating currencies.
+
+    """
+    history_currencies_repo = history_currencies_repository.HistoryCurrenciesRepository(
+        rollup_repo=rollup_repository.CurrencyRollupRepository()
+    )
+
+    with create_sqlite_inmemory_session() as conn:
+        codes_to_ids = currency_repo.get_or_create_many(
+            currencies_data=[currency_data], conn=conn
+        )
+        currency_data.currency_id = codes_to_ids[currency_data.r030]
+
+        created_objs, _ = history_currencies_repo.extend_or_create_currencies(
+            currencies_data=[currency_data], conn=conn
+        )
+        history_currencies_repo.extend_or_create_currencies(
+            currencies_data=[currency_data], conn=conn
+        )
+        rollup = conn.execute(
+            sqlalchemy.select(currency_models.HourlyCurrencyRollup)
+        ).scalar_one()
+        assert rollup.samples == 2
+        assert rollup.open == round(currency_data.rate, 5)
+        assert rollup.bucket == rollup_repository.truncate_date(
+            created_objs[0].date, interval=constants.ROLLUP_HOUR
+        )
+
+        with patch.object(
+            rollup_repository.CurrencyRollupRepository,
+            "add_rows",
+            side_effect=RuntimeError("rollup failed"),
+        ):
+            with pytest.raises(RuntimeError):
+                history_currencies_repo.create_currencies(
+                    currencies_data=[currency_data], conn=conn
+                )
+        conn.rollback()
+
+        assert len(history_currencies_repo.get_all(conn=conn)) == 1
+        conn.refresh(rollup)
+        assert rollup.samples == 2
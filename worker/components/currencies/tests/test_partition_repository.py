@@ -0,0 +1,207 @@
+"""
+Module for testing the partition repository of the currency history.
+Partitions only exist on PostgreSQL, so the tests moving entries between
+partitions run on the database of TEST_POSTGRES_URL, in a throwaway schema,
+and are skipped without it. The other tests cover the month arithmetic
+and the detection of a non-partitioned history table.
+"""
+
+import datetime
+import decimal
+import os
+import typing
+
+import pytest
+import sqlalchemy
+from sqlalchemy import orm
+
+from components.core import database
+from components.core.testing_database import (
+    create_postgres_session,
+    create_sqlite_inmemory_session,
+)
+from components.currencies import models as currency_models, partition_repository
+
+TEST_POSTGRES_URL: str = os.environ.get("TEST_POSTGRES_URL", "")
+PARTITIONED_HISTORY_DDL: typing.Tuple[str, ...] = (
+    "CREATE TABLE history_currencies ("
+    "id bigint GENERATED BY DEFAULT AS IDENTITY, "
+    "rate numeric(10, 5) NOT NULL, "
+    "date timestamp with time zone NOT NULL, "
+    "actualy_end timestamp with time zone NOT NULL, "
+    "currency_id integer NOT NULL REFERENCES currency (id), "
+    "source varchar(32) NOT NULL, "
+    "PRIMARY KEY (id, date)"
+    ") PARTITION BY RANGE (date)",
+    "CREATE TABLE history_currencies_default PARTITION OF history_currencies DEFAULT",
+)
+MARCH: datetime.date = datetime.date(2024, 3, 1)
+APRIL: datetime.date = datetime.date(2024, 4, 1)
+
+
+@pytest.fixture
+def postgres_conn() -> typing.Iterator[orm.Session]:
+    """
+    Fixture providing a PostgreSQL session with a partitioned history table,
+    holding two entries of March and one of April in its default partition.
+
+    Yields:
+        orm.Session: The session.
+
+    """
+    if not TEST_POSTGRES_URL.startswith("postgresql"):
+        pytest.skip("TEST_POSTGRES_URL is not a PostgreSQL database")
+
+    tables = [
+        table
+        for table in database.Base.metadata.sorted_tables
+        if table.name != currency_models.HistoryCurrencies.__tablename__
+    ]
+    with create_postgres_session(url=TEST_POSTGRES_URL, tables=tables) as conn:
+        for statement in PARTITIONED_HISTORY_DDL:
+            conn.execute(sqlalchemy.text(statement))
+
+        currency = currency_models.Currency(code=36, text_code="AUD", name="AUD")
+        conn.add(currency)
+        conn.flush()
+        dates = [
+            datetime.datetime(2024, 3, 1, tzinfo=datetime.timezone.utc),
+            datetime.datetime(2024, 3, 31, 23, tzinfo=datetime.timezone.utc),
+            datetime.datetime(2024, 4, 15, tzinfo=datetime.timezone.utc),
+        ]
+        conn.execute(
+            sqlalchemy.insert(currency_models.HistoryCurrencies.__table__),
+            [
+                dict(
+                    currency_id=currency.id,
+                    rate=decimal.Decimal(index + 1),
+                    date=date,
+                    actualy_end=date + datetime.timedelta(hours=1),
+                    source="nbu",
+                )
+                for index, date in enumerate(dates)
+            ],
+        )
+        conn.commit()
+
+        yield conn
+
+
+def count_entries(conn: orm.Session, table: str) -> int:
+    """
+    Count the entries of a table.
+
+    Args:
+        conn (orm.Session): Database connection.
+        table (str): Name of the table.
+
+    Returns:
+        int: Number of entries.
+
+    """
+    return conn.execute(
+        sqlalchemy.text(f"SELECT count(*) FROM {table}")  # noqa: S608
+    ).scalar_one()
+
+
+@pytest.mark.parametrize(
+    "month, months, expected",
+    [
+        (datetime.date(2024, 5, 17), 0, datetime.date(2024, 5, 1)),
+        (datetime.date(2024, 11, 1), 3, datetime.date(2025, 2, 1)),
+        (datetime.date(2024, 1, 31), -1, datetime.date(2023, 12, 1)),
+        (datetime.date(2024, 3, 1), -14, datetime.date(2023, 1, 1)),
+    ],
+)
+def test_add_months(month: datetime.date, months: int, expected: datetime.date):
+    """
+    Test that add_months returns the first day of the shifted month.
+
+    Args:
+        month (datetime.date): A day of the reference month.
+        months (int): Number of months to add.
+        expected (datetime.date): The expected month.
+
+    """
+    assert partition_repository.add_months(month, months) == expected
+
+
+def test_get_partition_name():
+    """Test that a partition is named after the table and its month."""
+    partition_repo = partition_repository.HistoryPartitionRepository()
+
+    name = partition_repo.get_partition_name(datetime.date(2024, 3, 15))
+
+    assert name == "history_currencies_p2024_03"
+
+
+def test_is_partitioned_without_postgres():
+    """Test that the history table is never partitioned outside PostgreSQL."""
+    partition_repo = partition_repository.HistoryPartitionRepository()
+
+    with create_sqlite_inmemory_session() as conn:
+        assert not partition_repo.is_partitioned(conn=conn)
+
+
+def test_create_partitions_moves_default_entries(postgres_conn: orm.Session):
+    """
+    Test that created partitions take over the entries of their months
+    from the default partition.
+
+    Args:
+        postgres_conn (orm.Session): PostgreSQL session.
+
+    """
+    partition_repo = partition_repository.HistoryPartitionRepository()
+    assert partition_repo.is_partitioned(conn=postgres_conn)
+
+    created = partition_repo.create_partitions(
+        month_from=MARCH, months=1, conn=postgres_conn
+    )
+
+    assert created == ["history_currencies_p2024_03"]
+    assert count_entries(postgres_conn, "history_currencies_p2024_03") == 2
+    assert count_entries(postgres_conn, "history_currencies_default") == 1
+
+    assert partition_repo.split_default_partition(conn=postgres_conn) == [
+        "history_currencies_p2024_04"
+    ]
+    assert partition_repo.split_default_partition(conn=postgres_conn) == []
+    assert count_entries(postgres_conn, "history_currencies_p2024_04") == 1
+    assert count_entries(postgres_conn, "history_currencies_default") == 0
+    assert count_entries(postgres_conn, "history_currencies") == 3
+    assert partition_repo.get_partitions(conn=postgres_conn) == {
+        MARCH: "history_currencies_p2024_03",
+        APRIL: "history_currencies_p2024_04",
+    }
+
+
+def test_detach_partitions(postgres_conn: orm.Session):
+    """
+    Test that the entries of detached months are no longer read through
+    the history table, and that dropped partitions are removed.
+
+    Args:
+        postgres_conn (orm.Session): PostgreSQL session.
+
+    """
+    partition_repo = partition_repository.HistoryPartitionRepository()
+    partition_repo.split_default_partition(conn=postgres_conn)
+
+    assert partition_repo.detach_partitions(before=APRIL, conn=postgres_conn) == [
+        "history_currencies_p2024_03"
+    ]
+    assert count_entries(postgres_conn, "history_currencies") == 1
+    assert count_entries(postgres_conn, "history_currencies_p2024_03") == 2
+
+    assert partition_repo.detach_partitions(
+        before=datetime.date(2024, 5, 1), conn=postgres_conn, drop=True
+    ) == ["history_currencies_p2024_04"]
+    assert count_entries(postgres_conn, "history_currencies") == 0
+    assert (
+        postgres_conn.execute(
+            sqlalchemy.text("SELECT to_regclass('history_currencies_p2024_04')")
+        ).scalar()
+        is None
+    )
+    assert partition_repo.get_partitions(conn=postgres_conn) == {}
@@ -74,3 +74,48 @@ def test_get_or_create_currencies(
             currency_data=currency_data, conn=conn
         )
         assert currencies_objs and not is_created
+
+
+def test_get_or_create_many_currencies(
+    currency_data: national_bank_schemas.CurrencyData,
+    currency_repo: repository.CurrencyRepostitory,
+):
+    """
+    Test for the get_or_create_many method of CurrencyRepository.
+
+    Args:
+        currency_data (national_bank_schemas.CurrencyData): The currency data
+        to test with.
+        currency_repo (repository.CurrencyRepostitory): The currency repository
+        to test with.
+
+    Asserts:
+        bool: Every currency code is resolved to an id.
+        bool: Existing currencies keep their ids and are not created again.
+
+    """
+    other_currency_data = national_bank_schemas.CurrencyData(
+        r030=124,
+        txt="Канадський долар",
+        rate=Decimal(29.0314),
+        cc="CAD",
+    )
+
+    with create_sqlite_inmemory_session() as conn:
+        currency, is_created = currency_repo.get_or_create(
+            currency_data=currency_data, conn=conn
+        )
+
+        codes_to_ids = currency_repo.get_or_create_many(
+            currencies_data=[currency_data, other_currency_data], conn=conn
+        )
+
+        assert codes_to_ids[currency_data.r030] == currency.id
+        assert codes_to_ids[other_currency_data.r030]
+
+        assert (
+            currency_repo.get_or_create_many(
+                currencies_data=[currency_data, other_currency_data], conn=conn
+            )
+            == codes_to_ids
+        )
@@ -0,0 +1,114 @@
+"""
+Module for testing the rollup repository of the currency history.
+
+The tests fold samples into the hourly and daily rollups of an in-memory
+SQLite database in several calls and check that the stored open, high,
+low, close, sum and number of samples match the samples.
+"""
+
+import datetime
+from decimal import Decimal
+
+import pytest
+import sqlalchemy
+
+from components.core.testing_database import create_sqlite_inmemory_session
+from components.currencies import (
+    models as currency_models,
+    rollup_repository,
+    schemas,
+)
+
+DATE: datetime.datetime = datetime.datetime(2024, 5, 1, 10, 15)
+
+
+def build_row(currency_id: int, rate: str, minutes: int) -> schemas.HistoryCurrencyRow:
+    """
+    Build a sample of a rate.
+
+    Args:
+        currency_id (int): Id of the currency.
+        rate (str): The rate.
+        minutes (int): Minutes from DATE to the sample.
+
+    Returns:
+        schemas.HistoryCurrencyRow: The sample.
+
+    """
+    date = DATE + datetime.timedelta(minutes=minutes)
+
+    return schemas.HistoryCurrencyRow(
+        currency_id=currency_id,
+        rate=Decimal(rate),
+        date=date,
+        actualy_end=date + datetime.timedelta(minutes=30),
+    )
+
+
+@pytest.mark.parametrize(
+    "interval, expected",
+    [
+        ("hour", datetime.datetime(2024, 5, 1, 10)),
+        ("day", datetime.datetime(2024, 5, 1)),
+    ],
+)
+def test_truncate_date(interval: str, expected: datetime.datetime):
+    """
+    Test that dates are truncated to the start of their bucket.
+
+    Args:
+        interval (str): The interval of the rollup.
+        expected (datetime.datetime): The expected bucket.
+
+    """
+    assert rollup_repository.truncate_date(DATE, interval=interval) == expected
+
+
+def test_add_rows():
+    """Test that samples of several calls are merged into the rollups."""
+    rollup_repo = rollup_repository.CurrencyRollupRepository()
+
+    with create_sqlite_inmemory_session() as conn:
+        buckets_count = rollup_repo.add_rows(
+            rows=[
+                build_row(currency_id=1, rate="2.5", minutes=0),
+                build_row(currency_id=1, rate="3.0", minutes=15),
+                build_row(currency_id=2, rate="7.0", minutes=0),
+            ],
+            conn=conn,
+        )
+        rollup_repo.add_rows(
+            rows=[
+                build_row(currency_id=1, rate="1.5", minutes=30),
+                build_row(currency_id=1, rate="2.0", minutes=60),
+            ],
+            conn=conn,
+        )
+        conn.commit()
+
+        hourly = conn.execute(
+            sqlalchemy.select(currency_models.HourlyCurrencyRollup)
+            .where(currency_models.HourlyCurrencyRollup.currency_id == 1)
+            .order_by(currency_models.HourlyCurrencyRollup.bucket)
+        ).scalars()
+        daily = conn.execute(
+            sqlalchemy.select(currency_models.DailyCurrencyRollup).where(
+                currency_models.DailyCurrencyRollup.currency_id == 1
+            )
+        ).scalar_one()
+
+        assert buckets_count == 4
+        assert [
+            (rollup.open, rollup.high, rollup.low, rollup.close, rollup.samples)
+            for rollup in hourly
+        ] == [
+            (Decimal("2.5"), Decimal("3.0"), Decimal("1.5"), Decimal("1.5"), 3),
+            (Decimal("2.0"), Decimal("2.0"), Decimal("2.0"), Decimal("2.0"), 1),
+        ]
+        assert (daily.open, daily.high, daily.low, daily.close) == (
+            Decimal("2.5"),
+            Decimal("3.0"),
+            Decimal("1.5"),
+            Decimal("2.0"),
+        )
+        assert daily.rate_sum / daily.samples == Decimal("2.25")
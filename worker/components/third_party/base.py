@@ -0,0 +1,110 @@
+"""
+Module defining the interface of rate providers and their registry.
+
+A provider knows where its rates are published and how to parse
+its payload, while fetching is shared by all of them, so the worker
+can query every configured provider concurrently. Providers are
+registered under their source name, which tags the history entries
+written from their rates.
+"""
+
+import abc
+import typing
+
+from components.third_party.national_bank import schemas as national_bank_schemas
+
+
+class BaseProvider(abc.ABC):
+    source: typing.ClassVar[str]
+
+    def __init__(self, url: str, timeout: float):
+        """
+        Initializes a provider.
+
+        Args:
+            url (str): URL of the current rates.
+            timeout (float): Number of seconds the provider may take
+            to answer, retries included.
+
+        """
+        self.url = url
+        self.timeout = timeout
+
+    @abc.abstractmethod
+    def parse(
+        self, content: typing.Union[str, bytes]
+    ) -> typing.List[national_bank_schemas.CurrencyData]:
+        """
+        Parse the payload of the provider.
+
+        Args:
+            content (Union[str, bytes]): The payload.
+
+        Returns:
+            List[national_bank_schemas.CurrencyData]: The parsed rates.
+
+        """
+
+
+ProviderClass = typing.TypeVar("ProviderClass", bound=typing.Type[BaseProvider])
+
+
+class ProviderRegistry:
+    def __init__(self):
+        """Initializes an empty ProviderRegistry instance."""
+        self._providers: typing.Dict[str, typing.Type[BaseProvider]] = {}
+
+    def register(self, provider_class: ProviderClass) -> ProviderClass:
+        """
+        Register a provider class under its source name.
+
+        Args:
+            provider_class (Type[BaseProvider]): The provider class.
+
+        Returns:
+            Type[BaseProvider]: The provider class, so the method
+            can be used as a decorator.
+
+        Raises:
+            ValueError: If the source name is already registered.
+
+        """
+        if provider_class.source in self._providers:
+            raise ValueError(f"Provider {provider_class.source} is already registered")
+
+        self._providers[provider_class.source] = provider_class
+        return provider_class
+
+    def get_sources(self) -> typing.List[str]:
+        """
+        Retrieve the source names of the registered providers.
+
+        Returns:
+            List[str]: The source names.
+
+        """
+        return list(self._providers)
+
+    def create_providers(
+        self, sources: typing.Iterable[str]
+    ) -> typing.List[BaseProvider]:
+        """
+        Create the providers of the given sources with their default settings.
+
+        Args:
+            sources (Iterable[str]): The source names.
+
+        Returns:
+            List[BaseProvider]: The providers, in the order of the sources.
+
+        Raises:
+            ValueError: If a source name is not registered.
+
+        """
+        unknown_sources = [
+            source for source in sources if source not in self._providers
+        ]
+        if unknown_sources:
+            raise ValueError(f"Unknown rate providers: {', '.join(unknown_sources)}")
+
+        return [self._providers[source]() for source in sources]
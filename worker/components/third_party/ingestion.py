@@ -0,0 +1,538 @@
+"""
+Module defining the RatesIngestionService class, which fetches the rates
+of many providers concurrently and stores them in the currency history.
+
+Every provider is fetched within its own timeout budget and the overall
+deadline of the poll, so a slow provider neither delays nor fails the others,
+and a poll takes as long as its slowest provider instead of the sum of all
+of them. Providers whose circuit is open are not called at all. The rates
+of every provider are stored in their own transaction, tagged with the
+provider's source and folded into the hourly and daily rollups of the
+history in that same transaction. Every stage of a poll is measured in
+`components.core.metrics`. Once rates are stored, the version of the
+currency data is bumped, which invalidates the responses cached by the API.
+"""
+
+import asyncio
+import time
+import typing
+
+from sqlalchemy import orm
+
+from components.core import (
+    circuit_breaker as provider_circuit_breaker,
+    config,
+    data_version as currency_data_version,
+    fingerprint as payload_fingerprint,
+    http_client,
+    lock,
+    logger,
+    metrics,
+)
+from components.currencies import (
+    cache as currency_cache,
+    history_currencies_repository,
+    repository as currency_repository,
+)
+from components.third_party import base
+from components.third_party.national_bank import schemas as national_bank_schemas
+
+cnfg = config.config
+
+
+class RatesIngestionService:
+    def __init__(
+        self,
+        conn: orm.Session,
+        providers: typing.Sequence[base.BaseProvider],
+        history_currencies_repo: history_currencies_repository.HistoryCurrenciesRepository = history_currencies_repository.HistoryCurrenciesRepository(),  # noqa: E501
+        currency_repo: currency_repository.CurrencyRepostitory = currency_repository.CurrencyRepostitory(  # noqa: E501
+            cache=currency_cache.currency_id_cache
+        ),
+        fetcher: typing.Optional[http_client.AsyncFetcher] = None,
+        fingerprint_store: typing.Optional[
+            payload_fingerprint.PayloadFingerprintStore
+        ] = None,
+        lease: typing.Optional[lock.Lease] = None,
+        circuit_breaker: typing.Optional[
+            provider_circuit_breaker.CircuitBreaker
+        ] = None,
+        deadline: float = cnfg.INGESTION_DEADLINE,
+        data_version: typing.Optional[currency_data_version.DataVersion] = None,
+    ):
+        """
+        Initializes a RatesIngestionService instance.
+
+        Args:
+            conn (orm.Session): Database connection.
+            providers (Sequence[base.BaseProvider]): The providers to poll.
+            history_currencies_repo (HistoryCurrenciesRepository): Repository
+            of the currency history.
+            currency_repo (CurrencyRepostitory): Repository of the currencies.
+            fetcher (Optional[http_client.AsyncFetcher]): The HTTP fetcher,
+            the process-wide one by default.
+            fingerprint_store (Optional[PayloadFingerprintStore]): Store of
+            the last payloads, which enables skipping unchanged polls.
+            lease (Optional[lock.Lease]): Lease the poll runs under.
+            circuit_breaker (Optional[CircuitBreaker]): Breaker of
+            the circuits of the providers, named by their source.
+            deadline (float): Number of seconds all providers
+            may take to answer, retries included.
+            data_version (Optional[DataVersion]): Version of the currency
+            data, bumped after a poll which stored rates.
+
+        """
+        self._conn = conn
+        self._providers = providers
+        self._history_currencies_repo: (
+            history_currencies_repository.HistoryCurrenciesRepository
+        ) = history_currencies_repo
+        self._currency_repo: currency_repository.CurrencyRepostitory = currency_repo
+        self._fetcher: http_client.AsyncFetcher = (
+            fetcher or http_client.AsyncFetcher.get_fetcher()
+        )
+        self._fingerprint_store: typing.Optional[
+            payload_fingerprint.PayloadFingerprintStore
+        ] = fingerprint_store
+        self._lease: typing.Optional[lock.Lease] = lease
+        self._circuit_breaker: typing.Optional[
+            provider_circuit_breaker.CircuitBreaker
+        ] = circuit_breaker
+        self._deadline = deadline
+        self._data_version: typing.Optional[currency_data_version.DataVersion] = (
+            data_version
+        )
+
+    def save_currencies_data(self, bulk: bool = False, compact: bool = True):
+        """
+        Poll every provider and store its rates.
+
+        All providers whose circuit is not open are fetched concurrently
+        first and the outcome of every call is recorded by the circuit
+        breaker. Then the rates of every provider are stored in turn,
+        so an error of one provider is logged and does not prevent
+        storing the rates of the others.
+
+        With a fingerprint store, the requests are conditional and a payload
+        equal to the last stored one of the provider is neither parsed
+        nor written: the validity of the current entries of the provider is
+        extended with a single statement and the poll is counted as skipped.
+
+        Either way, the stored or extended rates are sampled into the hourly
+        and daily rollups of the history in the transaction of the write,
+        and once the rates of at least one
+        provider are stored the version of the currency data is bumped.
+
+        Args:
+            bulk (bool): Write the history with `bulk_create_currencies`,
+            skipping ORM objects.
+            compact (bool): Unless `bulk` is set, write the history with
+            `extend_or_create_currencies`, which extends the entries of
+            unchanged rates, instead of `create_currencies`.
+
+        Raises:
+            lock.LeaseLostError: If the lease of the poll was lost.
+
+        """
+        providers = [
+            provider
+            for provider in self._providers
+            if self._circuit_breaker is None
+            or self._circuit_breaker.allow_request(name=provider.source)
+        ]
+        fingerprints = [
+            self._get_fingerprint(provider=provider) for provider in providers
+        ]
+
+        started_at = time.perf_counter()
+        deadline = time.monotonic() + self._deadline
+        with metrics.track_stage(stage="fetch"):
+            results = self.fetch_all(
+                providers=providers, fingerprints=fingerprints, deadline=deadline
+            )
+        logger.app_logger.info(
+            f"Fetched {len(providers)} providers "
+            f"in {time.perf_counter() - started_at:.3f}s"
+        )
+
+        stored_count = 0
+        for provider, fingerprint, result in zip(providers, fingerprints, results):
+            self._record_result(provider=provider, result=result)
+            try:
+                stored_count += self._save_result(
+                    provider=provider,
+                    fingerprint=fingerprint,
+                    result=result,
+                    deadline=deadline,
+                    bulk=bulk,
+                    compact=compact,
+                )
+            except lock.LeaseLostError:
+                raise
+            except Exception:
+                logger.app_logger.exception(
+                    f"Storing the rates of provider {provider.source} failed"
+                )
+
+        if stored_count:
+            self._bump_data_version()
+
+    def fetch_all(
+        self,
+        providers: typing.Sequence[base.BaseProvider],
+        fingerprints: typing.Sequence[
+            typing.Optional[payload_fingerprint.PayloadFingerprint]
+        ],
+        deadline: typing.Optional[float] = None,
+    ) -> typing.List[http_client.FetchResult]:
+        """
+        Fetch the current rates of many providers concurrently.
+
+        Args:
+            providers (Sequence[base.BaseProvider]): The providers.
+            fingerprints (Sequence[Optional[PayloadFingerprint]]): The
+            fingerprints of the last stored payloads, in the order
+            of the providers.
+            deadline (Optional[float]): Time of the `time.monotonic` clock
+            after which the poll gives up, `deadline` seconds from now
+            by default.
+
+        Returns:
+            List[http_client.FetchResult]: The responses,
+            in the order of the providers.
+
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self._deadline
+
+        return self._fetcher.run(
+            self._fetch_all(
+                providers=providers, fingerprints=fingerprints, deadline=deadline
+            )
+        )
+
+    async def _fetch_all(
+        self,
+        providers: typing.Sequence[base.BaseProvider],
+        fingerprints: typing.Sequence[
+            typing.Optional[payload_fingerprint.PayloadFingerprint]
+        ],
+        deadline: float,
+    ) -> typing.List[http_client.FetchResult]:
+        """
+        Fetch the current rates of many providers concurrently.
+
+        Args:
+            providers (Sequence[base.BaseProvider]): The providers.
+            fingerprints (Sequence[Optional[PayloadFingerprint]]): The
+            fingerprints of the last stored payloads.
+            deadline (float): Time of the `time.monotonic` clock
+            after which the poll gives up.
+
+        Returns:
+            List[http_client.FetchResult]: The responses.
+
+        """
+        return list(
+            await asyncio.gather(
+                *(
+                    self._fetch(
+                        provider=provider,
+                        headers=fingerprint.get_validators() if fingerprint else None,
+                        deadline=deadline,
+                    )
+                    for provider, fingerprint in zip(providers, fingerprints)
+                )
+            )
+        )
+
+    async def _fetch(
+        self,
+        provider: base.BaseProvider,
+        deadline: float,
+        headers: typing.Optional[typing.Mapping[str, str]] = None,
+    ) -> http_client.FetchResult:
+        """
+        Fetch the current rates of a provider within its timeout budget.
+
+        The budget is the timeout of the provider, cut short by the deadline
+        of the poll, and bounds the whole fetch, retries included.
+
+        Args:
+            provider (base.BaseProvider): The provider.
+            deadline (float): Time of the `time.monotonic` clock
+            after which the poll gives up.
+            headers (Optional[Mapping[str, str]]): Extra request headers.
+
+        Returns:
+            http_client.FetchResult: The response, or the error.
+
+        """
+        started_at = time.perf_counter()
+        budget = min(provider.timeout, deadline - time.monotonic())
+        try:
+            result = await asyncio.wait_for(
+                self._fetcher.fetch(
+                    url=provider.url,
+                    headers=headers,
+                    timeout=provider.timeout,
+                    deadline=time.monotonic() + budget,
+                ),
+                timeout=budget,
+            )
+        except asyncio.TimeoutError:
+            result = http_client.FetchResult(
+                url=provider.url,
+                error=f"TimeoutError: timed out after {budget:.3f}s",
+            )
+
+        logger.app_logger.info(
+            f"Fetched provider {provider.source} "
+            f"in {time.perf_counter() - started_at:.3f}s"
+        )
+
+        return result
+
+    def _record_result(
+        self, provider: base.BaseProvider, result: http_client.FetchResult
+    ):
+        """
+        Record the outcome of a call to a provider in its circuit.
+
+        Args:
+            provider (base.BaseProvider): The provider.
+            result (http_client.FetchResult): The response.
+
+        """
+        if self._circuit_breaker is None:
+            return
+
+        if result.ok:
+            self._circuit_breaker.record_success(name=provider.source)
+        else:
+            self._circuit_breaker.record_failure(name=provider.source)
+
+    def _get_fingerprint(
+        self, provider: base.BaseProvider
+    ) -> typing.Optional[payload_fingerprint.PayloadFingerprint]:
+        """
+        Retrieve the fingerprint of the last stored payload of a provider.
+
+        Args:
+            provider (base.BaseProvider): The provider.
+
+        Returns:
+            Optional[PayloadFingerprint]: The fingerprint, if any.
+
+        """
+        if self._fingerprint_store is None:
+            return None
+
+        return self._fingerprint_store.get(url=provider.url)
+
+    def _save_result(
+        self,
+        provider: base.BaseProvider,
+        fingerprint: typing.Optional[payload_fingerprint.PayloadFingerprint],
+        result: http_client.FetchResult,
+        deadline: float,
+        bulk: bool,
+        compact: bool,
+    ) -> bool:
+        """
+        Store the rates of a provider's response.
+
+        A 304 Not Modified answer with no current entries left to extend
+        is fetched again unconditionally, within what is left of the deadline
+        of the poll, and the outcome is recorded by the circuit breaker.
+
+        Args:
+            provider (base.BaseProvider): The provider.
+            fingerprint (Optional[PayloadFingerprint]): The fingerprint
+            of the last stored payload of the provider.
+            result (http_client.FetchResult): The response.
+            deadline (float): Time of the `time.monotonic` clock
+            after which the poll gives up.
+            bulk (bool): Write the history with `bulk_create_currencies`.
+            compact (bool): Write the history with `extend_or_create_currencies`.
+
+        Returns:
+            bool: True if rates were stored or extended.
+
+        """
+        if not result.ok:
+            self._record_fetch_failure(result=result)
+            return False
+
+        metrics.payload_bytes.labels(source=provider.source).observe(
+            len(result.content)
+        )
+        if self._fingerprint_store is not None and (
+            self._fingerprint_store.is_unchanged(result=result, fingerprint=fingerprint)
+        ):
+            self._ensure_lease()
+            with metrics.track_stage(stage="write"):
+                extended_rows = self._history_currencies_repo.extend_open_currencies(
+                    conn=self._conn, source=provider.source
+                )
+            if extended_rows:
+                self._fingerprint_store.record_skip(url=result.url)
+                return True
+
+            if result.status_code == 304:
+                with metrics.track_stage(stage="fetch"):
+                    result = self._fetcher.run(
+                        self._fetch(provider=provider, deadline=deadline)
+                    )
+                self._record_result(provider=provider, result=result)
+                if not result.ok:
+                    self._record_fetch_failure(result=result)
+                    return False
+
+        with metrics.track_stage(stage="parse"):
+            currencies_data = provider.parse(content=result.content)
+        self._ensure_lease()
+        self._store_currencies(
+            currencies_data=currencies_data,
+            source=provider.source,
+            bulk=bulk,
+            compact=compact,
+        )
+
+        if self._fingerprint_store is not None:
+            self._fingerprint_store.save(result=result)
+
+        return True
+
+    def _store_currencies(
+        self,
+        currencies_data: typing.List[national_bank_schemas.CurrencyData],
+        source: str,
+        bulk: bool,
+        compact: bool,
+    ):
+        """
+        Store parsed currencies data in a single transaction.
+
+        Args:
+            currencies_data (List[national_bank_schemas.CurrencyData]): The
+            parsed currencies data.
+            source (str): Source of the rates.
+            bulk (bool): Write the history with `bulk_create_currencies`.
+            compact (bool): Write the history with `extend_or_create_currencies`.
+
+        """
+        try:
+            with metrics.track_stage(stage="resolve"):
+                codes_to_ids = self._currency_repo.get_or_create_many(
+                    currencies_data=currencies_data, conn=self._conn
+                )
+            for currency_data in currencies_data:
+                currency_data.currency_id = codes_to_ids[currency_data.r030]
+
+            with metrics.track_stage(stage="write"):
+                rows_count = self._write_currencies(
+                    currencies_data=currencies_data,
+                    source=source,
+                    bulk=bulk,
+                    compact=compact,
+                )
+        except Exception:
+            self._conn.rollback()
+            self._currency_repo.invalidate_cache()
+            raise
+
+        metrics.rows_written.labels(source=source).inc(rows_count)
+
+    def _write_currencies(
+        self,
+        currencies_data: typing.List[national_bank_schemas.CurrencyData],
+        source: str,
+        bulk: bool,
+        compact: bool,
+    ) -> int:
+        """
+        Write the history of currencies data with resolved ids.
+
+        Args:
+            currencies_data (List[national_bank_schemas.CurrencyData]): The
+            currencies data.
+            source (str): Source of the rates.
+            bulk (bool): Write the history with `bulk_create_currencies`.
+            compact (bool): Write the history with `extend_or_create_currencies`.
+
+        Returns:
+            int: Number of written history rows.
+
+        """
+        if bulk:
+            rows_count = self._history_currencies_repo.bulk_create_currencies(
+                rows=self._history_currencies_repo.build_rows(
+                    currencies_data=currencies_data, source=source
+                ),
+                conn=self._conn,
+            )
+            self._conn.commit()
+            return rows_count
+
+        if compact:
+            currencies_objs, extended_count = (
+                self._history_currencies_repo.extend_or_create_currencies(
+                    currencies_data=currencies_data,
+                    conn=self._conn,
+                    source=source,
+                )
+            )
+            logger.app_logger.info(
+                f"Stored currencies of {source}: {len(currencies_objs)} "
+                f"created, {extended_count} extended"
+            )
+            return len(currencies_objs)
+
+        currencies_objs = self._history_currencies_repo.create_currencies(
+            currencies_data=currencies_data, conn=self._conn, source=source
+        )
+        return len(currencies_objs)
+
+    def _bump_data_version(self):
+        """
+        Bump the version of the currency data, if any.
+
+        The rates are already committed, so a failure is only logged:
+        the API then serves its cached responses until they expire.
+        """
+        if self._data_version is None:
+            return
+
+        try:
+            version = self._data_version.bump()
+        except Exception:
+            logger.app_logger.exception("Bumping the version of the data failed")
+            return
+
+        logger.app_logger.info(f"Bumped the version of the data to {version}")
+
+    @staticmethod
+    def _record_fetch_failure(result: http_client.FetchResult):
+        """
+        Log and count a failed fetch.
+
+        Args:
+            result (http_client.FetchResult): The failed response.
+
+        """
+        logger.app_logger.error(
+            f"Fetching currencies from {result.url} failed: {result.error}"
+        )
+        metrics.record_failure(stage="fetch", error=str(result.error))
+
+    def _ensure_lease(self):
+        """
+        Check that the lease of the poll, if any, is still held.
+
+        Raises:
+            lock.LeaseLostError: If the lease expired or was taken over.
+
+        """
+        if self._lease is not None:
+            self._lease.ensure_held()
@@ -0,0 +1,248 @@
+"""
+Module defining the NationalBankBackfill class for loading
+historical National Bank rates over arbitrary date ranges.
+
+The exchange endpoint is called once per date with bounded concurrency,
+the payloads are parsed into compact rows in a process pool and the rates
+are bulk-inserted
+with their real exchange date and folded into the rollups of the history.
+Every stored date is checkpointed in the same transaction, so an interrupted
+backfill can be restarted safely.
+"""
+
+import concurrent.futures
+import datetime
+import multiprocessing
+import typing
+
+from sqlalchemy import orm
+
+from components.core import config, http_client, logger
+from components.currencies import (
+    cache as currency_cache,
+    checkpoint_repository,
+    history_currencies_repository,
+    repository as currency_repository,
+    schemas as currency_schemas,
+)
+from components.third_party.national_bank import (
+    constants as national_bank_constants,
+    parser as national_bank_parser,
+    schemas as national_bank_schemas,
+)
+
+cnfg = config.config
+
+
+class NationalBankBackfill:
+    def __init__(
+        self,
+        conn: orm.Session,
+        currencies_api_url: str = cnfg.BANK_URL,
+        request_timeout: int = national_bank_constants.TIMEOUT,
+        chunk_days: int = national_bank_constants.BACKFILL_CHUNK_DAYS,
+        processes: typing.Optional[int] = None,
+        history_currencies_repo: history_currencies_repository.HistoryCurrenciesRepository = history_currencies_repository.HistoryCurrenciesRepository(),  # noqa: E501
+        currency_repo: currency_repository.CurrencyRepostitory = currency_repository.CurrencyRepostitory(  # noqa: E501
+            cache=currency_cache.currency_id_cache
+        ),
+        checkpoint_repo: checkpoint_repository.BackfillCheckpointRepository = checkpoint_repository.BackfillCheckpointRepository(),  # noqa: E501
+        fetcher: typing.Optional[http_client.AsyncFetcher] = None,
+    ):
+
+        self._currencies_api_url: str = currencies_api_url
+        self._timeout: int = request_timeout
+        self._chunk_days: int = chunk_days
+        self._processes: typing.Optional[int] = processes
+        self._fetcher: http_client.AsyncFetcher = (
+            fetcher or http_client.AsyncFetcher.get_fetcher()
+        )
+
+        self._history_currencies_repo: (
+            history_currencies_repository.HistoryCurrenciesRepository
+        ) = history_currencies_repo
+        self._currency_repo: currency_repository.CurrencyRepostitory = currency_repo
+        self._checkpoint_repo: checkpoint_repository.BackfillCheckpointRepository = (
+            checkpoint_repo
+        )
+        self._conn = conn
+
+    def build_url(self, date: datetime.date) -> str:
+        """
+        Build the URL of the rates of a single exchange date.
+
+        Args:
+            date (datetime.date): The exchange date.
+
+        Returns:
+            str: The URL of the exchange endpoint for the date.
+
+        """
+        separator = "&" if "?" in self._currencies_api_url else "?"
+        request_date = date.strftime(national_bank_constants.REQUEST_DATE_FORMAT)
+
+        return (
+            f"{self._currencies_api_url}{separator}"
+            f"{national_bank_constants.KEY_DATE}={request_date}"
+        )
+
+    def run(self, date_from: datetime.date, date_to: datetime.date) -> int:
+        """
+        Backfill the rates of every date of a range.
+
+        The range ends yesterday at the latest: the rates of today are stored
+        by the polls, and a backfilled row of today would duplicate them.
+        Dates already checkpointed are skipped. The remaining dates are
+        processed in chunks of `chunk_days`, each chunk in its own transaction.
+        Dates whose request failed are not checkpointed and are retried
+        by the next run.
+
+        Args:
+            date_from (datetime.date): First date of the range.
+            date_to (datetime.date): Last date of the range, inclusive.
+
+        Returns:
+            int: Number of written history rows.
+
+        """
+        yesterday = datetime.datetime.now(
+            datetime.timezone.utc
+        ).date() - datetime.timedelta(days=1)
+        if date_to > yesterday:
+            logger.app_logger.info(
+                f"Backfill {date_from}..{date_to}: capped at {yesterday}, "
+                "later dates are stored by the polls"
+            )
+            date_to = yesterday
+
+        completed_dates = self._checkpoint_repo.get_completed_dates(
+            date_from=date_from, date_to=date_to, conn=self._conn
+        )
+        pending_dates = [
+            date_from + datetime.timedelta(days=day)
+            for day in range((date_to - date_from).days + 1)
+            if date_from + datetime.timedelta(days=day) not in completed_dates
+        ]
+        logger.app_logger.info(
+            f"Backfill {date_from}..{date_to}: {len(completed_dates)} dates done, "
+            f"{len(pending_dates)} pending"
+        )
+
+        rows_count = 0
+        with concurrent.futures.ProcessPoolExecutor(
+            self._processes, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            for start in range(0, len(pending_dates), self._chunk_days):
+                rows_count += self._backfill_chunk(
+                    dates=pending_dates[start : start + self._chunk_days],
+                    executor=executor,
+                )
+
+        return rows_count
+
+    def _backfill_chunk(
+        self,
+        dates: typing.Sequence[datetime.date],
+        executor: concurrent.futures.Executor,
+    ) -> int:
+        """
+        Fetch, parse and store the rates of a chunk of dates.
+
+        Args:
+            dates (Sequence[datetime.date]): The dates of the chunk.
+            executor (concurrent.futures.Executor): Pool parsing the payloads.
+
+        Returns:
+            int: Number of written history rows.
+
+        """
+        results = self._fetcher.fetch_many_sync(
+            urls=[self.build_url(date=date) for date in dates], timeout=self._timeout
+        )
+
+        fetched_dates = []
+        for date, result in zip(dates, results):
+            if result.ok:
+                fetched_dates.append((date, result.content))
+            else:
+                logger.app_logger.error(
+                    f"Backfill of {date} failed: {result.error}, will be retried"
+                )
+
+        parsed_rows = executor.map(
+            national_bank_parser.parse_historical_currency_rows,
+            [content for _, content in fetched_dates],
+        )
+        dates_to_rows = {
+            date: currency_rows
+            for (date, _), currency_rows in zip(fetched_dates, parsed_rows)
+        }
+        currencies_data = {
+            currency_row["r030"]: national_bank_schemas.CurrencyData(**currency_row)
+            for currency_rows in dates_to_rows.values()
+            for currency_row in currency_rows
+        }
+
+        try:
+            codes_to_ids = self._currency_repo.get_or_create_many(
+                currencies_data=list(currencies_data.values()), conn=self._conn
+            )
+
+            rows = [
+                self._build_row(currency_row=currency_row, codes_to_ids=codes_to_ids)
+                for currency_rows in dates_to_rows.values()
+                for currency_row in currency_rows
+            ]
+            rows_count = self._history_currencies_repo.bulk_create_currencies(
+                rows=rows, conn=self._conn
+            )
+
+            self._checkpoint_repo.create_checkpoints(
+                dates_to_rows={
+                    date: len(currency_rows)
+                    for date, currency_rows in dates_to_rows.items()
+                },
+                conn=self._conn,
+            )
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            self._currency_repo.invalidate_cache()
+            raise
+
+        logger.app_logger.info(
+            f"Backfilled {len(dates_to_rows)}/{len(dates)} dates "
+            f"from {dates[0]} to {dates[-1]}: {rows_count} rows"
+        )
+
+        return rows_count
+
+    @staticmethod
+    def _build_row(
+        currency_row: national_bank_schemas.HistoricalCurrencyRow,
+        codes_to_ids: typing.Mapping[int, int],
+    ) -> currency_schemas.HistoryCurrencyRow:
+        """
+        Build a history row valid for the whole exchange date.
+
+        Args:
+            currency_row (national_bank_schemas.HistoricalCurrencyRow): The
+            parsed rate.
+            codes_to_ids (Mapping[int, int]): Mapping of currency codes to ids.
+
+        Returns:
+            currency_schemas.HistoryCurrencyRow: The row to write.
+
+        """
+        date = datetime.datetime.combine(
+            currency_row["exchangedate"],
+            datetime.time.min,
+            tzinfo=datetime.timezone.utc,
+        )
+
+        return currency_schemas.HistoryCurrencyRow(
+            currency_id=codes_to_ids[currency_row["r030"]],
+            rate=currency_row["rate"],
+            date=date,
+            actualy_end=date + datetime.timedelta(days=1),
+        )
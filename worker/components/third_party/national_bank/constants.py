@@ -6,3 +6,8 @@ in the National Bank service.
 DATE_FORMAT: str = "%d.%m.%Y"
 KEY_EXCHANGEDATE: str = "exchangedate"
 TIMEOUT: int = 20
+SOURCE: str = "nbu"
+
+KEY_DATE: str = "date"
+REQUEST_DATE_FORMAT: str = "%Y%m%d"
+BACKFILL_CHUNK_DAYS: int = 31
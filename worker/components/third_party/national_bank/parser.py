@@ -0,0 +1,70 @@
+"""
+Module providing the parsing of National Bank payloads.
+
+The validators are compiled once at import time and validate the raw
+response bytes directly, without decoding them to str or building
+intermediate Python objects with json.loads. The compact row parsers
+return plain dicts instead of BaseModel instances, for bulk and backfill
+code that handles many rows.
+"""
+
+import typing
+
+import pydantic
+
+from components.third_party.national_bank import schemas
+
+JsonPayload = typing.Union[str, bytes]
+
+currencies_adapter = pydantic.TypeAdapter(typing.List[schemas.CurrencyData])
+currency_rows_adapter = pydantic.TypeAdapter(typing.List[schemas.CurrencyRow])
+historical_currency_rows_adapter = pydantic.TypeAdapter(
+    typing.List[schemas.HistoricalCurrencyRow]
+)
+
+
+def parse_currencies(content: JsonPayload) -> typing.List[schemas.CurrencyData]:
+    """
+    Parse a payload into currency data objects.
+
+    Args:
+        content (Union[str, bytes]): The JSON payload.
+
+    Returns:
+        List[schemas.CurrencyData]: The parsed currency data.
+
+    """
+    return currencies_adapter.validate_json(content)
+
+
+def parse_currency_rows(content: JsonPayload) -> typing.List[schemas.CurrencyRow]:
+    """
+    Parse a payload into compact currency rows.
+
+    Args:
+        content (Union[str, bytes]): The JSON payload.
+
+    Returns:
+        List[schemas.CurrencyRow]: The parsed rows.
+
+    """
+    return currency_rows_adapter.validate_json(content)
+
+
+def parse_historical_currency_rows(
+    content: JsonPayload,
+) -> typing.List[schemas.HistoricalCurrencyRow]:
+    """
+    Parse a payload of a single exchange date into compact rows.
+
+    Defined at module level so it can run in a process pool.
+
+    Args:
+        content (Union[str, bytes]): The JSON payload.
+
+    Returns:
+        List[schemas.HistoricalCurrencyRow]: The parsed rows with their
+        exchange date.
+
+    """
+    return historical_currency_rows_adapter.validate_json(content)
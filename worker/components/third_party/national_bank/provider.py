@@ -0,0 +1,47 @@
+"""Module defining the rate provider of the National Bank of Ukraine."""
+
+import typing
+
+from components.core import config
+from components.third_party import base
+from components.third_party.national_bank import (
+    constants as national_bank_constants,
+    parser as national_bank_parser,
+    schemas as national_bank_schemas,
+)
+
+cnfg = config.config
+
+
+class NationalBankProvider(base.BaseProvider):
+    source: typing.ClassVar[str] = national_bank_constants.SOURCE
+
+    def __init__(
+        self,
+        url: str = cnfg.BANK_URL,
+        timeout: float = national_bank_constants.TIMEOUT,
+    ):
+        """
+        Initializes a NationalBankProvider instance.
+
+        Args:
+            url (str): URL of the current rates.
+            timeout (float): Number of seconds the API may take to answer.
+
+        """
+        super().__init__(url=url, timeout=timeout)
+
+    def parse(
+        self, content: typing.Union[str, bytes]
+    ) -> typing.List[national_bank_schemas.CurrencyData]:
+        """
+        Parse the payload of the national bank's API.
+
+        Args:
+            content (Union[str, bytes]): The payload.
+
+        Returns:
+            List[national_bank_schemas.CurrencyData]: The parsed rates.
+
+        """
+        return national_bank_parser.parse_currencies(content=content)
@@ -1,12 +1,17 @@
 """
 Module defining the Currencies Pydantic model
-for representing currency data.
+for representing currency data, and the compact
+row types used when parsing payloads in bulk.
 """
 
+import datetime
 import decimal
 import typing
 
 import pydantic
+import typing_extensions
+
+from components.third_party.national_bank import constants
 
 
 class CurrencyData(pydantic.BaseModel):
@@ -15,3 +20,33 @@ class CurrencyData(pydantic.BaseModel):
     cc: str
     txt: str
     currency_id: typing.Optional[int] = None
+
+
+def parse_exchangedate(value: typing.Union[str, datetime.date]) -> datetime.date:
+    """
+    Parse the exchange date in the format used by the National Bank.
+
+    Args:
+        value (Union[str, datetime.date]): The raw exchange date.
+
+    Returns:
+        datetime.date: The parsed exchange date.
+
+    """
+    if isinstance(value, str):
+        return datetime.datetime.strptime(value, constants.DATE_FORMAT).date()
+
+    return value
+
+
+class CurrencyRow(typing_extensions.TypedDict):
+    r030: int
+    rate: decimal.Decimal
+    cc: str
+    txt: str
+
+
+class HistoricalCurrencyRow(CurrencyRow):
+    exchangedate: typing_extensions.Annotated[
+        datetime.date, pydantic.BeforeValidator(parse_exchangedate)
+    ]
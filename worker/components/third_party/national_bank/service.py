@@ -5,19 +5,26 @@ the National Bank API and saving currency data.
 
 import typing
 
-import pydantic
-import requests
 from sqlalchemy import orm
-from components.core import config
+from components.core import (
+    config,
+    fingerprint as payload_fingerprint,
+    http_client,
+    lock,
+    metrics,
+)
+from components.third_party import ingestion
 from components.third_party.national_bank import (
     schemas as national_bank_schemas,
     constants as national_bank_constants,
+    parser as national_bank_parser,
+    provider as national_bank_provider,
 )
 from components.currencies import (
+    cache as currency_cache,
     history_currencies_repository,
     repository as currency_repository,
 )
-import json
 from components.core import logger
 
 
@@ -31,11 +38,25 @@ class NationalBankService:
         currencies_api_url: str = cnfg.BANK_URL,
         request_timeout: int = national_bank_constants.TIMEOUT,
         history_currencies_repo: history_currencies_repository.HistoryCurrenciesRepository = history_currencies_repository.HistoryCurrenciesRepository(),  # noqa: E501
-        currency_repo: currency_repository.CurrencyRepostitory = currency_repository.CurrencyRepostitory(),  # noqa: E501
+        currency_repo: currency_repository.CurrencyRepostitory = currency_repository.CurrencyRepostitory(  # noqa: E501
+            cache=currency_cache.currency_id_cache
+        ),
+        fetcher: typing.Optional[http_client.AsyncFetcher] = None,
+        fingerprint_store: typing.Optional[
+            payload_fingerprint.PayloadFingerprintStore
+        ] = None,
+        lease: typing.Optional[lock.Lease] = None,
     ):
 
         self._currencies_api_url: str = currencies_api_url
         self._timeout: int = request_timeout
+        self._fetcher: http_client.AsyncFetcher = (
+            fetcher or http_client.AsyncFetcher.get_fetcher()
+        )
+        self._fingerprint_store: typing.Optional[
+            payload_fingerprint.PayloadFingerprintStore
+        ] = fingerprint_store
+        self._lease: typing.Optional[lock.Lease] = lease
 
         self._history_currencies_repo: (
             history_currencies_repository.HistoryCurrenciesRepository
@@ -43,45 +64,75 @@ class NationalBankService:
         self._currency_repo: currency_repository.CurrencyRepostitory = currency_repo
         self._conn = conn
 
+    def fetch_currencies(
+        self, headers: typing.Optional[typing.Mapping[str, str]] = None
+    ) -> typing.Optional[http_client.FetchResult]:
+        """
+        Fetches the response of the national bank's API.
+
+        The request goes through the pooled AsyncFetcher, which
+        retries transport errors and retryable statuses.
+
+        Args:
+            headers (Optional[Mapping[str, str]]): Extra request headers,
+            such as the validators of a conditional request.
+
+        Returns:
+            Optional[http_client.FetchResult]: The response,
+            or None if the request failed.
+
+        """
+        with metrics.track_stage(stage="fetch"):
+            result = self._fetcher.fetch_sync(
+                url=self._currencies_api_url, headers=headers, timeout=self._timeout
+            )
+        if not result.ok:
+            logger.app_logger.error(
+                f"Fetching currencies from {result.url} failed: {result.error}"
+            )
+            metrics.record_failure(stage="fetch", error=str(result.error))
+            return None
+
+        metrics.payload_bytes.labels(source=national_bank_constants.SOURCE).observe(
+            len(result.content)
+        )
+
+        return result
+
     def get_currencies(self) -> typing.Union[str, None]:
         """
         Fetches currency data from the national bank's API.
 
         Returns:
-            str: The JSON string containing currency data.
+            str: The JSON string containing currency data,
+            or None if the request failed.
 
         """
-        try:
-            response = requests.get(url=self._currencies_api_url, timeout=self._timeout)
-        except requests.exceptions.Timeout as ex:
-            logger.app_logger.error(str(ex))
-        except requests.exceptions.RequestException as ex:
-            logger.app_logger.error(str(ex))
-        finally:
-            return response.text
+        result = self.fetch_currencies()
+        if result is None:
+            return None
+
+        return result.text
 
     def parse_data(
-        self, json_str: str
+        self, json_str: typing.Union[str, bytes]
     ) -> typing.List[national_bank_schemas.CurrencyData]:
         """
          Parses the currency data from JSON string.
 
+        The payload is validated directly, without json.loads,
+        by a validator compiled once at import time.
+
         Args:
-            json_str (str): The JSON string containing currency data.
+            json_str (Union[str, bytes]): The JSON string or raw response bytes
+            containing currency data.
 
         Returns:
             List[national_bank_schemas.Currencies]: List of currency objects.
 
         """
-
-        raw_data = json.loads(json_str)
-
-        type_adapter = pydantic.TypeAdapter(
-            typing.List[national_bank_schemas.CurrencyData]
-        )
-        currencies_data = type_adapter.validate_python(raw_data)
-
-        return currencies_data
+        with metrics.track_stage(stage="parse"):
+            return national_bank_parser.parse_currencies(content=json_str)
 
     def save_currency(
         self, currency_data: national_bank_schemas.CurrencyData
@@ -108,23 +159,39 @@ class NationalBankService:
         currency_data.currency_id = currency.id  # type: ignore
         return currency_data
 
-    def save_currencies_data(self):
+    def save_currencies_data(self, bulk: bool = False, compact: bool = True):
         """
         Save currencies data.
 
-        This method retrieves currencies data, parses it,
-        saves each currency data object
-        using the `save_currency` method, and then
-        creates historical currency entries
-        using the `create_currencies` method of
-        the HistoryCurrenciesRepository.
-        """
-        json_str = self.get_currencies()
-        if json_str:
-            currencies_data = self.parse_data(json_str=json_str)
+        This method polls the national bank's API through the
+        RatesIngestionService, which parses the data, resolves the ids
+        of all currencies with a single `get_or_create_many` call
+        of the CurrencyRepository and stores historical currency entries
+        tagged with the national bank's source.
 
-            currencies_data = list(map(self.save_currency, currencies_data))
+        With a fingerprint store, the request is conditional and a payload
+        equal to the last stored one is neither parsed nor written. With
+        a lease, its fencing token is checked before anything is written.
 
-            self._history_currencies_repo.create_currencies(
-                currencies_data=currencies_data, conn=self._conn
-            )
+        Args:
+            bulk (bool): Write the history with `bulk_create_currencies`,
+            skipping ORM objects.
+            compact (bool): Unless `bulk` is set, write the history with
+            `extend_or_create_currencies`, which extends the entries of
+            unchanged rates, instead of `create_currencies`.
+
+        """
+        rates_ingestion = ingestion.RatesIngestionService(
+            conn=self._conn,
+            providers=[
+                national_bank_provider.NationalBankProvider(
+                    url=self._currencies_api_url, timeout=self._timeout
+                )
+            ],
+            history_currencies_repo=self._history_currencies_repo,
+            currency_repo=self._currency_repo,
+            fetcher=self._fetcher,
+            fingerprint_store=self._fingerprint_store,
+            lease=self._lease,
+        )
+        rates_ingestion.save_currencies_data(bulk=bulk, compact=compact)
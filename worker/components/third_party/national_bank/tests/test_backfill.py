@@ -0,0 +1,161 @@
+"""
+Module providing unit tests for
+the NationalBankBackfill class.
+"""
+
+import datetime
+import json
+import typing
+
+import httpx
+import pytest
+
+from components.core import http_client
+from components.core.testing_database import create_sqlite_inmemory_session
+from components.currencies import (
+    checkpoint_repository,
+    history_currencies_repository,
+    repository as currency_repository,
+)
+from components.third_party.national_bank import backfill
+
+DATE_FROM: datetime.date = datetime.date(2024, 5, 15)
+DATE_TO: datetime.date = datetime.date(2024, 5, 17)
+
+
+@pytest.fixture
+def requested_dates() -> typing.List[str]:
+    """
+    Fixture collecting the dates requested from the mock API.
+
+    Returns:
+        List[str]: The requested dates, in the YYYYMMDD format.
+
+    """
+    return []
+
+
+@pytest.fixture
+def mock_fetcher(
+    requested_dates: typing.List[str],
+) -> typing.Iterator[http_client.AsyncFetcher]:
+    """
+    Fixture for creating a fetcher answering with the rates of the requested date.
+
+    The first request of the last date of the range fails.
+
+    Args:
+        requested_dates (List[str]): Collector of the requested dates.
+
+    Yields:
+        http_client.AsyncFetcher: A fetcher backed by a mock transport.
+
+    """
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        date = datetime.datetime.strptime(request.url.params["date"], "%Y%m%d")
+        if date.date() == DATE_TO and DATE_TO.strftime("%Y%m%d") not in requested_dates:
+            requested_dates.append(request.url.params["date"])
+            return httpx.Response(404)
+
+        requested_dates.append(request.url.params["date"])
+
+        return httpx.Response(
+            200,
+            text=json.dumps(
+                [
+                    dict(
+                        r030=36,
+                        txt="Австралійський долар",
+                        rate=26 + date.day / 100,
+                        cc="AUD",
+                        exchangedate=date.strftime("%d.%m.%Y"),
+                    )
+                ]
+            ),
+        )
+
+    fetcher = http_client.AsyncFetcher(
+        transport=httpx.MockTransport(handler), backoff=0
+    )
+
+    yield fetcher
+
+    fetcher.close()
+
+
+def test_backfill_is_resumable(
+    mock_fetcher: http_client.AsyncFetcher, requested_dates: typing.List[str]
+):
+    """
+    Test that a backfill stores every date once and only retries failed dates.
+
+    Args:
+        mock_fetcher (http_client.AsyncFetcher): Fetcher backed by a mock transport.
+        requested_dates (List[str]): Collector of the requested dates.
+
+    """
+    history_currencies_repo = (
+        history_currencies_repository.HistoryCurrenciesRepository()
+    )
+
+    with create_sqlite_inmemory_session() as conn:
+        nb_backfill = backfill.NationalBankBackfill(
+            conn=conn,
+            currencies_api_url="https://example.com/api?json",
+            chunk_days=2,
+            processes=1,
+            history_currencies_repo=history_currencies_repo,
+            currency_repo=currency_repository.CurrencyRepostitory(),
+            checkpoint_repo=checkpoint_repository.BackfillCheckpointRepository(),
+            fetcher=mock_fetcher,
+        )
+
+        assert nb_backfill.run(date_from=DATE_FROM, date_to=DATE_TO) == 2
+        assert nb_backfill.run(date_from=DATE_FROM, date_to=DATE_TO) == 1
+        assert nb_backfill.run(date_from=DATE_FROM, date_to=DATE_TO) == 0
+
+        history_currencies_objs = history_currencies_repo.get_all(conn=conn)
+
+    assert sorted(requested_dates) == ["20240515", "20240516", "20240517", "20240517"]
+    assert sorted(obj.date.day for obj in history_currencies_objs) == [15, 16, 17]
+
+
+def test_backfill_ends_yesterday(
+    mock_fetcher: http_client.AsyncFetcher, requested_dates: typing.List[str]
+):
+    """
+    Test that a backfill never stores the dates covered by the polls.
+
+    Args:
+        mock_fetcher (http_client.AsyncFetcher): Fetcher backed by a mock transport.
+        requested_dates (List[str]): Collector of the requested dates.
+
+    """
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+
+    with create_sqlite_inmemory_session() as conn:
+        nb_backfill = backfill.NationalBankBackfill(
+            conn=conn,
+            currencies_api_url="https://example.com/api?json",
+            processes=1,
+            history_currencies_repo=(
+                history_currencies_repository.HistoryCurrenciesRepository()
+            ),
+            currency_repo=currency_repository.CurrencyRepostitory(),
+            checkpoint_repo=checkpoint_repository.BackfillCheckpointRepository(),
+            fetcher=mock_fetcher,
+        )
+
+        assert nb_backfill.run(date_from=today, date_to=today) == 0
+        assert (
+            nb_backfill.run(
+                date_from=today - datetime.timedelta(days=2),
+                date_to=today + datetime.timedelta(days=1),
+            )
+            == 2
+        )
+
+    assert sorted(requested_dates) == [
+        (today - datetime.timedelta(days=days)).strftime("%Y%m%d") for days in (2, 1)
+    ]
@@ -0,0 +1,33 @@
+"""
+Module providing unit tests for
+the National Bank payload parsers.
+"""
+
+import datetime
+from decimal import Decimal
+
+from components.third_party.national_bank import parser, schemas
+
+PAYLOAD: bytes = (
+    '[{"r030": 36, "txt": "Австралійський долар", "rate": 26.2832,'
+    ' "cc": "AUD", "exchangedate": "16.05.2024"}]'
+).encode("utf-8")
+
+
+def test_parse_currencies_from_bytes():
+    """Test that raw response bytes are parsed into currency data objects."""
+    assert parser.parse_currencies(content=PAYLOAD) == [
+        schemas.CurrencyData(
+            r030=36, rate=Decimal("26.2832"), cc="AUD", txt="Австралійський долар"
+        )
+    ]
+
+
+def test_parse_compact_rows():
+    """Test that compact rows are plain dicts with validated values."""
+    assert parser.parse_currency_rows(content=PAYLOAD) == [
+        dict(r030=36, rate=Decimal("26.2832"), cc="AUD", txt="Австралійський долар")
+    ]
+    assert parser.parse_historical_currency_rows(content=PAYLOAD)[0][
+        "exchangedate"
+    ] == datetime.date(2024, 5, 16)
@@ -3,12 +3,17 @@ Module providing unit tests for
 the NationalBankService class.
 """
 
+import fakeredis
+import httpx
 import pytest
+import sqlalchemy
 from unittest.mock import MagicMock, patch
-from components.third_party.national_bank import service, schemas
+from components.core import constants, fingerprint, http_client, lock
+from components.third_party.national_bank import parser, service, schemas
 from components.core.testing_database import create_sqlite_inmemory_session
 from components.currencies import (
     history_currencies_repository,
+    models as currency_models,
     repository as currency_repository,
 )
 import typing
@@ -32,6 +37,9 @@ def national_bank_service() -> typing.Callable:
         timeout: int = 5,
         currency_repo: MagicMock = MagicMock(),
         history_currencies_repo: MagicMock = MagicMock(),
+        fetcher: MagicMock = MagicMock(),
+        fingerprint_store: typing.Optional[MagicMock] = None,
+        lease: typing.Optional[lock.Lease] = None,
     ):
         return service.NationalBankService(
             conn=conn,
@@ -39,6 +47,9 @@ def national_bank_service() -> typing.Callable:
             request_timeout=timeout,
             currency_repo=currency_repo,
             history_currencies_repo=history_currencies_repo,
+            fetcher=fetcher,
+            fingerprint_store=fingerprint_store,
+            lease=lease,
         )
 
     return create_national_bank_service
@@ -85,33 +96,71 @@ def mock_json() -> str:
     return json_str
 
 
-@patch("requests.get")
+@pytest.fixture
+def mock_fetcher(mock_json: str) -> typing.Iterator[http_client.AsyncFetcher]:
+    """
+    Fixture for creating a fetcher answering every request with mock JSON.
+
+    Args:
+        mock_json (str): Mock JSON string representing currency data.
+
+    Yields:
+        http_client.AsyncFetcher: A fetcher backed by a mock transport.
+
+    """
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text=mock_json))
+    fetcher = http_client.AsyncFetcher(transport=transport, backoff=0)
+
+    yield fetcher
+
+    fetcher.close()
+
+
 def test_get_currencies(
-    mock_request_get: MagicMock, national_bank_service: typing.Callable, mock_json: str
+    mock_fetcher: http_client.AsyncFetcher,
+    national_bank_service: typing.Callable,
+    mock_json: str,
 ):
     """
     Test the retrieval of currency data from the API.
 
-    This test function mocks the HTTP GET request
-    to the currency API endpoint and
+    This test function stubs the HTTP transport
+    of the currency API endpoint and
     verifies that the NationalBankService is able
     to retrieve the expected currency data.
 
     Args:
-        mock_request_get (MagicMock): Mock object for the requests.get function.
+        mock_fetcher (http_client.AsyncFetcher): Fetcher backed by a mock transport.
         national_bank_service (callable): Fixture function
         for creating an instance of NationalBankService.
         mock_json (str): Mock JSON string representing currency data.
 
     """
-    nb_service = national_bank_service()
-    mock_response = MagicMock(text=mock_json)
-    mock_request_get.return_value = mock_response
+    nb_service = national_bank_service(fetcher=mock_fetcher)
     result = nb_service.get_currencies()
 
     assert result == mock_json
 
 
+def test_get_currencies_failed(national_bank_service: typing.Callable):
+    """
+    Test that a failed request is reported as missing data.
+
+    Args:
+        national_bank_service (callable): Fixture function
+        for creating an instance of NationalBankService.
+
+    """
+    transport = httpx.MockTransport(lambda request: httpx.Response(503))
+    fetcher = http_client.AsyncFetcher(transport=transport, retries=1, backoff=0)
+
+    nb_service = national_bank_service(fetcher=fetcher)
+    try:
+        assert nb_service.get_currencies() is None
+    finally:
+        fetcher.close()
+
+
 def test_parse_data(national_bank_service: typing.Callable, mock_json: str):
     """
     Test the parsing of currency data from a JSON string.
@@ -143,30 +192,25 @@ def test_parse_data(national_bank_service: typing.Callable, mock_json: str):
     assert result == currnecies_data
 
 
-@patch("requests.get")
 def test_save_currencies(
-    mock_request_get: MagicMock, national_bank_service: typing.Callable, mock_json: str
+    mock_fetcher: http_client.AsyncFetcher, national_bank_service: typing.Callable
 ):
     """
     Test the saving of currency data to the database.
 
-    This test function mocks the HTTP GET
-    request to the currency API endpoint,
+    This test function stubs the HTTP transport
+    of the currency API endpoint,
     retrieves currency data, saves it to the
     database using NationalBankService,
     and verifies that the data is successfully saved.
 
     Args:
-        mock_request_get (MagicMock): Mock object for
-        the requests.get function.
+        mock_fetcher (http_client.AsyncFetcher): Fetcher backed by
+        a mock transport.
         national_bank_service (callable): Fixture function
         for creating an instance of NationalBankService.
-        mock_json (str): Mock JSON string representing currency data.
 
     """
-    mock_response = MagicMock(text=mock_json)
-    mock_request_get.return_value = mock_response
-
     history_currencies_repo = (
         history_currencies_repository.HistoryCurrenciesRepository()
     )
@@ -177,8 +221,105 @@ def test_save_currencies(
             conn=conn,
             currency_repo=currency_repo,
             history_currencies_repo=history_currencies_repo,
+            fetcher=mock_fetcher,
         )
         nb_service.save_currencies_data()
         currencies_obj = history_currencies_repo.get_all(conn=conn)
 
         assert currencies_obj
+
+
+def test_save_currencies_skips_unchanged_payload(
+    national_bank_service: typing.Callable, mock_json: str
+):
+    """
+    Test that an unchanged payload is not parsed nor written again.
+
+    The mock API supports ETag validators, so the second poll
+    is answered with 304 Not Modified and only extends the stored rates,
+    which are still sampled into the rollups.
+
+    Args:
+        national_bank_service (callable): Fixture function
+        for creating an instance of NationalBankService.
+        mock_json (str): Mock JSON string representing currency data.
+
+    """
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text=mock_json, headers={"ETag": '"v1"'})
+
+    fetcher = http_client.AsyncFetcher(
+        transport=httpx.MockTransport(handler), backoff=0
+    )
+    redis_client = fakeredis.FakeRedis()
+    history_currencies_repo = (
+        history_currencies_repository.HistoryCurrenciesRepository()
+    )
+
+    with create_sqlite_inmemory_session() as conn:
+        nb_service = national_bank_service(
+            conn=conn,
+            currency_repo=currency_repository.CurrencyRepostitory(),
+            history_currencies_repo=history_currencies_repo,
+            fetcher=fetcher,
+            fingerprint_store=fingerprint.PayloadFingerprintStore(client=redis_client),
+        )
+        with patch.object(
+            parser, "parse_currencies", wraps=parser.parse_currencies
+        ) as parse_currencies:
+            nb_service.save_currencies_data()
+            nb_service.save_currencies_data()
+
+        assert len(history_currencies_repo.get_all(conn=conn)) == 1
+        assert (
+            conn.execute(
+                sqlalchemy.select(currency_models.DailyCurrencyRollup.samples)
+            ).scalar_one()
+            == 2
+        )
+
+    fetcher.close()
+
+    parse_currencies.assert_called_once()
+    assert int(redis_client.get(constants.SKIPPED_POLLS_KEY)) == 1
+
+
+def test_save_currencies_with_lost_lease(
+    mock_fetcher: http_client.AsyncFetcher, national_bank_service: typing.Callable
+):
+    """
+    Test that a poll whose lease was taken over writes nothing.
+
+    Args:
+        mock_fetcher (http_client.AsyncFetcher): Fetcher backed by
+        a mock transport.
+        national_bank_service (callable): Fixture function
+        for creating an instance of NationalBankService.
+
+    """
+    currencies_lock = lock.LeaseLock(
+        client=fakeredis.FakeRedis(), name="get_currencies", ttl=60_000
+    )
+    lease = currencies_lock.acquire()
+    currencies_lock.release(lease)
+    currencies_lock.acquire()
+    history_currencies_repo = (
+        history_currencies_repository.HistoryCurrenciesRepository()
+    )
+
+    with create_sqlite_inmemory_session() as conn:
+        nb_service = national_bank_service(
+            conn=conn,
+            currency_repo=currency_repository.CurrencyRepostitory(),
+            history_currencies_repo=history_currencies_repo,
+            fetcher=mock_fetcher,
+            lease=lease,
+        )
+
+        with pytest.raises(lock.LeaseLostError):
+            nb_service.save_currencies_data()
+
+        assert not history_currencies_repo.get_all(conn=conn)
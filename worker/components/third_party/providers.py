@@ -0,0 +1,12 @@
+"""
+Module holding the registry of the available rate providers.
+
+A new provider is made available to the worker by registering
+its class here and adding its source name to RATE_PROVIDERS.
+"""
+
+from components.third_party import base
+from components.third_party.national_bank import provider as national_bank_provider
+
+registry = base.ProviderRegistry()
+registry.register(national_bank_provider.NationalBankProvider)
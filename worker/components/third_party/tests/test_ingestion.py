@@ -0,0 +1,273 @@
+"""
+Module providing unit tests for
+the RatesIngestionService class and the provider registry.
+"""
+
+import asyncio
+import time
+import typing
+
+import fakeredis
+import httpx
+import pytest
+
+from components.core import circuit_breaker, data_version, fingerprint, http_client
+from components.core.testing_database import create_sqlite_inmemory_session
+from components.currencies import (
+    history_currencies_repository,
+    repository as currency_repository,
+)
+from components.third_party import base, ingestion, providers
+from components.third_party.national_bank import (
+    parser as national_bank_parser,
+    provider as national_bank_provider,
+    schemas as national_bank_schemas,
+)
+
+PAYLOAD: str = """
+[
+  {
+    "r030": 36,
+    "txt": "Австралійський долар",
+    "rate": 26.2832,
+    "cc": "AUD",
+    "exchangedate": "16.05.2024"
+  }
+]"""
+SLOW_DELAY: float = 2.0
+BUDGET: float = 0.3
+
+
+class FastProvider(base.BaseProvider):
+    source: typing.ClassVar[str] = "fast"
+
+    def parse(
+        self, content: typing.Union[str, bytes]
+    ) -> typing.List[national_bank_schemas.CurrencyData]:
+        """
+        Parse a payload in the format of the national bank.
+
+        Args:
+            content (Union[str, bytes]): The payload.
+
+        Returns:
+            List[national_bank_schemas.CurrencyData]: The parsed rates.
+
+        """
+        return national_bank_parser.parse_currencies(content=content)
+
+
+class SlowProvider(FastProvider):
+    source: typing.ClassVar[str] = "slow"
+
+
+@pytest.fixture
+def fetcher() -> typing.Iterator[http_client.AsyncFetcher]:
+    """
+    Fixture for creating a fetcher whose "slow" host answers late.
+
+    Yields:
+        http_client.AsyncFetcher: Fetcher backed by a mock transport.
+
+    """
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "slow.example.com":
+            await asyncio.sleep(SLOW_DELAY)
+        return httpx.Response(200, text=PAYLOAD)
+
+    fetcher = http_client.AsyncFetcher(
+        transport=httpx.MockTransport(handler), retries=0, backoff=0
+    )
+    yield fetcher
+    fetcher.close()
+
+
+def test_save_currencies_data_fans_out(fetcher: http_client.AsyncFetcher):
+    """
+    Test that providers are fetched concurrently within their budgets,
+    so a slow provider does not delay the others,
+    and that the rates are tagged with their source.
+
+    Args:
+        fetcher (http_client.AsyncFetcher): Fetcher backed by a mock transport.
+
+    """
+    history_currencies_repo = (
+        history_currencies_repository.HistoryCurrenciesRepository()
+    )
+
+    with create_sqlite_inmemory_session() as conn:
+        rates_ingestion = ingestion.RatesIngestionService(
+            conn=conn,
+            providers=[
+                FastProvider(url="https://fast.example.com/rates", timeout=BUDGET),
+                SlowProvider(url="https://slow.example.com/rates", timeout=BUDGET),
+                FastProvider(url="https://fast.example.com/other", timeout=BUDGET),
+            ],
+            history_currencies_repo=history_currencies_repo,
+            currency_repo=currency_repository.CurrencyRepostitory(),
+            fetcher=fetcher,
+        )
+
+        started_at = time.perf_counter()
+        rates_ingestion.save_currencies_data()
+        elapsed = time.perf_counter() - started_at
+
+        history_objs = history_currencies_repo.get_all(conn=conn)
+
+    assert elapsed < SLOW_DELAY
+    assert [history_obj.source for history_obj in history_objs] == ["fast"]
+
+
+def test_save_currencies_data_skips_open_circuits():
+    """
+    Test that a provider whose circuit is open is not called
+    and that failed calls are recorded by the breaker.
+    """
+    requested_hosts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested_hosts.append(request.url.host)
+        if request.url.host == "slow.example.com":
+            return httpx.Response(500)
+        return httpx.Response(200, text=PAYLOAD)
+
+    fetcher = http_client.AsyncFetcher(
+        transport=httpx.MockTransport(handler), retries=0, backoff=0
+    )
+    breaker = circuit_breaker.CircuitBreaker(
+        client=fakeredis.FakeRedis(), failure_threshold=1
+    )
+
+    with create_sqlite_inmemory_session() as conn:
+        rates_ingestion = ingestion.RatesIngestionService(
+            conn=conn,
+            providers=[
+                FastProvider(url="https://fast.example.com/rates", timeout=BUDGET),
+                SlowProvider(url="https://slow.example.com/rates", timeout=BUDGET),
+            ],
+            currency_repo=currency_repository.CurrencyRepostitory(),
+            history_currencies_repo=(
+                history_currencies_repository.HistoryCurrenciesRepository()
+            ),
+            fetcher=fetcher,
+            circuit_breaker=breaker,
+        )
+
+        rates_ingestion.save_currencies_data()
+        rates_ingestion.save_currencies_data()
+
+    fetcher.close()
+
+    assert sorted(requested_hosts) == [
+        "fast.example.com",
+        "fast.example.com",
+        "slow.example.com",
+    ]
+    assert (
+        breaker.get_state(name=SlowProvider.source) is circuit_breaker.CircuitState.OPEN
+    )
+
+
+def test_save_currencies_data_refetches_within_deadline():
+    """
+    Test that a 304 Not Modified answer with nothing left to extend is fetched
+    again within the deadline of the poll, and that the failure of the
+    second fetch is recorded by the breaker.
+    """
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        await asyncio.sleep(SLOW_DELAY)
+        return httpx.Response(200, text=PAYLOAD)
+
+    url = "https://fast.example.com/rates"
+    fetcher = http_client.AsyncFetcher(
+        transport=httpx.MockTransport(handler), retries=0, backoff=0
+    )
+    redis_client = fakeredis.FakeRedis()
+    fingerprint_store = fingerprint.PayloadFingerprintStore(client=redis_client)
+    fingerprint_store.save(
+        result=http_client.FetchResult(
+            url=url, status_code=200, content=b"[]", headers={"ETag": '"v1"'}
+        )
+    )
+    breaker = circuit_breaker.CircuitBreaker(client=redis_client, failure_threshold=1)
+    history_currencies_repo = (
+        history_currencies_repository.HistoryCurrenciesRepository()
+    )
+
+    with create_sqlite_inmemory_session() as conn:
+        rates_ingestion = ingestion.RatesIngestionService(
+            conn=conn,
+            providers=[FastProvider(url=url, timeout=SLOW_DELAY * 2)],
+            history_currencies_repo=history_currencies_repo,
+            currency_repo=currency_repository.CurrencyRepostitory(),
+            fetcher=fetcher,
+            fingerprint_store=fingerprint_store,
+            circuit_breaker=breaker,
+            deadline=BUDGET,
+        )
+
+        started_at = time.perf_counter()
+        rates_ingestion.save_currencies_data()
+        elapsed = time.perf_counter() - started_at
+
+        assert not history_currencies_repo.get_all(conn=conn)
+
+    fetcher.close()
+
+    assert elapsed < SLOW_DELAY
+    assert (
+        breaker.get_state(name=FastProvider.source) is circuit_breaker.CircuitState.OPEN
+    )
+
+
+def test_save_currencies_data_bumps_data_version(fetcher: http_client.AsyncFetcher):
+    """
+    Test that the version of the data is bumped by polls which store rates only.
+
+    Args:
+        fetcher (http_client.AsyncFetcher): Fetcher backed by a mock transport.
+
+    """
+    currency_data_version = data_version.DataVersion(client=fakeredis.FakeRedis())
+
+    with create_sqlite_inmemory_session() as conn:
+        for provider, expected_version in [
+            (SlowProvider(url="https://slow.example.com/rates", timeout=BUDGET), 0),
+            (FastProvider(url="https://fast.example.com/rates", timeout=BUDGET), 1),
+        ]:
+            rates_ingestion = ingestion.RatesIngestionService(
+                conn=conn,
+                providers=[provider],
+                currency_repo=currency_repository.CurrencyRepostitory(),
+                history_currencies_repo=(
+                    history_currencies_repository.HistoryCurrenciesRepository()
+                ),
+                fetcher=fetcher,
+                data_version=currency_data_version,
+            )
+            rates_ingestion.save_currencies_data()
+
+            assert currency_data_version.get() == expected_version
+
+
+def test_registry():
+    """Test that the registry creates registered providers and rejects others."""
+    registry = base.ProviderRegistry()
+    registry.register(FastProvider)
+
+    with pytest.raises(ValueError):
+        registry.register(FastProvider)
+
+    with pytest.raises(ValueError):
+        registry.create_providers(sources=["fast", "unknown"])
+
+    assert registry.get_sources() == ["fast"]
+    assert isinstance(
+        providers.registry.create_providers(sources=["nbu"])[0],
+        national_bank_provider.NationalBankProvider,
+    )
@@ -17,3 +17,21 @@ def worker_get_currencies():
 
     """
     worker_tasks.get_currencies()
+
+
+@app.task
+def worker_manage_partitions():
+    """
+    Celery task for maintaining the partitions of the currency history
+    using worker_tasks.manage_partitions().
+    """
+    worker_tasks.manage_partitions()
+
+
+@app.task
+def worker_archive_history():
+    """
+    Celery task for archiving the old currency history
+    using worker_tasks.archive_history().
+    """
+    worker_tasks.archive_history()
@@ -1,7 +1,10 @@
 """Module for configuring Celery application."""
 
+import os
+
 import celery
-from components.core import config
+from components.core import config, constants, database, metrics
+from celery import signals
 from celery.schedules import crontab
 
 WORKER_TASK_QUEUE = "worker-queue"
@@ -36,8 +39,56 @@ def configure_app() -> celery.Celery:
     app.conf.beat_schedule = {
         "worker.": {
             "task": "main.worker_get_currencies",
-            "schedule": crontab(minute="*/15"),
-        }
+            "schedule": crontab(minute=f"*/{constants.GET_CURRENCIES_TICK // 60_000}"),
+        },
+        "worker.manage_partitions": {
+            "task": "main.worker_manage_partitions",
+            "schedule": crontab(minute=0, hour=0),
+        },
+        "worker.archive_history": {
+            "task": "main.worker_archive_history",
+            "schedule": crontab(minute=0, hour=1),
+        },
     }
 
     return app
+
+
+@signals.worker_process_init.connect
+def init_worker_process(**kwargs: object):
+    """
+    Prepare a freshly forked worker process.
+
+    Child processes of the prefork pool must not share the database
+    sockets of the parent, so the inherited engine is replaced.
+
+    Args:
+        kwargs: Signal arguments.
+
+    """
+    database.DatabaseMngr.reset_db()
+
+
+@signals.worker_init.connect
+def init_worker(**kwargs: object):
+    """
+    Start the metrics endpoint in the main worker process.
+
+    Args:
+        kwargs: Signal arguments.
+
+    """
+    if cnfg.METRICS_PORT:
+        metrics.start_metrics_server(port=cnfg.METRICS_PORT)
+
+
+@signals.worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs: object):
+    """
+    Drop the live metrics of an exiting worker process.
+
+    Args:
+        kwargs: Signal arguments.
+
+    """
+    metrics.mark_process_dead(pid=os.getpid())
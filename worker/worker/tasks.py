@@ -1,22 +1,175 @@
 """Module for fetching currencies from the database."""
 
-from components.core import database
-from components.third_party.national_bank import service
+import datetime
+import typing
+
+from components.core import (
+    circuit_breaker,
+    config,
+    constants,
+    data_version,
+    database,
+    fingerprint,
+    lock,
+    redis_client,
+)
+from components.currencies import archive, partition_repository
+from components.third_party import ingestion, providers
+from components.third_party.national_bank import backfill
+
+cnfg = config.config
 
 
 def get_currencies():
     """
     Fetch currencies from the database.
 
-    This function retrieves currency data from
-    the database using the DatabaseMngr.get_db() method,
-    creates an instance of NationalBankService to interact with
-    the database connection, and then
-    saves the fetched currencies using the save_currencies() method
-    of NationalBankService.
+    This function creates the rate providers configured in RATE_PROVIDERS,
+    opens a database connection using the DatabaseMngr.get_db() method,
+    and then fetches the rates of all providers concurrently and saves them
+    using the save_currencies_data() method of RatesIngestionService.
+    Payload fingerprints are kept in Redis,
+    so polls returning unchanged rates are skipped.
+
+    The poll runs under a Redis lease kept until the end of the tick,
+    so only one worker of the cluster ingests a tick, and the copies of the
+    tick scheduled by the beat of every replica return right away, even
+    after the first one finished. Providers which keep
+    failing are skipped by a circuit breaker shared by all workers.
+    Once rates are stored, the version of the currency data is bumped
+    in Redis, which invalidates the responses cached by the API.
+
+    """
+    client = redis_client.RedisMngr.get_client()
+    currencies_lock = lock.LeaseLock(
+        client=client,
+        name=constants.GET_CURRENCIES_LOCK_NAME,
+        ttl=constants.GET_CURRENCIES_TICK,
+    )
+    with currencies_lock.hold(
+        ttl=lock.get_tick_ttl(interval=constants.GET_CURRENCIES_TICK), keep=True
+    ) as lease:
+        if lease is None:
+            return
+
+        db = database.DatabaseMngr.get_db()
+        with db.connect() as conn:
+            rates_ingestion = ingestion.RatesIngestionService(
+                conn=conn,
+                providers=providers.registry.create_providers(
+                    sources=cnfg.RATE_PROVIDERS
+                ),
+                fingerprint_store=fingerprint.PayloadFingerprintStore(client=client),
+                lease=lease,
+                circuit_breaker=circuit_breaker.CircuitBreaker(client=client),
+                data_version=data_version.DataVersion(client=client),
+            )
+            rates_ingestion.save_currencies_data()
+
+
+def backfill_currencies(
+    date_from: datetime.date,
+    date_to: datetime.date,
+    processes: typing.Optional[int] = None,
+) -> int:
+    """
+    Backfill historical currencies over a date range.
+
+    This function creates an instance of NationalBankBackfill bound to
+    a database connection and stores the rates of every date of the range
+    which was not backfilled yet, then bumps the version of the currency
+    data if rows were written.
+
+    Args:
+        date_from (datetime.date): First date of the range.
+        date_to (datetime.date): Last date of the range, inclusive.
+        processes (Optional[int]): Number of processes parsing the payloads.
+
+    Returns:
+        int: Number of written history rows.
+
+    """
+    db = database.DatabaseMngr.get_db()
+    with db.connect() as conn:
+        nb_backfill = backfill.NationalBankBackfill(conn=conn, processes=processes)
+        rows_count = nb_backfill.run(date_from=date_from, date_to=date_to)
+
+    if rows_count:
+        data_version.DataVersion(client=redis_client.RedisMngr.get_client()).bump()
+
+    return rows_count
+
 
+def manage_partitions() -> typing.Tuple[typing.List[str], typing.List[str]]:
     """
+    Maintain the monthly partitions of the currency history.
+
+    This function creates the partitions of the current month and of the
+    next HISTORY_PARTITIONS_AHEAD months which do not exist yet, and the
+    partitions of the months with entries in the default partition, such
+    as backfilled history, moving those entries to them. When
+    HISTORY_RETENTION_MONTHS is set, the partitions of older months are
+    detached, and dropped if HISTORY_DROP_EXPIRED is set. Nothing is done
+    unless the history table is partitioned.
+
+    Returns:
+        Tuple[List[str], List[str]]: Names of the created
+        and of the detached partitions.
+
+    """
+    partition_repo = partition_repository.HistoryPartitionRepository()
+    this_month = datetime.datetime.now(datetime.timezone.utc).date().replace(day=1)
+
+    db = database.DatabaseMngr.get_db()
+    with db.connect() as conn:
+        if not partition_repo.is_partitioned(conn=conn):
+            return [], []
+
+        created = partition_repo.create_partitions(
+            month_from=this_month,
+            months=cnfg.HISTORY_PARTITIONS_AHEAD + 1,
+            conn=conn,
+        )
+        created += partition_repo.split_default_partition(conn=conn)
+
+        detached: typing.List[str] = []
+        if cnfg.HISTORY_RETENTION_MONTHS is not None:
+            detached = partition_repo.detach_partitions(
+                before=partition_repository.add_months(
+                    this_month, -cnfg.HISTORY_RETENTION_MONTHS
+                ),
+                conn=conn,
+                drop=cnfg.HISTORY_DROP_EXPIRED,
+            )
+
+        return created, detached
+
+
+def archive_history() -> typing.List[datetime.date]:
+    """
+    Archive the old currency history to Parquet files.
+
+    This function moves the months of the history ended more than
+    HISTORY_ARCHIVE_AFTER_MONTHS months ago from the database to one file
+    per month in HISTORY_ARCHIVE_DIR. Nothing is done unless
+    HISTORY_ARCHIVE_DIR is set.
+
+    Returns:
+        List[datetime.date]: The first days of the archived months.
+
+    """
+    if cnfg.HISTORY_ARCHIVE_DIR is None:
+        return []
+
+    this_month = datetime.datetime.now(datetime.timezone.utc).date().replace(day=1)
+
     db = database.DatabaseMngr.get_db()
     with db.connect() as conn:
-        nb_service = service.NationalBankService(conn=conn)
-        nb_service.save_currencies_data()
+        archive_service = archive.HistoryArchiveService(
+            conn=conn, archive=archive.HistoryArchive(cnfg.HISTORY_ARCHIVE_DIR)
+        )
+        return archive_service.archive_before(
+            before=partition_repository.add_months(
+                this_month, -cnfg.HISTORY_ARCHIVE_AFTER_MONTHS
+            )
+        )